@@ -1,25 +1,19 @@
+import os
+import calendar
+import threading
+import numpy as np
 import yfinance as yf
-import pandas as pd
+from concurrent.futures import Future
 from datetime import datetime, timedelta, timezone
+from diskcache import Cache, Lock
 import logging
 
-def _to_number(val, is_int=False):
-    if pd.isna(val):
-        return None
-    try:
-        return int(val) if is_int else float(val)
-    except Exception:
-        return None
-
-def _normalize_timestamp(ts):
-    """
-    Force UTC, minute-aligned timestamp.
-    """
-    if ts.tzinfo is None:
-        ts = ts.replace(tzinfo=timezone.utc)
-    else:
-        ts = ts.astimezone(timezone.utc)
-    return ts.replace(second=0, microsecond=0)
+from . import candle_store
+from . import frame
+from . import resample
+from . import shared_candles
+from . import trading_calendar
+from .candle_cache import CandleCache, latest_closed_open
 
 INTERVAL_TO_DELTA = {
     "1m": timedelta(minutes=1),
@@ -37,47 +31,303 @@ INTERVAL_TO_DELTA = {
     "3mo": timedelta(days=90),
 }
 
+# Bars of these intervals span calendar months rather than a fixed delta
+_MONTHS = {"1mo": 1, "3mo": 3}
+
+# In-process tier, shared by every indicator in this process
+CACHE_MAX_BYTES = int(os.getenv("SIM_CANDLE_CACHE_BYTES", str(64 * 1024 * 1024)))
+candle_cache = CandleCache(CACHE_MAX_BYTES)
+
+# Single-flight state: (symbol, interval) -> {"future", "count"} of the load in progress
+_inflight = {}
+_inflight_lock = threading.Lock()
+_coalesced = 0
+
+# An empty in-session range is only recorded as fetched once it is this old,
+# so an outage or a late bar is asked for again rather than left as a hole
+COVERAGE_SETTLE = timedelta(hours=float(os.getenv("SIM_COVERAGE_SETTLE_HOURS", "24")))
+
+# Cross-process fetch locks live in a diskcache shared by all strategy processes
+FETCH_LOCK_PATH = os.getenv("SIM_FETCH_LOCK_PATH", "./Temporary/cache_fetch_locks")
+FETCH_LOCK_EXPIRE = 60
+_lock_cache = None
+
+# Optional replacement for all tiers, e.g. recorded or synthetic candles for
+# offline runs: source(symbol, no_of_candles, interval) -> CandleFrame or None
+_data_source = None
+
+def set_data_source(source):
+    """
+    Serve every candle request from `source` instead of the memory, store and
+    network tiers; None restores the live tiers.
+    """
+    global _data_source
+    _data_source = source
+
+def cache_stats():
+    """
+    Hit/miss counters and memory use of the in-process candle cache, plus the
+    number of requests that waited on an identical in-flight load.
+    """
+    stats = candle_cache.stats()
+    stats["coalesced"] = _coalesced
+    return stats
+
+def _fetch_history(symbol, interval, start, end):
+    """
+    Network tier: download [start, end) from yfinance as a CandleFrame.
+    """
+    # yfinance history end is exclusive
+    df = yf.Ticker(symbol).history(interval=interval, start=start, end=end)
+    return frame.from_history(symbol, df)
+
+def _fetch_lock(symbol, interval):
+    """
+    Cross-process lock held while a (symbol, interval) is fetched from the
+    network, so strategy processes waking on the same minute download it once.
+    """
+    global _lock_cache
+    if _lock_cache is None:
+        _lock_cache = Cache(FETCH_LOCK_PATH, timeout=30)
+    return Lock(_lock_cache, f"fetch:{symbol}:{interval}", expire=FETCH_LOCK_EXPIRE)
+
+def _add_months(ts, months):
+    day = datetime.fromtimestamp(int(ts), tz=timezone.utc)
+    month = day.month - 1 + months
+    year, month = day.year + month // 12, month % 12 + 1
+    return int(day.replace(year=year, month=month, day=min(day.day, calendar.monthrange(year, month)[1])).timestamp())
+
+def bar_ends(timestamps, interval, delta):
+    """
+    Close time (epoch seconds) of the bars opening at sorted `timestamps`.
+    1mo/3mo bars end on the same day of a later month; 5d bars cover trading
+    days, not a fixed span, so only the next bar's open proves one closed.
+    Any bar has closed by the time the next one opens.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    if interval in _MONTHS:
+        ends = np.array([_add_months(ts, _MONTHS[interval]) for ts in timestamps], dtype=np.int64)
+    elif interval == "5d":
+        ends = np.full(len(timestamps), np.iinfo(np.int64).max)
+    else:
+        ends = timestamps + int(delta.total_seconds())
+    if len(timestamps):
+        ends[:-1] = np.minimum(ends[:-1], timestamps[1:])
+    return ends
+
+def _fill_gaps(symbol, interval, start_date, now, delta):
+    """
+    Fill the ranges of [start_date, now) missing from the local store, first
+    by resampling stored 1m bars and then from the network, writing only
+    closed bars back.
+    """
+    gaps = candle_store.missing_ranges(symbol, interval, start_date, now, delta)
+    if not gaps:
+        return
+
+    if resample.can_resample(symbol, interval):
+        # Aggregate locally from stored 1m bars where they are complete
+        resample.update(symbol, interval, gaps[0][0], now)
+        if not candle_store.missing_ranges(symbol, interval, start_date, now, delta):
+            return
+
+    with _fetch_lock(symbol, interval):
+        # Another process may have filled the gaps while we waited for the lock
+        gaps = candle_store.missing_ranges(symbol, interval, start_date, now, delta)
+        if not gaps:
+            return
+
+        # One round trip spanning every gap; already stored rows are ignored on write
+        gap_start, gap_end = gaps[0][0], gaps[-1][1]
+        fetched = _fetch_history(symbol, interval, gap_start, gap_end)
+
+        now_s = int(now.timestamp())
+        ends = bar_ends(fetched.timestamp, interval, delta)
+        n_closed = int((ends <= now_s).sum())
+        candle_store.write_frame(interval, fetched[:n_closed])
+
+        if n_closed < len(fetched):
+            # A still-forming bar must be fetched again once it closes
+            forming = datetime.fromtimestamp(int(fetched.timestamp[n_closed]), tz=timezone.utc)
+            covered_end = min(gap_end, forming)
+        else:
+            # Covered up to the end of the last bar returned. The empty rest is
+            # only covered where the symbol's calendar has no session, or once
+            # it has settled: an empty answer may be an outage or a late bar
+            covered_end = gap_start
+            if n_closed:
+                last_end = datetime.fromtimestamp(int(ends[n_closed - 1]), tz=timezone.utc)
+                covered_end = min(gap_end, max(gap_start, last_end))
+            if covered_end < gap_end:
+                session = resample.session_for(symbol)
+                if session is not None and not resample.in_session(covered_end, gap_end, session):
+                    covered_end = gap_end
+                else:
+                    covered_end = max(covered_end, min(gap_end, now - COVERAGE_SETTLE))
+        candle_store.add_coverage(symbol, interval, gap_start, covered_end)
+
+def _holds_latest(symbol, interval, candles, start_date, now, delta):
+    """
+    True if `candles` hold the latest closed bar, or the store has it covered
+    as empty (e.g. outside the session).
+    """
+    now_s = int(now.timestamp())
+    since = start_date
+    if len(candles):
+        last_ts = int(candles.timestamp[-1])
+        if last_ts >= latest_closed_open(last_ts, int(delta.total_seconds()), now_s):
+            return True
+        last_end = int(bar_ends([last_ts], interval, delta)[0])
+        if last_end >= now_s:
+            return True
+        since = datetime.fromtimestamp(last_end, tz=timezone.utc)
+    return not candle_store.missing_ranges(symbol, interval, since, now, delta)
+
+def _single_flight(symbol, interval, no_of_candles, load):
+    """
+    Run `load` once per (symbol, interval) at a time. Concurrent callers wait
+    for the in-flight load and slice its result when it covers their window;
+    otherwise they retry, by then usually as a local read.
+    """
+    global _coalesced
+    key = (symbol, interval)
+    while True:
+        with _inflight_lock:
+            flight = _inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = {"future": Future(), "count": no_of_candles}
+                _inflight[key] = flight
+            else:
+                _coalesced += 1
+
+        if leader:
+            try:
+                result = load()
+            except BaseException as e:
+                with _inflight_lock:
+                    _inflight.pop(key, None)
+                flight["future"].set_exception(e)
+                raise
+            with _inflight_lock:
+                _inflight.pop(key, None)
+            flight["future"].set_result(result)
+            return result
+
+        result = flight["future"].result()
+        if flight["count"] >= no_of_candles:
+            return result.tail(no_of_candles)
+
+def _read_through(symbol, no_of_candles, interval, now):
+    """
+    Tiered read: shared-memory ring -> in-process bar-aligned cache -> local
+    candle store -> yfinance. Only time ranges missing from the local store are
+    downloaded, and only closed bars are written back, so the store never
+    holds a partial candle.
+    """
+    delta = INTERVAL_TO_DELTA[interval]
+    delta_s = int(delta.total_seconds())
+    now_s = int(now.timestamp())
+
+    # The writer publishes about once a minute; a ring still missing the
+    # latest closed bar is behind, and the lower tiers are asked instead
+    shared = shared_candles.read(symbol, interval, no_of_candles)
+    if shared is not None and len(shared):
+        last_ts = int(shared.timestamp[-1])
+        if last_ts >= latest_closed_open(last_ts, delta_s, now_s):
+            return shared
+
+    cached = candle_cache.get(symbol, interval, no_of_candles, now_s)
+    if cached is not None:
+        return cached
+
+    def load():
+        # Just the trading sessions that hold the requested bars
+        start_date = trading_calendar.start_date(no_of_candles, delta, now, symbol)
+        _fill_gaps(symbol, interval, start_date, now, delta)
+        candles = candle_store.read_frame(symbol, interval, start_date, now)
+
+        if len(candles) < no_of_candles:
+            # Short of bars (unlisted holiday, halt, thin history): widen once
+            start_date = now - (now - start_date) * 2
+            _fill_gaps(symbol, interval, start_date, now, delta)
+            candles = candle_store.read_frame(symbol, interval, start_date, now)
+        current = _holds_latest(symbol, interval, candles, start_date, now, delta)
+        candle_cache.put(symbol, interval, candles, no_of_candles, delta_s, now_s, current)
+        return candles
+
+    return _single_flight(symbol, interval, no_of_candles, load)
+
+def last_seen_timestamp(symbol, interval):
+    """
+    Open time (epoch seconds) of the newest bar already held in memory, from
+    the shared ring or the cache, without touching the store or network.
+    """
+    shared = shared_candles.read(symbol, interval, 1)
+    if shared is not None and len(shared):
+        return int(shared.timestamp[-1])
+    return candle_cache.last_timestamp(symbol, interval)
+
+def holds_latest_bar(symbol, interval):
+    """
+    True if the bars held in memory for `symbol`, as a read would get them
+    now, include the latest closed bar (or the store knows none is due).
+    """
+    if _data_source is not None:
+        return True
+    now = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+    now_s = int(now.timestamp())
+    cached = candle_cache.is_current(symbol, interval, now_s)
+    if cached is not None:
+        return cached
+    shared = shared_candles.read(symbol, interval, 1)
+    if shared is None or not len(shared):
+        return False
+    last_ts = int(shared.timestamp[-1])
+    return last_ts >= latest_closed_open(last_ts, int(INTERVAL_TO_DELTA[interval].total_seconds()), now_s)
+
 def candle_list(symbol, no_of_candles, interval, field="all"):
+    """
+    Return the most recent `no_of_candles` closed candles for `symbol`.
+    field="all" gives a list of candle dicts, a column name gives a list of
+    values and field="arrays" gives a CandleFrame of contiguous NumPy arrays.
+    """
     try:
         if interval not in INTERVAL_TO_DELTA:
             raise ValueError(f"Invalid interval: {interval}")
+        if field not in {"all", "arrays", "open", "high", "low", "close", "volume"}:
+            raise ValueError(f"Invalid field: {field}")
 
-        stock = yf.Ticker(symbol)
-        now = datetime.now(timezone.utc).replace(second=0, microsecond=0)
-
-        # Buffer: Fetch 2x + 10 to account for weekends/holidays/gaps
-        buffer_factor = 2.5 if interval in ["1d", "1wk", "1mo"] else 4.0
-        start_date = now - (INTERVAL_TO_DELTA[interval] * int(no_of_candles * buffer_factor + 10))
-        
-        # yfinance history end is exclusive
-        df = stock.history(interval=interval, start=start_date, end=now)
+        if _data_source is not None:
+            candles = _data_source(symbol, no_of_candles, interval)
+            if candles is None:
+                candles = frame.empty(symbol)
+        else:
+            now = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+            candles = _read_through(symbol, no_of_candles, interval, now)
 
-        if df.empty:
+        if not len(candles):
             logging.warning(f"No data found for symbol: {symbol}")
             return None
 
         # Ensure we only have the requested number of most recent candles
-        df = df.tail(no_of_candles)
-        
-        candles = []
-        for ts, row in df.iterrows():
-            candles.append({
-                "symbol": symbol,
-                "open": _to_number(row["Open"]),
-                "high": _to_number(row["High"]),
-                "low": _to_number(row["Low"]),
-                "close": _to_number(row["Close"]),
-                "volume": _to_number(row["Volume"], is_int=True),
-                "timestamp": _normalize_timestamp(ts.to_pydatetime()),
-            })
-
-        if field == "all":
+        candles = candles.tail(no_of_candles)
+
+        if field == "arrays":
             return candles
-        elif field in {"open", "high", "low", "close", "volume"}:
-            return [candle[field] for candle in candles]
+        elif field == "all":
+            return candles.to_candles()
         else:
-            raise ValueError(f"Invalid field: {field}")
+            return candles.column(field).tolist()
 
     except Exception as e:
         logging.error(f"Error fetching data for symbol {symbol}: {e}")
         return None
+
+def candle_frame(symbol, no_of_candles, interval):
+    """
+    Columnar variant of `candle_list`: a CandleFrame with float64 OHLC, int64
+    volume and int64 UTC epoch-second timestamps, or None when no data exists.
+    The arrays are shared with the cache and must be treated as read-only.
+    """
+    return candle_list(symbol, no_of_candles, interval, field="arrays")
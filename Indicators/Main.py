@@ -9,16 +9,37 @@ from . import trend
 from . import statistics
 from . import signals
 from . import price_transforms
+from . import aio
+from . import stream
+from . import universe
+from . import kernels
+from .compute import compute
+from .memo import memo, wrap as _memoizable
 
 # Create a unified namespace for all indicators
+# Every indicator also takes output="series" (and bars=N) for its whole aligned series,
+# and memoize=True to reuse its result for the rest of the bar (see indicators.memo)
 class indicators:
-    levels = levels
-    market_structure = market_structure
-    moving_avg = moving_avg
-    momentum = momentum
-    volume = volume
-    volatility = volatility
-    trend = trend
-    statistics = statistics
-    signals = signals
-    price_transforms = price_transforms
\ No newline at end of file
+    levels = _memoizable(levels)
+    market_structure = _memoizable(market_structure)
+    moving_avg = _memoizable(moving_avg)
+    momentum = _memoizable(momentum)
+    volume = _memoizable(volume)
+    volatility = _memoizable(volatility)
+    trend = _memoizable(trend)
+    statistics = _memoizable(statistics)
+    signals = _memoizable(signals)
+    price_transforms = _memoizable(price_transforms)
+    # Several indicators from one fetch, e.g. indicators.compute(symbol, "5m", [("rsi", {"period": 14}), ("atr", {"period": 14})])
+    compute = staticmethod(compute)
+    # Pure array kernels behind every indicator, e.g. indicators.kernels.rsi(close, 14)
+    kernels = kernels
+    # Incremental O(1)-per-bar indicators, e.g. indicators.stream.RSI(14).warm_up(symbol, "1m")
+    stream = stream
+    # Whole-universe (symbols x bars) loader and kernels for screeners, and
+    # incremental covariance/correlation matrices (RollingCovariance, EWCovariance)
+    universe = universe
+    # Awaitable variants, e.g. await indicators.aio.momentum.rsi(symbol, 14, "5m")
+    aio = aio
+    # Result memo: memo.enable() to memoize every call, memo.stats() for hit rates
+    memo = memo
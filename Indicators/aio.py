@@ -0,0 +1,79 @@
+import os
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from . import Candle_fetcher
+from . import compute as _compute
+from . import levels
+from . import market_structure
+from . import moving_avg
+from . import momentum
+from . import volume
+from . import volatility
+from . import trend
+from . import statistics
+from . import signals
+from . import price_transforms
+
+# Awaitable market data and indicators for strategies running an event loop.
+# Calls run on a bounded thread pool, so a slow fetch for one symbol no longer
+# blocks order acknowledgements or fetches for other symbols, e.g.
+#   await asyncio.gather(*(aio.momentum.rsi(s, 14, "5m") for s in symbols))
+
+MAX_WORKERS = int(os.getenv("SIM_DATA_WORKERS", "8"))
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="paperquant-data")
+
+
+async def run(func, *args, **kwargs):
+    """
+    Run a blocking data/indicator call on the shared pool and await its result.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+
+async def candle_list(symbol, no_of_candles, interval, field="all"):
+    return await run(Candle_fetcher.candle_list, symbol, no_of_candles, interval, field=field)
+
+
+async def candle_frame(symbol, no_of_candles, interval):
+    return await run(Candle_fetcher.candle_frame, symbol, no_of_candles, interval)
+
+
+async def compute(symbol, interval, specs, bars=None, tolerance=None):
+    return await run(_compute.compute, symbol, interval, specs, bars=bars, tolerance=tolerance)
+
+
+class _AsyncModule:
+    """
+    Exposes every public function of an indicator module as a coroutine.
+    """
+
+    def __init__(self, module):
+        self._module = module
+
+    def __getattr__(self, name):
+        func = getattr(self._module, name)
+        if name.startswith("_") or not callable(func):
+            return func
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await run(func, *args, **kwargs)
+
+        setattr(self, name, wrapper)
+        return wrapper
+
+
+levels = _AsyncModule(levels)
+market_structure = _AsyncModule(market_structure)
+moving_avg = _AsyncModule(moving_avg)
+momentum = _AsyncModule(momentum)
+volume = _AsyncModule(volume)
+volatility = _AsyncModule(volatility)
+trend = _AsyncModule(trend)
+statistics = _AsyncModule(statistics)
+signals = _AsyncModule(signals)
+price_transforms = _AsyncModule(price_transforms)
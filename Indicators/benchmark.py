@@ -0,0 +1,282 @@
+import os
+import gc
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics as stats
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from . import Candle_fetcher
+from . import candle_store
+from . import frame
+from .compute import MODULES
+
+# Offline indicator benchmark. Candles come from a pluggable source (seeded
+# synthetic OHLCV or bars recorded in the local candle store) installed with
+# Candle_fetcher.set_data_source, so no run touches the network. Every public
+# indicator is timed in output="series" mode over each size and the results
+# are written as JSON for diffing between releases, e.g.
+#   python -m Indicators.benchmark --out bench.json
+#   python -m Indicators.benchmark --baseline bench.json --tolerance 1.25
+
+SIZES = (100, 1_000, 10_000, 100_000)
+SYMBOL = "BENCH"
+INTERVAL = "1m"
+MIN_TIME = float(os.getenv("SIM_BENCH_MIN_TIME", "0.2"))
+MAX_REPEATS = 50
+
+# Parameters per indicator; anything not listed uses DEFAULT_PARAMS
+SWEEP_PERIODS = tuple(range(5, 201, 5))
+DEFAULT_PARAMS = {"period": 14}
+PARAMS = {
+    "macd": {"short_period": 12, "long_period": 26, "signal_period": 9},
+    "fib_retracement": {"period": 14, "level": 0.618},
+    "fib_extension": {"period": 14, "level": 1.618},
+    "moving_average_crossover": {"period": 22},
+    "sma_sweep": {"periods": SWEEP_PERIODS},
+    "ema_sweep": {"periods": SWEEP_PERIODS},
+    "bollinger_bands_sweep": {"periods": SWEEP_PERIODS},
+    "z_score_sweep": {"periods": SWEEP_PERIODS},
+    "beta": {"benchmark": "BENCH_INDEX", "period": 14},
+    "correlation": {"benchmark": "BENCH_INDEX", "period": 14},
+    "rolling_statistics": {"periods": SWEEP_PERIODS, "benchmark": "BENCH_INDEX"},
+    "candle_patterns": {},
+}
+
+
+class SyntheticSource:
+    """
+    Deterministic geometric random walk with consistent OHLCV, one bar per
+    interval and no session gaps. Bars are generated from the fixed end
+    backwards, each field from its own stream, so the last n bars are the
+    same whatever size is requested, and the same seed always yields them.
+    """
+
+    def __init__(self, seed=0):
+        self.seed = seed
+        self._frames = {}
+
+    def _generate(self, symbol, n, interval):
+        returns, wicks, volumes = (np.random.default_rng([self.seed, stream]) for stream in range(3))
+        delta_s = int(Candle_fetcher.INTERVAL_TO_DELTA[interval].total_seconds())
+        # Newest first: n + 1 closes, the oldest only opening the first bar
+        steps = returns.normal(0, 0.001, n + 1)
+        closes = 100 * np.exp(-(np.cumsum(steps) - steps))[::-1]
+        open_, close = closes[:-1], closes[1:]
+        wick = np.abs(wicks.normal(0, 0.0005, (n, 2)))[::-1].T * close
+        high = np.maximum(open_, close) + wick[0]
+        low = np.minimum(open_, close) - wick[1]
+        volume = volumes.integers(100, 10_000, n)[::-1].astype(np.int64)
+        # Fixed end so recorded results do not depend on the wall clock
+        end = 1_767_225_600 - 1_767_225_600 % delta_s
+        timestamp = end - delta_s * np.arange(n, 0, -1, dtype=np.int64)
+        return frame.CandleFrame(symbol, open_, high, low, close, volume, timestamp)
+
+    def __call__(self, symbol, no_of_candles, interval):
+        key = (symbol, interval)
+        current = self._frames.get(key)
+        if current is None or len(current) < no_of_candles:
+            current = self._generate(symbol, no_of_candles, interval)
+            self._frames[key] = current
+        return current.tail(no_of_candles)
+
+    def describe(self):
+        return {"type": "synthetic", "seed": self.seed}
+
+
+class RecordedSource:
+    """
+    Bars recorded in the local candle store for one symbol, served for any
+    requested symbol. Requests beyond the recording get what is there.
+    """
+
+    def __init__(self, symbol, db_path=None):
+        self.symbol = symbol
+        self.db_path = db_path or candle_store.DB_PATH
+        self._frames = {}
+
+    def __call__(self, symbol, no_of_candles, interval):
+        current = self._frames.get(interval)
+        if current is None:
+            start = datetime(1970, 1, 1, tzinfo=timezone.utc)
+            end = datetime.now(timezone.utc)
+            current = candle_store.read_frame(self.symbol, interval, start, end, db_path=self.db_path)
+            self._frames[interval] = current
+        return current.tail(no_of_candles)
+
+    def describe(self):
+        return {"type": "recorded", "symbol": self.symbol, "db_path": self.db_path}
+
+
+def indicators():
+    """
+    (name, function, params) for every public indicator.
+    """
+    found = []
+    for module_name, module in MODULES.items():
+        for name in module.LOOKBACK:
+            found.append((f"{module_name}.{name}", getattr(module, name), PARAMS.get(name, DEFAULT_PARAMS)))
+    return found
+
+
+def _time(call, min_time):
+    times = []
+    started = time.perf_counter()
+    while len(times) < MAX_REPEATS:
+        t0 = time.perf_counter()
+        call()
+        times.append(time.perf_counter() - t0)
+        if time.perf_counter() - started >= min_time and len(times) >= 3:
+            break
+    return times
+
+
+def _memory(call):
+    """
+    Peak bytes allocated while `call` runs and bytes/blocks still held by its
+    result afterwards, as seen by tracemalloc (NumPy buffers included).
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        before = tracemalloc.take_snapshot()
+        result = call()
+        current, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    retained_blocks = sum(max(d.count_diff, 0) for d in after.compare_to(before, "filename"))
+    del result
+    return {
+        "peak_bytes": peak - baseline,
+        "retained_bytes": current - baseline,
+        "retained_blocks": retained_blocks,
+    }
+
+
+def run(sizes=SIZES, source=None, only=None, min_time=MIN_TIME, memory=True, log=None):
+    """
+    Benchmark every public indicator (or those named in `only`) at each size.
+    Returns the JSON-ready report.
+    """
+    source = source or SyntheticSource()
+    previous = Candle_fetcher._data_source
+    Candle_fetcher.set_data_source(source)
+    results = []
+    try:
+        for name, func, params in indicators():
+            if only and name not in only and name.split(".")[-1] not in only:
+                continue
+            for bars in sizes:
+                def call():
+                    return func(symbol=SYMBOL, interval=INTERVAL, output="series", bars=bars, **params)
+
+                # Warm-up call also generates the source data outside the timings
+                output = call()
+                produced = len(output) if output is not None else 0
+                times = _time(call, min_time)
+                best = min(times)
+                entry = {
+                    "indicator": name,
+                    "params": params,
+                    "bars": produced,
+                    "repeats": len(times),
+                    "best_s": best,
+                    "median_s": stats.median(times),
+                    "ns_per_bar": best / produced * 1e9 if produced else None,
+                }
+                if memory:
+                    entry.update(_memory(call))
+                results.append(entry)
+                if log:
+                    log(f"{name:40s} {produced:>7d} bars  {entry['ns_per_bar'] or 0:>12.1f} ns/bar")
+    finally:
+        Candle_fetcher.set_data_source(previous)
+
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "interval": INTERVAL,
+            "source": source.describe(),
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline, tolerance=1.25):
+    """
+    Entries whose ns/bar grew by more than `tolerance`x against `baseline`.
+    """
+    previous = {(r["indicator"], r["bars"]): r for r in baseline["results"]}
+    regressions = []
+    for entry in report["results"]:
+        old = previous.get((entry["indicator"], entry["bars"]))
+        if old is None or not old["ns_per_bar"] or not entry["ns_per_bar"]:
+            continue
+        ratio = entry["ns_per_bar"] / old["ns_per_bar"]
+        if ratio > tolerance:
+            regressions.append({
+                "indicator": entry["indicator"],
+                "bars": entry["bars"],
+                "baseline_ns_per_bar": old["ns_per_bar"],
+                "ns_per_bar": entry["ns_per_bar"],
+                "ratio": ratio,
+            })
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline indicator benchmark")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in SIZES), help="comma-separated bar counts")
+    parser.add_argument("--only", default="", help="comma-separated indicators, e.g. rsi,trend.adx")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic source")
+    parser.add_argument("--recorded", metavar="SYMBOL", help="use bars recorded in the candle store for SYMBOL")
+    parser.add_argument("--db", help="candle store path for --recorded")
+    parser.add_argument("--min-time", type=float, default=MIN_TIME, help="seconds to spend timing each case")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--out", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", help="JSON report to compare against; exits 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="allowed ns/bar ratio against the baseline")
+    args = parser.parse_args(argv)
+
+    source = RecordedSource(args.recorded, args.db) if args.recorded else SyntheticSource(args.seed)
+    report = run(
+        sizes=[int(s) for s in args.sizes.split(",") if s],
+        source=source,
+        only={s for s in args.only.split(",") if s},
+        min_time=args.min_time,
+        memory=not args.no_memory,
+        log=lambda line: print(line, file=sys.stderr),
+    )
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        report["regressions"] = regressions
+        for r in regressions:
+            print(f"REGRESSION {r['indicator']} @ {r['bars']} bars: {r['ratio']:.2f}x", file=sys.stderr)
+        exit_code = 1 if regressions else 0
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
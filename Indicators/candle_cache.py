@@ -0,0 +1,138 @@
+import os
+import threading
+from collections import OrderedDict
+
+# In-process candle cache keyed by (symbol, interval).
+# Each entry keeps the longest window fetched so far and serves any shorter
+# request by slicing it. Entries expire exactly when the next bar of that
+# interval closes, and the least recently used entries are evicted once the
+# cached arrays exceed `max_bytes`. A frame still missing the latest closed
+# bar (late data, a network outage) is only kept for LAGGING_TTL seconds, so
+# the bar is picked up as soon as it arrives.
+
+LAGGING_TTL = int(os.getenv("SIM_CANDLE_CACHE_LAGGING_TTL", "60"))
+
+
+def next_bar_close(last_ts, delta_s, now_s):
+    """
+    Epoch second at which the first bar after `now_s` closes, keeping the
+    phase of the last cached bar (e.g. 60m bars that open on the half hour).
+    """
+    phase = (last_ts % delta_s) if last_ts is not None else 0
+    return ((now_s - phase) // delta_s + 1) * delta_s + phase
+
+
+def latest_closed_open(last_ts, delta_s, now_s):
+    """
+    Open time of the latest bar closed by `now_s`, going by the clock alone,
+    in the phase of `last_ts`.
+    """
+    return next_bar_close(last_ts, delta_s, now_s) - 2 * delta_s
+
+
+class CandleCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, symbol, interval, no_of_candles, now_s):
+        key = (symbol, interval)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now_s >= entry["expires_at"]:
+                self._drop(key)
+                entry = None
+
+            if entry is None or entry["requested"] < no_of_candles:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["frame"].tail(no_of_candles)
+
+    def put(self, symbol, interval, frame, no_of_candles, delta_s, now_s, current=True):
+        """
+        Cache `frame`; `current` is False when it lacks the latest closed bar.
+        """
+        for column in (frame.open, frame.high, frame.low, frame.close, frame.volume, frame.timestamp):
+            column.flags.writeable = False
+
+        last_ts = int(frame.timestamp[-1]) if len(frame) else None
+        nbytes = sum(
+            column.nbytes
+            for column in (frame.open, frame.high, frame.low, frame.close, frame.volume, frame.timestamp)
+        )
+        key = (symbol, interval)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now_s < entry["expires_at"] and entry["requested"] >= no_of_candles and entry["current"] >= current:
+                    return
+                self._drop(key)
+
+            expires_at = next_bar_close(last_ts, delta_s, now_s)
+            if not current:
+                expires_at = min(expires_at, now_s + LAGGING_TTL)
+            self._entries[key] = {
+                "frame": frame,
+                "requested": no_of_candles,
+                "expires_at": expires_at,
+                "current": current,
+                "nbytes": nbytes,
+            }
+            self._bytes += nbytes
+
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def is_current(self, symbol, interval, now_s):
+        """
+        True/False for an unexpired entry holding/lacking the latest closed
+        bar, None without one; not counted as a lookup.
+        """
+        with self._lock:
+            entry = self._entries.get((symbol, interval))
+            if entry is None or now_s >= entry["expires_at"]:
+                return None
+            return entry["current"]
+
+    def last_timestamp(self, symbol, interval):
+        """
+        Open time of the newest cached bar, expired or not, without counting
+        as a lookup.
+        """
+        with self._lock:
+            entry = self._entries.get((symbol, interval))
+            if entry is None or not len(entry["frame"]):
+                return None
+            return int(entry["frame"].timestamp[-1])
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry["nbytes"]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            }
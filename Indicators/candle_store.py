@@ -0,0 +1,251 @@
+import os
+import sqlite3
+import numpy as np
+from datetime import datetime, timezone
+
+from . import frame
+
+# Local persistent candle store shared by every strategy process.
+# 1m bars live in the same `candles` table that Price_adapter/db_handler.imt_sqlite
+# writes to; every other interval gets its own `candles_<interval>` table with the
+# same schema. `candle_coverage` records which time ranges have already been
+# fetched from the network so that empty ranges (weekends, holidays) are not
+# requested again.
+
+DB_PATH = os.getenv("SIM_CANDLE_DB_PATH", "./Temporary/paperquant.db")
+
+_initialized = set()
+
+
+def _to_iso(ts):
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    else:
+        ts = ts.astimezone(timezone.utc)
+    return ts.replace(second=0, microsecond=0).isoformat()
+
+
+def _from_iso(value):
+    ts = datetime.fromisoformat(value)
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc)
+
+
+def table_name(interval):
+    return "candles" if interval == "1m" else f"candles_{interval}"
+
+
+def _connect(interval, db_path=None):
+    db_path = db_path or DB_PATH
+    conn = sqlite3.connect(db_path, timeout=30)
+    key = (db_path, interval)
+    if key not in _initialized:
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table_name(interval)} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                symbol TEXT NOT NULL,
+                open REAL NOT NULL,
+                high REAL NOT NULL,
+                low REAL NOT NULL,
+                close REAL NOT NULL,
+                volume INTEGER NOT NULL,
+                timestamp TEXT NOT NULL,
+                UNIQUE(symbol, timestamp)
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS candle_coverage (
+                symbol TEXT NOT NULL,
+                interval TEXT NOT NULL,
+                start TEXT NOT NULL,
+                end TEXT NOT NULL,
+                PRIMARY KEY(symbol, interval, start)
+            )
+        """)
+        conn.commit()
+        _initialized.add(key)
+    return conn
+
+
+def _epoch_to_iso(ts):
+    ts = np.asarray(ts, dtype=np.int64)
+    return [s + "+00:00" for s in np.datetime_as_string(ts.astype("datetime64[s]")).tolist()]
+
+
+def _iso_to_epoch(values):
+    # Stored timestamps are minute-aligned UTC isoformat strings
+    return np.array([v[:19] for v in values], dtype="datetime64[s]").astype(np.int64)
+
+
+def read_frame(symbol, interval, start, end, db_path=None):
+    """
+    Read stored candles with start <= timestamp < end, oldest first, as a CandleFrame.
+    """
+    conn = None
+    try:
+        conn = _connect(interval, db_path)
+        rows = conn.execute(
+            f"""
+            SELECT open, high, low, close, volume, timestamp
+            FROM {table_name(interval)}
+            WHERE symbol = ? AND timestamp >= ? AND timestamp < ?
+            ORDER BY timestamp
+            """,
+            (symbol, _to_iso(start), _to_iso(end))
+        ).fetchall()
+    finally:
+        if conn:
+            conn.close()
+
+    if not rows:
+        return frame.empty(symbol)
+
+    o, h, l, c, v, ts = zip(*rows)
+    return frame.CandleFrame(symbol, o, h, l, c, v, _iso_to_epoch(ts))
+
+
+def write_frame(interval, candles, db_path=None):
+    """
+    Persist closed candles from a CandleFrame. Existing (symbol, timestamp)
+    rows are kept as-is. Returns the number of inserted rows.
+    """
+    if not len(candles):
+        return 0
+
+    rows = list(zip(
+        [candles.symbol] * len(candles),
+        candles.open.tolist(),
+        candles.high.tolist(),
+        candles.low.tolist(),
+        candles.close.tolist(),
+        candles.volume.tolist(),
+        _epoch_to_iso(candles.timestamp),
+    ))
+
+    conn = None
+    try:
+        conn = _connect(interval, db_path)
+        before = conn.total_changes
+        conn.executemany(
+            f"""
+            INSERT OR IGNORE INTO {table_name(interval)}
+            (symbol, open, high, low, close, volume, timestamp)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            rows
+        )
+        conn.commit()
+        return conn.total_changes - before
+    finally:
+        if conn:
+            conn.close()
+
+
+def add_coverage(symbol, interval, start, end, db_path=None):
+    """
+    Mark [start, end) as fetched, merging with overlapping or adjacent ranges.
+    """
+    if end <= start:
+        return
+
+    start_iso, end_iso = _to_iso(start), _to_iso(end)
+    conn = None
+    try:
+        conn = _connect(interval, db_path)
+        overlapping = conn.execute(
+            """
+            SELECT start, end FROM candle_coverage
+            WHERE symbol = ? AND interval = ? AND start <= ? AND end >= ?
+            """,
+            (symbol, interval, end_iso, start_iso)
+        ).fetchall()
+
+        for s, e in overlapping:
+            start_iso = min(start_iso, s)
+            end_iso = max(end_iso, e)
+
+        conn.execute(
+            """
+            DELETE FROM candle_coverage
+            WHERE symbol = ? AND interval = ? AND start >= ? AND end <= ?
+            """,
+            (symbol, interval, start_iso, end_iso)
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO candle_coverage (symbol, interval, start, end) VALUES (?, ?, ?, ?)",
+            (symbol, interval, start_iso, end_iso)
+        )
+        conn.commit()
+    finally:
+        if conn:
+            conn.close()
+
+
+def coverage_end(symbol, interval, before, db_path=None):
+    """
+    End of the latest covered range that ends at or before `before`, or None.
+    """
+    conn = None
+    try:
+        conn = _connect(interval, db_path)
+        row = conn.execute(
+            """
+            SELECT MAX(end) FROM candle_coverage
+            WHERE symbol = ? AND interval = ? AND end <= ?
+            """,
+            (symbol, interval, _to_iso(before))
+        ).fetchone()
+    finally:
+        if conn:
+            conn.close()
+
+    return _from_iso(row[0]) if row and row[0] else None
+
+
+def missing_ranges(symbol, interval, start, end, delta, db_path=None):
+    """
+    Return the sub-ranges of [start, end) that are neither recorded as fetched
+    nor spanned by a stored candle. Gaps shorter than one bar cannot contain a
+    closed candle and are dropped.
+    """
+    start_iso, end_iso = _to_iso(start), _to_iso(end)
+    conn = None
+    try:
+        conn = _connect(interval, db_path)
+        covered = conn.execute(
+            """
+            SELECT start, end FROM candle_coverage
+            WHERE symbol = ? AND interval = ? AND start < ? AND end > ?
+            """,
+            (symbol, interval, end_iso, start_iso)
+        ).fetchall()
+        stored = conn.execute(
+            f"""
+            SELECT timestamp FROM {table_name(interval)}
+            WHERE symbol = ? AND timestamp >= ? AND timestamp < ?
+            """,
+            (symbol, start_iso, end_iso)
+        ).fetchall()
+    finally:
+        if conn:
+            conn.close()
+
+    spans = [(_from_iso(s), _from_iso(e)) for s, e in covered]
+    for (ts,) in stored:
+        bar_start = _from_iso(ts)
+        spans.append((bar_start, bar_start + delta))
+    spans.sort()
+
+    gaps = []
+    cursor = start
+    for span_start, span_end in spans:
+        if span_start > cursor:
+            gaps.append((cursor, min(span_start, end)))
+        cursor = max(cursor, span_end)
+        if cursor >= end:
+            break
+    if cursor < end:
+        gaps.append((cursor, end))
+
+    return [(s, e) for s, e in gaps if e - s >= delta]
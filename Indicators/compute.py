@@ -0,0 +1,95 @@
+from .Candle_fetcher import candle_frame
+from .intermediates import Intermediates
+from . import levels
+from . import market_structure
+from . import moving_avg
+from . import momentum
+from . import volume
+from . import volatility
+from . import trend
+from . import statistics
+from . import signals
+from . import price_transforms
+
+# Evaluate many indicators for one symbol/interval from a single candle fetch.
+# The fetch covers the longest lookback among the requested indicators, and
+# shared building blocks (true range, close diffs, EMAs by span, RSI, rolling
+# means) are computed once and reused across them. Window-bound indicators
+# (SMA, OBV, Fibonacci levels, ...) still see exactly their own window, while
+# EMA/Wilder-smoothed ones get the longer shared warm-up.
+
+MODULES = {
+    "levels": levels,
+    "market_structure": market_structure,
+    "moving_avg": moving_avg,
+    "momentum": momentum,
+    "volume": volume,
+    "volatility": volatility,
+    "trend": trend,
+    "statistics": statistics,
+    "signals": signals,
+    "price_transforms": price_transforms,
+}
+
+
+def _resolve(name):
+    """
+    Module holding indicator `name`, given as "rsi" or "momentum.rsi".
+    """
+    module_name, _, func = name.rpartition(".")
+    candidates = [MODULES[module_name]] if module_name in MODULES else MODULES.values()
+    for module in candidates:
+        if func in module.LOOKBACK:
+            return module, func
+    raise ValueError(f"Unknown indicator: {name}")
+
+
+def _parse(spec):
+    """
+    Normalize a spec: "rsi", ("rsi", {"period": 14}) or {"name": "rsi", "period": 14}.
+    """
+    if isinstance(spec, str):
+        return spec, {}
+    if isinstance(spec, dict):
+        params = dict(spec)
+        return params.pop("name"), params
+    name, params = spec
+    return name, dict(params)
+
+
+def plan(specs, tolerance=None):
+    """
+    Resolve `specs` to (compute function, params) pairs and the number of
+    candles needed to evaluate all of them, with EMA-type warm-ups sized for
+    `tolerance` (default warmup.TOLERANCE).
+    """
+    jobs = []
+    lookback = 0
+    for spec in specs:
+        name, params = _parse(spec)
+        module, func = _resolve(name)
+        lookback = max(lookback, module.LOOKBACK[func](**params, tolerance=tolerance))
+        jobs.append((getattr(module, "_" + func), params))
+    return jobs, lookback
+
+
+def compute(symbol, interval, specs, bars=None, tolerance=None):
+    """
+    Compute several indicators with one fetch, e.g.
+        rsi, macd, atr = compute("AAPL", "5m", [
+            ("rsi", {"period": 14}),
+            ("macd", {"short_period": 12, "long_period": 26, "signal_period": 9}),
+            ("atr", {"period": 14}),
+        ])
+    Parameters are those of the single-indicator functions, minus symbol and
+    interval; add "output": "series" for a full series, `bars` long if given.
+    `tolerance` bounds the weight EMA-type indicators leave on their seed.
+    Returns the results in spec order, or all None without data.
+    """
+    jobs, lookback = plan(specs, tolerance)
+    candles = candle_frame(symbol, lookback + bars - 1 if bars else lookback, interval)
+    if candles is None:
+        return [None] * len(jobs)
+
+    ix = Intermediates(candles, bars, interval)
+    return [func(ix, **params) for func, params in jobs]
@@ -0,0 +1,133 @@
+import numpy as np
+from datetime import datetime, timezone
+
+# Columnar candle container used between the candle tiers and the indicators.
+# Each field is a contiguous NumPy array; timestamps are int64 UTC epoch seconds.
+
+FIELDS = ("open", "high", "low", "close", "volume")
+
+
+class CandleFrame:
+    __slots__ = ("symbol", "open", "high", "low", "close", "volume", "timestamp")
+
+    def __init__(self, symbol, open, high, low, close, volume, timestamp):
+        self.symbol = symbol
+        self.open = np.ascontiguousarray(open, dtype=np.float64)
+        self.high = np.ascontiguousarray(high, dtype=np.float64)
+        self.low = np.ascontiguousarray(low, dtype=np.float64)
+        self.close = np.ascontiguousarray(close, dtype=np.float64)
+        self.volume = np.ascontiguousarray(volume, dtype=np.int64)
+        self.timestamp = np.ascontiguousarray(timestamp, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    def __getitem__(self, key):
+        """
+        Slice every column at once, e.g. `frame[-50:]`. Slices are views.
+        """
+        if not isinstance(key, slice):
+            raise TypeError("CandleFrame only supports slicing")
+        return CandleFrame(
+            self.symbol,
+            self.open[key],
+            self.high[key],
+            self.low[key],
+            self.close[key],
+            self.volume[key],
+            self.timestamp[key],
+        )
+
+    def tail(self, n):
+        if n >= len(self):
+            return self
+        # Not self[-n:], which is every row for n == 0
+        return self[max(len(self) - n, 0):]
+
+    def mask(self, keep):
+        """
+        Return a copy holding only the rows where the boolean `keep` is True.
+        """
+        return CandleFrame(
+            self.symbol,
+            self.open[keep],
+            self.high[keep],
+            self.low[keep],
+            self.close[keep],
+            self.volume[keep],
+            self.timestamp[keep],
+        )
+
+    def column(self, field):
+        if field not in FIELDS and field != "timestamp":
+            raise ValueError(f"Invalid field: {field}")
+        return getattr(self, field)
+
+    def to_candles(self):
+        """
+        Expand into the list-of-dicts representation returned by `candle_list`.
+        """
+        return [
+            {
+                "symbol": self.symbol,
+                "open": o,
+                "high": h,
+                "low": l,
+                "close": c,
+                "volume": v,
+                "timestamp": datetime.fromtimestamp(ts, tz=timezone.utc),
+            }
+            for o, h, l, c, v, ts in zip(
+                self.open.tolist(),
+                self.high.tolist(),
+                self.low.tolist(),
+                self.close.tolist(),
+                self.volume.tolist(),
+                self.timestamp.tolist(),
+            )
+        ]
+
+
+def empty(symbol):
+    return CandleFrame(symbol, [], [], [], [], [], [])
+
+
+def concat(symbol, frames):
+    frames = [f for f in frames if len(f)]
+    if not frames:
+        return empty(symbol)
+    return CandleFrame(
+        symbol,
+        np.concatenate([f.open for f in frames]),
+        np.concatenate([f.high for f in frames]),
+        np.concatenate([f.low for f in frames]),
+        np.concatenate([f.close for f in frames]),
+        np.concatenate([f.volume for f in frames]),
+        np.concatenate([f.timestamp for f in frames]),
+    )
+
+
+def from_history(symbol, df):
+    """
+    Build a frame from a yfinance history DataFrame without iterating rows.
+    Rows with missing prices are dropped and timestamps are minute-aligned UTC.
+    """
+    if df.empty:
+        return empty(symbol)
+
+    df = df.dropna(subset=["Open", "High", "Low", "Close"])
+    index = df.index
+    if index.tz is None:
+        index = index.tz_localize("UTC")
+    ts = index.tz_convert("UTC").as_unit("s").asi8
+    ts = ts - ts % 60
+
+    return CandleFrame(
+        symbol,
+        df["Open"].to_numpy(),
+        df["High"].to_numpy(),
+        df["Low"].to_numpy(),
+        df["Close"].to_numpy(),
+        df["Volume"].fillna(0).to_numpy(),
+        ts,
+    )
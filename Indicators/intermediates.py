@@ -0,0 +1,194 @@
+import numpy as np
+import pandas as pd
+
+from . import kernels
+
+from .Candle_fetcher import candle_frame
+from .frame import FIELDS
+
+# Shared building blocks for indicator computations over one CandleFrame.
+# Every intermediate (true range, close diffs, EMAs keyed by span, RSI, ...)
+# is computed at most once per Intermediates object by the array kernels in
+# kernels.py, so several indicators evaluated on the same candles reuse each
+# other's work. Returned arrays are shared and must not be modified in place.
+#
+# Indicators return their latest value by default; with output="series" they
+# return the whole aligned series (a DataFrame for multi-line indicators)
+# indexed by bar open time, computed in one pass. `bars` sets how many bars
+# of series to return, each with the indicator's full lookback behind it.
+# Signal-type indicators also take output="events": one row per bar on which
+# the signal fired over those bars, found in the same single pass.
+
+OUTPUTS = ("value", "series")
+EVENT_OUTPUTS = OUTPUTS + ("events",)
+
+
+def load(symbol, lookback, interval, output="value", bars=None, outputs=OUTPUTS):
+    """
+    Intermediates over the candles an indicator needs, or None without data.
+    """
+    if output not in outputs:
+        raise ValueError(f"Invalid output: {output}. Must be one of {outputs}")
+    if output == "value":
+        bars = None
+    candles = candle_frame(symbol, lookback + bars - 1 if bars else lookback, interval)
+    if candles is None:
+        return None
+    return Intermediates(candles, bars, interval)
+
+
+class Intermediates:
+    def __init__(self, candles, bars=None, interval=None):
+        self.candles = candles
+        self.bars = bars
+        self.interval = interval
+        self._memo = {}
+
+    def __len__(self):
+        return len(self.candles)
+
+    def _cached(self, key, build):
+        value = self._memo.get(key)
+        if value is None:
+            value = build()
+            self._memo[key] = value
+        return value
+
+    def tail(self, n):
+        """
+        Intermediates over the most recent `n` candles, for indicators whose
+        value depends on the exact window (cumulative sums, window extremes).
+        """
+        if n >= len(self.candles):
+            return self
+        return self._cached(("tail", n), lambda: Intermediates(self.candles.tail(n), interval=self.interval))
+
+    def index(self):
+        return self._cached("index", lambda: pd.to_datetime(self.candles.timestamp, unit="s", utc=True))
+
+    def aligned(self, values):
+        """
+        Series output: a kernel array (a dict of arrays for multi-line
+        indicators) indexed by bar open time, cut to the last `bars`.
+        """
+        if isinstance(values, dict):
+            values = pd.DataFrame(values, index=self.index())
+        else:
+            values = pd.Series(values, index=self.index())
+        return values.iloc[-self.bars:] if self.bars else values
+
+    def events(self, signal, label=None):
+        """
+        Events output: the bars where an int signal kernel is non-zero, over
+        the last `bars`, as a DataFrame indexed by bar open time with the
+        bar's position in that history and the signal's direction. A dict of
+        signals gives one frame in time order with the signal name under
+        `label`.
+        """
+        if isinstance(signal, dict):
+            frames = [self.events(values).assign(**{label: name}) for name, values in signal.items()]
+            merged = pd.concat(frames).sort_values("bar", kind="stable")
+            return merged[["bar", label, "direction"]]
+        start = len(signal) - self.bars if self.bars and self.bars < len(signal) else 0
+        at = np.flatnonzero(signal[start:]) + start
+        return pd.DataFrame({"bar": at - start, "direction": signal[at]}, index=self.index()[at])
+
+    def swept(self, values, periods, output="value"):
+        """
+        Output of a parameter sweep, given (periods x bars) kernel arrays (a
+        dict of them for multi-line indicators). Values are indexed by period;
+        series have one column per period, under the line name if several.
+        """
+        periods = pd.Index(periods, name="period")
+        if output == "series":
+            if isinstance(values, dict):
+                return pd.concat({name: self.swept(lines, periods, output) for name, lines in values.items()}, axis=1)
+            swept = pd.DataFrame(values.T, index=self.index(), columns=periods)
+            return swept.iloc[-self.bars:] if self.bars else swept
+        if isinstance(values, dict):
+            return pd.DataFrame({name: lines[:, -1] for name, lines in values.items()}, index=periods)
+        return pd.Series(values[:, -1], index=periods)
+
+    @property
+    def open(self):
+        return self.candles.open
+
+    @property
+    def high(self):
+        return self.candles.high
+
+    @property
+    def low(self):
+        return self.candles.low
+
+    @property
+    def close(self):
+        return self.candles.close
+
+    @property
+    def volume(self):
+        return self.candles.volume
+
+    def close_diff(self):
+        return self._cached("close_diff", lambda: kernels.diff(self.close))
+
+    def abs_close_diff(self):
+        return self._cached("abs_close_diff", lambda: np.abs(self.close_diff()))
+
+    def source(self, name):
+        """
+        A candle field or any argument-free intermediate, by name.
+        """
+        if name in FIELDS:
+            return self.candles.column(name)
+        return getattr(self, name)()
+
+    def returns(self):
+        return self._cached("returns", lambda: kernels.returns(self.close))
+
+    def benchmark_close(self, benchmark):
+        """
+        Closes of `benchmark` at this frame's bar times, from the same number
+        of its own candles; NaN where it has no bar (a holiday, a halt).
+        """
+        def build():
+            candles = candle_frame(benchmark, len(self.candles), self.interval)
+            close = np.full(len(self.candles), np.nan)
+            if candles is None:
+                return close
+            at = np.searchsorted(candles.timestamp, self.candles.timestamp)
+            found = at < len(candles)
+            found[found] = candles.timestamp[at[found]] == self.candles.timestamp[found]
+            close[found] = candles.close[at[found]]
+            return close
+        return self._cached(("benchmark_close", benchmark), build)
+
+    def benchmark_returns(self, benchmark):
+        return self._cached(("benchmark_returns", benchmark), lambda: kernels.returns(self.benchmark_close(benchmark)))
+
+    def true_range(self):
+        return self._cached("true_range", lambda: kernels.true_range(self.high, self.low, self.close))
+
+    def typical_price(self):
+        return self._cached("typical_price", lambda: kernels.typical_price(self.high, self.low, self.close))
+
+    def ema(self, span, source="close"):
+        """
+        EMA (adjust=False) of `source`, e.g. ema(12), ema(13, "close_diff").
+        """
+        return self._cached(("ema", source, span), lambda: kernels.ema(self.source(source), span))
+
+    def rolling_mean(self, window, source="close"):
+        return self._cached(("rolling_mean", source, window), lambda: kernels.sma(self.source(source), window))
+
+    def rolling_std(self, window, source="close"):
+        return self._cached(("rolling_std", source, window), lambda: kernels.rolling_std(self.source(source), window))
+
+    def atr(self, period):
+        return self.rolling_mean(period, "true_range")
+
+    def rsi(self, period):
+        """
+        Wilder RSI of the closes.
+        """
+        return self._cached(("rsi", period), lambda: kernels.rsi(self.close, period))
@@ -0,0 +1,778 @@
+import numpy as np
+import pandas as pd
+
+# Pure indicator kernels: NumPy arrays in, full-length NumPy arrays out (a dict
+# of arrays for multi-line indicators), NaN where an indicator is not yet
+# defined. Nothing here fetches data, so the kernels apply equally to candles
+# already held, replayed data or derived series, e.g.
+#   kernels.rsi(frame.close, 14)[-1]
+# The symbol-based functions in the indicator modules fetch candles and call
+# these. Optional arguments such as `tr=` or `rsi_values=` accept intermediates
+# the caller already computed, so they are shared instead of rebuilt.
+
+
+def _series(values):
+    return pd.Series(np.asarray(values))
+
+
+def _pad(values, tail):
+    """
+    `tail` aligned to the end of an array as long as `values`, NaN in front.
+    """
+    out = np.full(len(values), np.nan)
+    if len(tail):
+        out[len(values) - len(tail):] = tail
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Building blocks
+# ---------------------------------------------------------------------------
+
+def diff(values):
+    return _series(values).diff().to_numpy()
+
+
+def sma(values, period):
+    return _series(values).rolling(window=period).mean().to_numpy()
+
+
+def rolling_std(values, period):
+    return _series(values).rolling(window=period).std().to_numpy()
+
+
+def rolling_max(values, period):
+    return _series(values).rolling(window=period).max().to_numpy()
+
+
+def rolling_min(values, period):
+    return _series(values).rolling(window=period).min().to_numpy()
+
+
+def rolling_sum(values, period):
+    return _series(values).rolling(window=period).sum().to_numpy()
+
+
+def ema(values, span):
+    return _series(values).ewm(span=span, adjust=False).mean().to_numpy()
+
+
+def wilder(values, period):
+    """
+    Wilder smoothing: EMA with alpha = 1 / period.
+    """
+    return _series(values).ewm(alpha=1 / period, adjust=False).mean().to_numpy()
+
+
+def true_range(high, low, close):
+    high, low, close = _series(high), _series(low), _series(close)
+    prev_close = close.shift(1)
+    tr1 = high - low
+    tr2 = (high - prev_close).abs()
+    tr3 = (low - prev_close).abs()
+    return pd.concat([tr1, tr2, tr3], axis=1).max(axis=1).to_numpy()
+
+
+def typical_price(high, low, close):
+    return (np.asarray(high) + np.asarray(low) + np.asarray(close)) / 3
+
+
+def median_price(high, low):
+    return (np.asarray(high) + np.asarray(low)) / 2
+
+
+# ---------------------------------------------------------------------------
+# Moving averages
+# ---------------------------------------------------------------------------
+
+def wma(values, period):
+    values = np.asarray(values, dtype="float64")
+    if len(values) < period:
+        return np.full(len(values), np.nan)
+    weights = np.arange(1, period + 1, dtype="float64")
+    # Sliding dot product in one pass; np.convolve flips the kernel
+    return _pad(values, np.convolve(values, weights[::-1], "valid") / weights.sum())
+
+
+def hma(close, period):
+    half_period = period // 2
+    sqrt_period = int(np.sqrt(period))
+
+    hull = 2 * wma(close, half_period) - wma(close, period)
+    valid = ~np.isnan(hull)
+    out = np.full(len(hull), np.nan)
+    out[valid] = wma(hull[valid], sqrt_period)
+    return out
+
+
+def tma(close, period):
+    return sma(sma(close, period), period)
+
+
+def kama(close, period, fast=2, slow=30):
+    """
+    Kaufman's Adaptive Moving Average, seeded with the close at period - 1.
+    """
+    series = _series(close).astype("float64")
+    change = (series - series.shift(period)).abs()
+    volatility = series.diff().abs().rolling(period).sum()
+
+    # Avoid division by zero
+    volatility = volatility.replace(0, np.nan)
+    er = (change / volatility).fillna(0)
+
+    sc_fast = 2 / (fast + 1)
+    sc_slow = 2 / (slow + 1)
+    sc = (er * (sc_fast - sc_slow) + sc_slow) ** 2
+
+    valid_start_idx = period - 1
+    values = [np.nan] * len(series)
+    if len(series) <= valid_start_idx:
+        return np.asarray(values, dtype="float64")
+
+    # The recurrence is inherently sequential; run it on plain floats
+    closes = series.tolist()
+    smoothing = sc.tolist()
+    prev = values[valid_start_idx] = closes[valid_start_idx]
+    for i in range(period, len(closes)):
+        prev = values[i] = prev + smoothing[i] * (closes[i] - prev)
+    return np.asarray(values, dtype="float64")
+
+
+def macd(close, short_period=12, long_period=26, signal_period=9, short_ema=None, long_ema=None):
+    short_ema = ema(close, short_period) if short_ema is None else short_ema
+    long_ema = ema(close, long_period) if long_ema is None else long_ema
+    macd_line = short_ema - long_ema
+    signal_line = ema(macd_line, signal_period)
+    return {"macd": macd_line, "signal": signal_line, "histogram": macd_line - signal_line}
+
+
+# ---------------------------------------------------------------------------
+# Parameter sweeps: one row per period, (periods x bars) arrays
+# ---------------------------------------------------------------------------
+
+# Windows are summed from running sums over blocks of bars, each centred on
+# its own mean, so the sums (and their rounding) stay as small as the data in
+# one block however long the history is. Rounding still grows with the block
+# length, so periods are handled in groups of similar length, each with blocks
+# of about BLOCK_PERIODS windows (between MIN_BLOCK and BLOCK bars): short
+# windows keep the precision of short sums.
+BLOCK = 4096
+MIN_BLOCK = 1024
+BLOCK_PERIODS = 16
+_NOISE = 4 * np.finfo("float64").eps
+
+
+def _trailing_sums(values, periods, powers):
+    """
+    Yield (row, ends, sums, scales, ref) for the windows of each period,
+    block by block: `ends` slices the window ends in the block, `sums` holds
+    each window's sum of (value - ref) ** power for every power in `powers`
+    (NaN where the window holds a NaN), `scales` bounds those sums' size for
+    rounding checks. Powers may be tuples of exponents, one per input array,
+    when `values` is a tuple of equally long arrays, e.g. (1, 1) for x * y.
+    """
+    arrays = values if isinstance(values, tuple) else (values,)
+    arrays = tuple(np.asarray(a, dtype="float64") for a in arrays)
+    n = len(arrays[0])
+
+    # Rows whose periods are within a factor of 4 share their blocks
+    groups = []
+    for row in sorted(range(len(periods)), key=lambda row: periods[row]):
+        if groups and periods[row] <= 4 * periods[groups[-1][0]]:
+            groups[-1].append(row)
+        else:
+            groups.append([row])
+
+    for rows in groups:
+        longest = max(periods[row] for row in rows)
+        block = min(BLOCK, max(MIN_BLOCK, BLOCK_PERIODS * longest))
+        yield from _block_sums(arrays, n, periods, rows, longest, block, powers)
+
+
+def _block_sums(arrays, n, periods, rows, longest, block, powers):
+    """
+    _trailing_sums for the `rows` of one group, over blocks of `block` bars.
+    """
+    for b0 in range(0, n, block):
+        b1 = min(n, b0 + block)
+        lo = max(0, b0 - longest + 1)
+        segments = [a[lo:b1] for a in arrays]
+        missing = np.zeros(len(segments[0]), dtype=bool)
+        for seg in segments:
+            missing |= np.isnan(seg)
+        ref = tuple(seg[~missing].mean() if (~missing).any() else 0.0 for seg in segments)
+        centred = [np.where(missing, 0.0, seg - r) for seg, r in zip(segments, ref)]
+
+        cums = []
+        for power in powers:
+            exps = power if isinstance(power, tuple) else (power,)
+            term = np.ones(len(missing))
+            for c, e in zip(centred, exps):
+                if e:
+                    term = term * c ** e
+            cums.append(np.concatenate(([0.0], np.cumsum(term))))
+        gaps = np.concatenate(([0], np.cumsum(missing)))
+        # Rounding of a difference of running sums grows with their size and length
+        scales = [np.sqrt(len(c)) * np.abs(c).max() for c in cums]
+
+        for row in rows:
+            period = periods[row]
+            first = max(b0, period - 1)
+            if first >= b1:
+                continue
+            hi = slice(first - lo + 1, b1 - lo + 1)
+            low = slice(first - lo + 1 - period, b1 - lo + 1 - period)
+            holed = (gaps[hi] - gaps[low]) > 0
+            sums = []
+            for c in cums:
+                window = c[hi] - c[low]
+                window[holed] = np.nan
+                sums.append(window)
+            yield row, slice(first, b1), sums, scales, ref if len(ref) > 1 else ref[0]
+
+
+def sma_sweep(values, periods):
+    """
+    Rolling mean for every period from running sums; agrees with sma() to
+    rounding on finite input.
+    """
+    values = np.asarray(values, dtype="float64")
+    out = np.full((len(periods), len(values)), np.nan)
+    for row, ends, (s1,), _, ref in _trailing_sums(values, periods, (1,)):
+        out[row, ends] = s1 / periods[row] + ref
+    return out
+
+
+def _spread(s1, s2, period, scale):
+    """
+    Sum of squared deviations from the window mean; 0 within rounding noise.
+    """
+    spread = s2 - s1 * s1 / period
+    spread[spread <= _NOISE * scale] = 0.0
+    return spread
+
+
+def rolling_std_sweep(values, periods):
+    """
+    Rolling sample standard deviation for every period from running sums.
+    """
+    out = np.full((len(periods), len(values)), np.nan)
+    for row, ends, (s1, s2), scales, _ in _trailing_sums(values, periods, (1, 2)):
+        period = periods[row]
+        if period >= 2:
+            out[row, ends] = np.sqrt(_spread(s1, s2, period, scales[1]) / (period - 1))
+    return out
+
+
+def rolling_moments(values, periods):
+    """
+    Rolling mean, sample variance and skew (bias-corrected, like pandas) for
+    every period, as (periods x bars) arrays. Skew is best taken of returns:
+    over short windows of a trending price its third-power sums lose digits.
+    """
+    n = len(values)
+    out = {name: np.full((len(periods), n), np.nan) for name in ("mean", "variance", "skew")}
+    for row, ends, (s1, s2, s3), scales, ref in _trailing_sums(values, periods, (1, 2, 3)):
+        period = periods[row]
+        mean = s1 / period
+        out["mean"][row, ends] = mean + ref
+        if period < 2:
+            continue
+        spread = _spread(s1, s2, period, scales[1])
+        out["variance"][row, ends] = spread / (period - 1)
+        if period < 3:
+            continue
+        m2 = spread / period
+        m3 = s3 / period - 3 * mean * s2 / period + 2 * mean ** 3
+        with np.errstate(divide="ignore", invalid="ignore"):
+            skew = np.sqrt(period * (period - 1)) / (period - 2) * m3 / m2 ** 1.5
+        out["skew"][row, ends] = np.where(m2 == 0, 0.0, skew)
+    return out
+
+
+def linear_regression_sweep(values, periods):
+    """
+    Least-squares line through each window against bar number: slope per
+    bar, intercept at the window's first bar and R^2 (NaN for a flat window).
+    """
+    values = np.asarray(values, dtype="float64")
+    n = len(values)
+    out = {name: np.full((len(periods), n), np.nan) for name in ("slope", "intercept", "r_squared")}
+    x = np.arange(n, dtype="float64")
+    powers = ((0, 1), (0, 2), (1, 1))
+    for row, ends, (sy, syy, sxy), scales, (x_ref, y_ref) in _trailing_sums((x, values), periods, powers):
+        period = periods[row]
+        if period < 2:
+            continue
+        # Bar numbers are evenly spaced: their window mean and spread are exact
+        mean_x = np.arange(ends.start, ends.stop) - (period - 1) / 2 - x_ref
+        var_x = period * (period * period - 1) / 12
+        var_y = _spread(sy, syy, period, scales[1])
+        cov = sxy - mean_x * sy
+        slope = cov / var_x
+        out["slope"][row, ends] = slope
+        out["intercept"][row, ends] = sy / period + y_ref - slope * (period - 1) / 2
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out["r_squared"][row, ends] = np.where(var_y == 0, np.nan, cov * cov / (var_x * var_y))
+    return out
+
+
+def rolling_covariance(x, y, periods):
+    """
+    Rolling sample covariance of x and y, their correlation and the beta of
+    y on x for every period; windows with a NaN in either are NaN.
+    """
+    n = len(x)
+    out = {name: np.full((len(periods), n), np.nan) for name in ("covariance", "correlation", "beta")}
+    powers = ((1, 0), (2, 0), (0, 1), (0, 2), (1, 1))
+    for row, ends, (sx, sxx, sy, syy, sxy), scales, _ in _trailing_sums((x, y), periods, powers):
+        period = periods[row]
+        if period < 2:
+            continue
+        var_x = _spread(sx, sxx, period, scales[1])
+        var_y = _spread(sy, syy, period, scales[3])
+        cov = sxy - sx * sy / period
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out["covariance"][row, ends] = cov / (period - 1)
+            out["correlation"][row, ends] = cov / np.sqrt(var_x * var_y)
+            out["beta"][row, ends] = cov / var_x
+    return out
+
+
+def returns(close):
+    """
+    Simple returns, NaN for the first bar.
+    """
+    close = np.asarray(close, dtype="float64")
+    return np.r_[np.nan, close[1:] / close[:-1] - 1]
+
+
+def ema_sweep(values, spans):
+    """
+    EMA for every span over the same input. One compiled pass per span is
+    faster here than stepping all spans' states together in Python.
+    """
+    values = np.asarray(values, dtype="float64")
+    if not len(spans):
+        return np.empty((0, len(values)))
+    return np.vstack([ema(values, span) for span in spans])
+
+
+def bollinger_bands_sweep(close, periods, multiplier=2):
+    middle = sma_sweep(close, periods)
+    std = rolling_std_sweep(close, periods)
+    return {
+        "upper": middle + (multiplier * std),
+        "middle": middle,
+        "lower": middle - (multiplier * std),
+    }
+
+
+def z_score_sweep(close, periods):
+    mean = sma_sweep(close, periods)
+    std = rolling_std_sweep(close, periods)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = (np.asarray(close) - mean) / std
+    return np.where(std == 0, 0.0, z)
+
+
+# ---------------------------------------------------------------------------
+# Momentum
+# ---------------------------------------------------------------------------
+
+def rsi(close, period):
+    delta = _series(close).diff()
+    gain = delta.clip(lower=0)
+    loss = -delta.clip(upper=0)
+    avg_gain = gain.ewm(alpha=1 / period, adjust=False).mean()
+    avg_loss = loss.ewm(alpha=1 / period, adjust=False).mean()
+    rs = avg_gain / avg_loss
+    return (100 - (100 / (1 + rs))).to_numpy()
+
+
+def stochastic_oscillator(high, low, close, k_period=14, smooth_k=3, smooth_d=3):
+    lowest_low = _series(low).rolling(k_period).min()
+    highest_high = _series(high).rolling(k_period).max()
+
+    percent_k = 100 * (_series(close) - lowest_low) / (highest_high - lowest_low)
+    percent_k_smoothed = percent_k.rolling(smooth_k).mean()
+    percent_d = percent_k_smoothed.rolling(smooth_d).mean()
+    return {"k": percent_k_smoothed.to_numpy(), "d": percent_d.to_numpy()}
+
+
+def stochastic_rsi(close, rsi_period=14, stoch_period=14, smooth_k=3, smooth_d=3, rsi_values=None):
+    rsi_series = _series(rsi(close, rsi_period) if rsi_values is None else rsi_values)
+
+    min_rsi = rsi_series.rolling(stoch_period).min()
+    max_rsi = rsi_series.rolling(stoch_period).max()
+
+    stoch_rsi_val = 100 * (rsi_series - min_rsi) / (max_rsi - min_rsi)
+    percent_k = stoch_rsi_val.rolling(smooth_k).mean()
+    percent_d = percent_k.rolling(smooth_d).mean()
+    return {"k": percent_k.to_numpy(), "d": percent_d.to_numpy()}
+
+
+def rolling_mad(values, window):
+    """
+    Mean absolute deviation of each window from its own mean.
+    """
+    values = np.asarray(values, dtype="float64")
+    if len(values) < window:
+        return np.full(len(values), np.nan)
+    windows = np.lib.stride_tricks.sliding_window_view(values, window)
+    return _pad(values, np.abs(windows - windows.mean(axis=1, keepdims=True)).mean(axis=1))
+
+
+def cci(high, low, close, cci_period=20, tp=None):
+    tp = typical_price(high, low, close) if tp is None else tp
+    sma_tp = sma(tp, cci_period)
+    mad = rolling_mad(tp, cci_period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (tp - sma_tp) / (0.015 * mad)
+
+
+def williams_r(high, low, close, will_period=14):
+    highest_high = rolling_max(high, will_period)
+    lowest_low = rolling_min(low, will_period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return -100 * (highest_high - np.asarray(close)) / (highest_high - lowest_low)
+
+
+def roc(close, roc_period=12):
+    close = _series(close)
+    return (((close - close.shift(roc_period)) / close.shift(roc_period)) * 100).to_numpy()
+
+
+def tsi(close, long=25, short=13):
+    delta = _series(close).diff()
+    ema1 = delta.ewm(span=short, adjust=False).mean()
+    ema2 = ema1.ewm(span=long, adjust=False).mean()
+
+    abs_ema1 = delta.abs().ewm(span=short, adjust=False).mean()
+    abs_ema2 = abs_ema1.ewm(span=long, adjust=False).mean()
+    return (100 * (ema2 / abs_ema2)).to_numpy()
+
+
+def ultimate_oscillator(high, low, close, short=7, medium=14, long=28, tr=None):
+    close_ser = _series(close)
+    prev_close = close_ser.shift(1)
+    bp = close_ser - pd.concat([_series(low), prev_close], axis=1).min(axis=1)
+    tr = _series(true_range(high, low, close) if tr is None else tr)
+
+    avg1 = bp.rolling(short).sum() / tr.rolling(short).sum()
+    avg2 = bp.rolling(medium).sum() / tr.rolling(medium).sum()
+    avg3 = bp.rolling(long).sum() / tr.rolling(long).sum()
+    return (100 * ((4 * avg1) + (2 * avg2) + avg3) / 7).to_numpy()
+
+
+def ppo(close, fast=12, slow=26, signal=9, fast_ema=None, slow_ema=None):
+    fast_ema = ema(close, fast) if fast_ema is None else fast_ema
+    slow_ema = ema(close, slow) if slow_ema is None else slow_ema
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ppo_line = (fast_ema - slow_ema) / slow_ema * 100
+    signal_line = ema(ppo_line, signal)
+    return {"ppo": ppo_line, "signal": signal_line, "histogram": ppo_line - signal_line}
+
+
+# ---------------------------------------------------------------------------
+# Trend
+# ---------------------------------------------------------------------------
+
+def adx(high, low, close, period, tr=None):
+    high_ser = _series(high)
+    low_ser = _series(low)
+    tr = _series(true_range(high, low, close) if tr is None else tr)
+
+    up_move = high_ser - high_ser.shift(1)
+    down_move = low_ser.shift(1) - low_ser
+
+    plus_dm = pd.Series(0.0, index=high_ser.index)
+    plus_dm[(up_move > down_move) & (up_move > 0)] = up_move
+
+    minus_dm = pd.Series(0.0, index=high_ser.index)
+    minus_dm[(down_move > up_move) & (down_move > 0)] = down_move
+
+    atr = tr.ewm(alpha=1/period, adjust=False).mean()
+    plus_di = 100 * plus_dm.ewm(alpha=1/period, adjust=False).mean() / atr
+    minus_di = 100 * minus_dm.ewm(alpha=1/period, adjust=False).mean() / atr
+
+    dx = 100 * (plus_di - minus_di).abs() / (plus_di + minus_di).replace(0, np.nan)
+    dx = dx.fillna(0)
+    return dx.ewm(alpha=1/period, adjust=False).mean().to_numpy()
+
+
+def supertrend(high, low, close, period, multiplier=3, atr=None):
+    """
+    Supertrend line, NaN until the first ATR value.
+    """
+    atr = sma(true_range(high, low, close), period) if atr is None else atr
+    hl2 = (np.asarray(high) + np.asarray(low)) / 2
+
+    # The band recurrence is sequential; run it on plain floats
+    upper = (hl2 + multiplier * atr).tolist()
+    lower = (hl2 - multiplier * atr).tolist()
+    close = np.asarray(close, dtype="float64").tolist()
+    valid = (~np.isnan(atr)).tolist()
+    n = len(close)
+    final_upper = [0.0] * n
+    final_lower = [0.0] * n
+    st = [0.0] * n
+
+    for i in range(1, n):
+        if not valid[i]: continue
+
+        # Final Upper Band
+        if upper[i] < final_upper[i-1] or close[i-1] > final_upper[i-1]:
+            final_upper[i] = upper[i]
+        else:
+            final_upper[i] = final_upper[i-1]
+
+        # Final Lower Band
+        if lower[i] > final_lower[i-1] or close[i-1] < final_lower[i-1]:
+            final_lower[i] = lower[i]
+        else:
+            final_lower[i] = final_lower[i-1]
+
+        # Supertrend
+        if st[i-1] == final_upper[i-1] and close[i] <= final_upper[i]:
+            st[i] = final_upper[i]
+        elif st[i-1] == final_upper[i-1] and close[i] > final_upper[i]:
+            st[i] = final_lower[i]
+        elif st[i-1] == final_lower[i-1] and close[i] >= final_lower[i]:
+            st[i] = final_lower[i]
+        elif st[i-1] == final_lower[i-1] and close[i] < final_lower[i]:
+            st[i] = final_upper[i]
+        else:
+            st[i] = final_upper[i]
+
+    return np.where(valid, st, np.nan)
+
+
+# ---------------------------------------------------------------------------
+# Volatility
+# ---------------------------------------------------------------------------
+
+def atr(high, low, close, period, tr=None):
+    return sma(true_range(high, low, close) if tr is None else tr, period)
+
+
+def bollinger_bands(close, period, multiplier=2, mean=None, std=None):
+    middle = sma(close, period) if mean is None else mean
+    std = rolling_std(close, period) if std is None else std
+    return {
+        "upper": middle + (multiplier * std),
+        "middle": middle,
+        "lower": middle - (multiplier * std),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Volume
+# ---------------------------------------------------------------------------
+
+def signed_volume(close, volume):
+    """
+    Volume signed by the direction of the close; 0 for the first candle.
+    """
+    delta = np.diff(np.asarray(close, dtype="float64"), prepend=np.nan)
+    return np.sign(np.nan_to_num(delta)).astype(np.int64) * np.asarray(volume)
+
+
+def obv(close, volume, period=None):
+    """
+    On-Balance Volume: cumulative, or over the `period` candles ending at each
+    bar (the first candle of a window has no prior close and adds nothing).
+    """
+    signed = signed_volume(close, volume)
+    if period is None:
+        return np.cumsum(signed)
+    if period < 2:
+        return signed * 0
+    return rolling_sum(signed, period - 1)
+
+
+def money_flow_volume(high, low, close, volume):
+    high, low, close = (np.asarray(a, dtype="float64") for a in (high, low, close))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mfm = ((close - low) - (high - close)) / (high - low)
+    return np.nan_to_num(mfm, nan=0.0, posinf=np.inf, neginf=-np.inf) * np.asarray(volume)
+
+
+def ad_line(high, low, close, volume, period=None):
+    """
+    Accumulation/Distribution: cumulative, or over the `period` candles
+    ending at each bar.
+    """
+    mfv = money_flow_volume(high, low, close, volume)
+    if period is None:
+        return _series(mfv).cumsum().to_numpy()
+    return rolling_sum(mfv, period)
+
+
+# ---------------------------------------------------------------------------
+# Levels and market structure
+# ---------------------------------------------------------------------------
+
+def pivot_points(high, low, close):
+    pivot = typical_price(high, low, close)
+    return {
+        "pivot": pivot,
+        "support1": (2 * pivot) - np.asarray(high),
+        "resistance1": (2 * pivot) - np.asarray(low),
+    }
+
+
+def rolling_high_low(close, period):
+    return {"high": rolling_max(close, period), "low": rolling_min(close, period)}
+
+
+def fib_retracement(high, low, period, level):
+    swing_high = rolling_max(high, period)
+    return swing_high - (level * (swing_high - rolling_min(low, period)))
+
+
+def fib_extension(high, low, period, level):
+    swing_high = rolling_max(high, period)
+    return swing_high + ((level - 1.0) * (swing_high - rolling_min(low, period)))
+
+
+def swing_high_low(close, period):
+    """
+    Highest and lowest close of the window centred on each bar.
+    """
+    series = _series(close)
+    return {
+        "high": series.rolling(window=period, center=True).max().to_numpy(),
+        "low": series.rolling(window=period, center=True).min().to_numpy(),
+    }
+
+
+def swing_points(high, low, period):
+    """
+    Swing highs (1) and lows (-1): bars whose high (low) beats the
+    `period // 2` bars on either side, the first of equal extremes winning.
+    An outside bar can be both. A swing is only known `period // 2` bars
+    after it, so the last ones are 0.
+    """
+    high = np.asarray(high, dtype="float64")
+    low = np.asarray(low, dtype="float64")
+    side = max(period // 2, 1)
+    ahead = np.full(side, np.nan)
+    left_high = np.r_[np.nan, rolling_max(high, side)[:-1]]
+    right_high = np.r_[rolling_max(high, side)[side:], ahead]
+    left_low = np.r_[np.nan, rolling_min(low, side)[:-1]]
+    right_low = np.r_[rolling_min(low, side)[side:], ahead]
+    return {
+        "high": ((high > left_high) & (high >= right_high)).astype(np.int64),
+        "low": -((low < left_low) & (low <= right_low)).astype(np.int64),
+    }
+
+
+# Candle pattern thresholds, as fractions of the bar's range or body
+DOJI_BODY = 0.1
+HAMMER_SHADOW = 2.0
+HAMMER_OPPOSITE = 0.25
+
+
+def candle_patterns(open, high, low, close):
+    """
+    Single- and two-bar candlestick patterns, each an array with 1 where a
+    bullish form completes on the bar, -1 for a bearish one, else 0. A doji
+    (body at most DOJI_BODY of the range) has no direction and is marked 1.
+    """
+    open = np.asarray(open, dtype="float64")
+    high = np.asarray(high, dtype="float64")
+    low = np.asarray(low, dtype="float64")
+    close = np.asarray(close, dtype="float64")
+
+    body = np.abs(close - open)
+    span = high - low
+    top = np.maximum(open, close)
+    bottom = np.minimum(open, close)
+    upper_shadow = high - top
+    lower_shadow = bottom - low
+    rising = close > open
+    falling = close < open
+    prev_open = np.r_[np.nan, open[:-1]]
+    prev_close = np.r_[np.nan, close[:-1]]
+    prev_rising = np.r_[False, rising[:-1]]
+    prev_falling = np.r_[False, falling[:-1]]
+    prev_body = np.abs(prev_close - prev_open)
+
+    patterns = {name: np.zeros(len(close), dtype=np.int64) for name in ("doji", "hammer", "shooting_star", "engulfing", "harami")}
+    patterns["doji"][(span > 0) & (body <= DOJI_BODY * span)] = 1
+    # Long shadow on one side, little on the other, and a real body
+    has_body = body > DOJI_BODY * span
+    patterns["hammer"][has_body & (lower_shadow >= HAMMER_SHADOW * body) & (upper_shadow <= HAMMER_OPPOSITE * span)] = 1
+    patterns["shooting_star"][has_body & (upper_shadow >= HAMMER_SHADOW * body) & (lower_shadow <= HAMMER_OPPOSITE * span)] = -1
+    # The body swallows the previous opposite-coloured body, or sits inside it
+    engulfs = (top >= np.maximum(prev_open, prev_close)) & (bottom <= np.minimum(prev_open, prev_close)) & (body > prev_body)
+    patterns["engulfing"][engulfs & rising & prev_falling] = 1
+    patterns["engulfing"][engulfs & falling & prev_rising] = -1
+    inside = (top < np.maximum(prev_open, prev_close)) & (bottom > np.minimum(prev_open, prev_close))
+    patterns["harami"][inside & rising & prev_falling] = 1
+    patterns["harami"][inside & falling & prev_rising] = -1
+    return patterns
+
+
+def choppiness_index(high, low, close, period, tr=None):
+    """
+    Choppiness Index; 50 (neutral) where the window has no price range.
+    """
+    sum_tr = rolling_sum(true_range(high, low, close) if tr is None else tr, period)
+    price_range = rolling_max(high, period) - rolling_min(low, period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        chop = 100 * np.log10(sum_tr / price_range) / np.log10(period)
+    return np.where(price_range == 0, 50.0, chop)
+
+
+# ---------------------------------------------------------------------------
+# Signals and statistics
+# ---------------------------------------------------------------------------
+
+def moving_average_crossover(close, short_period=9, long_period=21, short_ma=None, long_ma=None):
+    """
+    1 on the bar the short MA crosses above the long MA, -1 below, else 0.
+    """
+    short_ma = sma(close, short_period) if short_ma is None else short_ma
+    long_ma = sma(close, long_period) if long_ma is None else long_ma
+    prev_short = np.r_[np.nan, short_ma[:-1]]
+    prev_long = np.r_[np.nan, long_ma[:-1]]
+    signal = np.zeros(len(short_ma), dtype=np.int64)
+    signal[(short_ma > long_ma) & (prev_short <= prev_long)] = 1
+    signal[(short_ma < long_ma) & (prev_short >= prev_long)] = -1
+    return signal
+
+
+def breakout(close, period):
+    """
+    1 where the close exceeds the highest of the previous `period` closes,
+    -1 where it falls below the lowest, else 0.
+    """
+    close = np.asarray(close, dtype="float64")
+    prev = np.r_[np.nan, close[:-1]]
+    resistance = rolling_max(prev, period)
+    support = rolling_min(prev, period)
+    signal = np.zeros(len(close), dtype=np.int64)
+    signal[close > resistance] = 1
+    signal[close < support] = -1
+    return signal
+
+
+def z_score(close, period, mean=None, std=None):
+    """
+    Rolling z-score; 0 where the window has no dispersion.
+    """
+    mean = sma(close, period) if mean is None else mean
+    std = rolling_std(close, period) if std is None else std
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = (np.asarray(close) - mean) / std
+    return np.where(std == 0, 0.0, z)
+
+
+def rolling_sharpe_ratio(close, period):
+    returns = _series(close).pct_change()
+    returns_valid = returns.dropna()
+    ratio = returns_valid.rolling(window=period).mean() / returns_valid.rolling(window=period).std()
+    return ratio.reindex(returns.index).to_numpy()
@@ -1,10 +1,27 @@
-from .Candle_fetcher import candle_list
-import pandas as pd
+from .intermediates import load
+from . import kernels
 
 # Support and resistance indicators calculate key price levels.
 # Examples include Pivot Points, Fibonacci Retracements, Rolling High/Low, etc.
 
-def pivot_points(symbol, period, interval):
+# Candles each indicator fetches, as a function of its parameters
+LOOKBACK = {
+    # Classic pivots come from the latest candle alone
+    "pivot_points": lambda period, **_: 1,
+    "rolling_high_low": lambda period, **_: period,
+    "fib_retracement": lambda period, **_: period,
+    "fib_extension": lambda period, **_: period,
+}
+
+def _pivot_points(ix, period, output="value"):
+    if output == "series":
+        return ix.aligned(kernels.pivot_points(ix.high, ix.low, ix.close))
+
+    # Classic pivots from the latest candle only
+    levels = kernels.pivot_points(ix.high[-1:], ix.low[-1:], ix.close[-1:])
+    return {name: values[-1] for name, values in levels.items()}
+
+def pivot_points(symbol, period, interval, output="value", bars=None):
     """
     Calculate Pivot Points (Classic formula).
     :param symbol: Stock symbol (e.g., "AAPL").
@@ -12,20 +29,18 @@ def pivot_points(symbol, period, interval):
     :param interval: Interval for the candle data (e.g., "1d").
     :return: Dictionary with pivot point, support, and resistance levels.
     """
-    candles = candle_list(symbol, period, interval, field="all")
-    if not candles:
+    ix = load(symbol, LOOKBACK["pivot_points"](period), interval, output, bars)
+    if ix is None:
         return None
-        
-    high = candles[-1]["high"]
-    low = candles[-1]["low"]
-    close = candles[-1]["close"]
-    
-    pivot = (high + low + close) / 3
-    support1 = (2 * pivot) - high
-    resistance1 = (2 * pivot) - low
-    return {"pivot": pivot, "support1": support1, "resistance1": resistance1}
+    return _pivot_points(ix, period, output)
 
-def rolling_high_low(symbol, period, interval):
+def _rolling_high_low(ix, period, output="value"):
+    high_low = kernels.rolling_high_low(ix.close, period)
+    if output == "series":
+        return ix.aligned(high_low)
+    return {"high": high_low["high"][-1], "low": high_low["low"][-1]}
+
+def rolling_high_low(symbol, period, interval, output="value", bars=None):
     """
     Calculate rolling high and low over a specified window.
     :param symbol: Stock symbol (e.g., "AAPL").
@@ -33,16 +48,19 @@ def rolling_high_low(symbol, period, interval):
     :param interval: Interval for the candle data (e.g., "1d").
     :return: Dictionary of rolling high and rolling low.
     """
-    candles = candle_list(symbol, period, interval, field="all")
-    if not candles:
+    ix = load(symbol, LOOKBACK["rolling_high_low"](period), interval, output, bars)
+    if ix is None:
         return None
-        
-    prices = [c["close"] for c in candles]
-    rolling_high = pd.Series(prices).rolling(window=period).max()
-    rolling_low = pd.Series(prices).rolling(window=period).min()
-    return {"high": rolling_high.iloc[-1], "low": rolling_low.iloc[-1]}
+    return _rolling_high_low(ix, period, output)
+
+def _fib_retracement(ix, period, level, output="value"):
+    if output == "series":
+        return ix.aligned(kernels.fib_retracement(ix.high, ix.low, period, level))
+    # Swing range of the candles there are, up to `period`
+    ix = ix.tail(period)
+    return kernels.fib_retracement(ix.high, ix.low, len(ix), level)[-1]
 
-def fib_retracement(symbol, period, interval, level):
+def fib_retracement(symbol, period, interval, level, output="value", bars=None):
     """
     Calculate a specific Fibonacci Retracement level for a given period.
     :param symbol: Stock symbol.
@@ -51,17 +69,18 @@ def fib_retracement(symbol, period, interval, level):
     :param level: The Fibonacci level (e.g., 0.382, 0.618).
     :return: Price value at the specified level.
     """
-    candles = candle_list(symbol, period, interval, field="all")
-    if not candles:
+    ix = load(symbol, LOOKBACK["fib_retracement"](period), interval, output, bars)
+    if ix is None:
         return None
-        
-    high = max(c["high"] for c in candles)
-    low = min(c["low"] for c in candles)
-    diff = high - low
-    
-    return high - (level * diff)
+    return _fib_retracement(ix, period, level, output)
+
+def _fib_extension(ix, period, level, output="value"):
+    if output == "series":
+        return ix.aligned(kernels.fib_extension(ix.high, ix.low, period, level))
+    ix = ix.tail(period)
+    return kernels.fib_extension(ix.high, ix.low, len(ix), level)[-1]
 
-def fib_extension(symbol, period, interval, level):
+def fib_extension(symbol, period, interval, level, output="value", bars=None):
     """
     Calculate a specific Fibonacci Extension level for a given period.
     :param symbol: Stock symbol.
@@ -70,12 +89,7 @@ def fib_extension(symbol, period, interval, level):
     :param level: The Fibonacci extension level (e.g., 1.618).
     :return: Price value at the specified extension level.
     """
-    candles = candle_list(symbol, period, interval, field="all")
-    if not candles:
+    ix = load(symbol, LOOKBACK["fib_extension"](period), interval, output, bars)
+    if ix is None:
         return None
-        
-    high = max(c["high"] for c in candles)
-    low = min(c["low"] for c in candles)
-    diff = high - low
-    
-    return high + ((level - 1.0) * diff)
+    return _fib_extension(ix, period, level, output)
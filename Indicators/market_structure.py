@@ -1,11 +1,41 @@
-from .Candle_fetcher import candle_list
-import pandas as pd
+from .intermediates import load, EVENT_OUTPUTS
+from . import kernels
 import numpy as np
 
 # Market structure indicators describe higher-level price behavior.
 # Examples include Swing High/Low Detection, Market Regime, Choppiness Index, etc.
 
-def swing_high_low(symbol, period, interval):
+SWING_WINDOWS = 5
+
+# Candles each indicator fetches, as a function of its parameters
+LOOKBACK = {
+    # The last complete centred window ends at the latest candle
+    "swing_high_low": lambda period, **_: period,
+    # period + 1 to account for the first True Range NaN
+    "choppiness_index": lambda period, **_: period + 1,
+    # A swing needs period // 2 bars on each side; the latest is looked for
+    # over SWING_WINDOWS such windows
+    "swing_points": lambda period, **_: SWING_WINDOWS * (2 * max(period // 2, 1) + 1),
+    # Two-bar patterns look at the previous candle
+    "candle_patterns": lambda **_: 2,
+}
+
+def _swing_high_low(ix, period, output="value"):
+    # Using center=True finds peaks in the middle of a window.
+    # To avoid NaNs at the end, we look for the last non-NaN value.
+    swings = kernels.swing_high_low(ix.close, period)
+    if output == "series":
+        return ix.aligned(swings)
+
+    # Filter for values that are actual local peaks/troughs
+    highs = swings["high"][~np.isnan(swings["high"])]
+    lows = swings["low"][~np.isnan(swings["low"])]
+    last_high = highs[-1] if len(highs) else None
+    last_low = lows[-1] if len(lows) else None
+
+    return last_high, last_low
+
+def swing_high_low(symbol, period, interval, output="value", bars=None):
     """
     Detect the last swing high and low over a rolling window.
     :param symbol: Stock symbol (e.g., "AAPL").
@@ -13,51 +43,81 @@ def swing_high_low(symbol, period, interval):
     :param interval: Interval for the candle data (e.g., "1d").
     :return: Tuple of last identified swing high and swing low values.
     """
-    # Fetch extra data to find peaks/troughs that are fully formed
-    prices = candle_list(symbol, period + 20, interval, field="close")
-    if not prices:
+    ix = load(symbol, LOOKBACK["swing_high_low"](period), interval, output, bars)
+    if ix is None:
         return None, None
-        
-    series = pd.Series(prices)
-    # Using center=True finds peaks in the middle of a window.
-    # To avoid NaNs at the end, we look for the last non-NaN value.
-    swing_highs = series.rolling(window=period, center=True).max()
-    swing_lows = series.rolling(window=period, center=True).min()
-    
-    # Filter for values that are actual local peaks/troughs
-    last_high = swing_highs.dropna().iloc[-1] if not swing_highs.dropna().empty else None
-    last_low = swing_lows.dropna().iloc[-1] if not swing_lows.dropna().empty else None
-    
-    return last_high, last_low
+    return _swing_high_low(ix, period, output)
+
+def _choppiness_index(ix, period, output="value"):
+    # Neutral value of 50 where there is no range
+    chop = kernels.choppiness_index(ix.high, ix.low, ix.close, period, tr=ix.true_range())
+    if output == "series":
+        return ix.aligned(chop)
+    return 50.0 if np.isnan(chop[-1]) else chop[-1]
 
-def choppiness_index(symbol, period, interval):
+def choppiness_index(symbol, period, interval, output="value", bars=None):
     """
     Calculate the Choppiness Index.
     """
-    # Fetch period + 1 to account for the first True Range NaN
-    candles = candle_list(symbol, period + 1, interval, field="all")
-    if not candles:
+    ix = load(symbol, LOOKBACK["choppiness_index"](period), interval, output, bars)
+    if ix is None:
+        return None
+    return _choppiness_index(ix, period, output)
+
+def _swing_points(ix, period, output="value"):
+    swings = kernels.swing_points(ix.high, ix.low, period)
+    if output == "events":
+        events = ix.events(swings, label="swing")
+        # Bar on which the swing is confirmed, for backtests without lookahead
+        events["confirmed"] = events["bar"] + max(period // 2, 1)
+        return events
+    if output == "series":
+        return ix.aligned({
+            "high": np.where(swings["high"] != 0, ix.high, np.nan),
+            "low": np.where(swings["low"] != 0, ix.low, np.nan),
+        })
+
+    highs = np.flatnonzero(swings["high"])
+    lows = np.flatnonzero(swings["low"])
+    last_high = ix.high[highs[-1]] if len(highs) else None
+    last_low = ix.low[lows[-1]] if len(lows) else None
+    return last_high, last_low
+
+def swing_points(symbol, period, interval, output="value", bars=None):
+    """
+    Detect swing highs and lows: bars whose high (low) beats the period // 2
+    bars on either side.
+    :param symbol: Stock symbol (e.g., "AAPL").
+    :param period: Width of the window centred on the swing.
+    :param interval: Interval for the candle data (e.g., "1d").
+    :return: Tuple of the last confirmed swing high and swing low prices. With
+             output="series" the swing prices (NaN elsewhere); with
+             output="events" every swing over the last `bars` bars, with the
+             bar it was confirmed on.
+    """
+    ix = load(symbol, LOOKBACK["swing_points"](period), interval, output, bars, EVENT_OUTPUTS)
+    if ix is None:
+        return None, None
+    return _swing_points(ix, period, output)
+
+def _candle_patterns(ix, output="value"):
+    patterns = kernels.candle_patterns(ix.open, ix.high, ix.low, ix.close)
+    if output == "events":
+        return ix.events(patterns, label="pattern")
+    if output == "series":
+        return ix.aligned(patterns)
+    return {name: int(values[-1]) for name, values in patterns.items()}
+
+def candle_patterns(symbol, interval, output="value", bars=None):
+    """
+    Detect doji, hammer, shooting star, engulfing and harami candles.
+    :param symbol: Stock symbol (e.g., "AAPL").
+    :param interval: Interval for the candle data (e.g., "1d").
+    :return: Dictionary of pattern -> 1 (bullish), -1 (bearish) or 0 on the
+             last candle. With output="events" every pattern over the last
+             `bars` bars.
+    """
+    ix = load(symbol, LOOKBACK["candle_patterns"](), interval, output, bars, EVENT_OUTPUTS)
+    if ix is None:
         return None
-        
-    high_ser = pd.Series([c["high"] for c in candles])
-    low_ser = pd.Series([c["low"] for c in candles])
-    close_ser = pd.Series([c["close"] for c in candles])
-    
-    tr1 = high_ser - low_ser
-    tr2 = (high_ser - close_ser.shift(1)).abs()
-    tr3 = (low_ser - close_ser.shift(1)).abs()
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    
-    sum_tr = tr.rolling(window=period).sum()
-    range_high = high_ser.rolling(window=period).max()
-    range_low = low_ser.rolling(window=period).min()
-    
-    price_range = range_high - range_low
-    # Avoid division by zero
-    if price_range.iloc[-1] == 0 or pd.isna(price_range.iloc[-1]):
-        return 50.0  # Return neutral value if no range
-        
-    # Calculate chop
-    chop = 100 * np.log10(sum_tr / price_range) / np.log10(period)
-    
-    return chop.iloc[-1] if not pd.isna(chop.iloc[-1]) else None
+    return _candle_patterns(ix, output)
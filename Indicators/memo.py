@@ -0,0 +1,158 @@
+import os
+import inspect
+import functools
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from . import Candle_fetcher
+from .candle_cache import latest_closed_open
+
+# Memoized indicator results, keyed by (function, arguments, latest closed bar).
+# Strategies often ask for the same indicator several times within one bar;
+# repeats are answered from memory and the key moves on by itself as soon as
+# the next bar closes. Results computed while the data still lacks the latest
+# closed bar (late in the store or ring) are not memoized. Opt in per call with memoize=True, or globally with
+# indicators.memo.enable() / SIM_INDICATOR_MEMO=1. Memoized results are shared
+# between callers and must not be modified in place.
+
+MEMO_MAX_ENTRIES = int(os.getenv("SIM_INDICATOR_MEMO_ENTRIES", "4096"))
+MEMO_ENABLED = os.getenv("SIM_INDICATOR_MEMO", "0") == "1"
+
+
+class IndicatorMemo:
+    def __init__(self, max_entries, enabled=False):
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        # Open time of a real bar per (symbol, interval), for the bar phase
+        self._phase = {}
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def latest_bar(self, symbol, interval):
+        """
+        Open time of the latest closed `interval` bar, from the clock alone.
+        """
+        delta_s = int(Candle_fetcher.INTERVAL_TO_DELTA[interval].total_seconds())
+        now_s = int(datetime.now(timezone.utc).timestamp())
+        return latest_closed_open(self._phase.get((symbol, interval)), delta_s, now_s)
+
+    def learn_phase(self, symbol, interval):
+        if (symbol, interval) not in self._phase:
+            last_ts = Candle_fetcher.last_seen_timestamp(symbol, interval)
+            if last_ts is not None:
+                self._phase[(symbol, interval)] = last_ts
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+
+memo = IndicatorMemo(MEMO_MAX_ENTRIES, MEMO_ENABLED)
+
+
+def _key_part(value):
+    # Sweeps are naturally called with periods=[...]; lists key like tuples
+    if isinstance(value, (list, tuple)):
+        return tuple(_key_part(v) for v in value)
+    return value
+
+
+def memoized(func):
+    """
+    Wrap an indicator taking (symbol, ..., interval, ...) so that calls with
+    memoize=True, or any call while the memo is enabled, are served from the
+    memo for the rest of the bar.
+    """
+    signature = inspect.signature(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, memoize=None, **kwargs):
+        if not (memo.enabled if memoize is None else memoize):
+            return func(*args, **kwargs)
+
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        symbol = bound.arguments.get("symbol")
+        interval = bound.arguments.get("interval")
+        if interval not in Candle_fetcher.INTERVAL_TO_DELTA:
+            return func(*args, **kwargs)
+
+        arguments = tuple((name, _key_part(value)) for name, value in bound.arguments.items())
+        key = (func.__module__, func.__name__, arguments, memo.latest_bar(symbol, interval))
+        try:
+            found, value = memo.get(key)
+        except TypeError:
+            # Unhashable arguments
+            return func(*args, **kwargs)
+        if found:
+            return value
+
+        value = func(*args, **kwargs)
+        if Candle_fetcher.holds_latest_bar(symbol, interval):
+            memo.put(key, value)
+        memo.learn_phase(symbol, interval)
+        return value
+
+    return wrapper
+
+
+class _MemoModule:
+    """
+    Exposes every public function of an indicator module with memoization.
+    """
+
+    def __init__(self, module):
+        self._module = module
+
+    def __getattr__(self, name):
+        func = getattr(self._module, name)
+        if name.startswith("_") or not inspect.isfunction(func) or func.__module__ != self._module.__name__:
+            return func
+
+        wrapper = memoized(func)
+        setattr(self, name, wrapper)
+        return wrapper
+
+
+def wrap(module):
+    return _MemoModule(module)
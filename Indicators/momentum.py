@@ -1,181 +1,163 @@
-from .Candle_fetcher import candle_list
-import pandas as pd
+from .intermediates import load
+from . import kernels
+from . import warmup
 import numpy as np
 
-def rsi(symbol, period, interval):
+# Candles each indicator fetches, as a function of its parameters (see warmup.py)
+LOOKBACK = {
+    # Close diff, then Wilder smoothing
+    "rsi": lambda period, tolerance=None, **_: warmup.chain(2, warmup.wilder(period, tolerance)),
+    "stochastic_oscillator": lambda period, k_period=14, smooth_k=3, smooth_d=3, **_: warmup.chain(k_period, smooth_k, smooth_d),
+    # RSI warm-up, then the stochastic window and both smoothings
+    "stochastic_rsi": lambda period, rsi_period=14, stoch_period=14, smooth_k=3, smooth_d=3, tolerance=None, **_: warmup.chain(
+        2, warmup.wilder(rsi_period, tolerance), stoch_period, smooth_k, smooth_d),
+    "cci": lambda period, cci_period=20, **_: cci_period,
+    "williams_r": lambda period, will_period=14, **_: will_period,
+    "roc": lambda period, roc_period=12, **_: roc_period + 1,
+    # Close diff, then the short and long EMAs in turn
+    "tsi": lambda period, long=25, short=13, tolerance=None, **_: warmup.chain(
+        2, warmup.ema(short, tolerance), warmup.ema(long, tolerance)),
+    # The first buying pressure and true range need a previous close
+    "ultimate_oscillator": lambda period, long=28, **_: long + 1,
+    "ppo": lambda period, slow=26, signal=9, tolerance=None, **_: warmup.chain(
+        warmup.ema(slow, tolerance), warmup.ema(signal, tolerance)),
+}
+
+def _rsi(ix, period, output="value"):
+    rsi_series = ix.rsi(period)
+    if output == "series":
+        return ix.aligned(rsi_series)
+    return rsi_series[-1] if not np.isnan(rsi_series).all() else None
+
+def rsi(symbol, period, interval, output="value", bars=None):
     """
     Calculate Relative Strength Index (RSI).
     """
-    # Use 3x period for warm-up
-    close = pd.Series(
-        candle_list(symbol, period * 3, interval, field="close"),
-        dtype="float64"
-    )
-    if close.empty: return None
+    ix = load(symbol, LOOKBACK["rsi"](period), interval, output, bars)
+    if ix is None: return None
+    return _rsi(ix, period, output)
 
-    delta = close.diff()
-    gain = delta.clip(lower=0)
-    loss = -delta.clip(upper=0)
+def _stochastic_oscillator(ix, period, k_period=14, smooth_k=3, smooth_d=3, output="value"):
+    stoch = kernels.stochastic_oscillator(ix.high, ix.low, ix.close, k_period, smooth_k, smooth_d)
+    if output == "series":
+        return ix.aligned(stoch)
 
-    avg_gain = gain.ewm(alpha=1 / period, adjust=False).mean()
-    avg_loss = loss.ewm(alpha=1 / period, adjust=False).mean()
-
-    rs = avg_gain / avg_loss
-    rsi_series = 100 - (100 / (1 + rs))
-    return rsi_series.iloc[-1] if not rsi_series.dropna().empty else None
+    return {
+        "k": stoch["k"][-1],
+        "d": stoch["d"][-1]
+    }
 
-def stochastic_oscillator(symbol, period, interval, k_period=14, smooth_k=3, smooth_d=3):
+def stochastic_oscillator(symbol, period, interval, k_period=14, smooth_k=3, smooth_d=3, output="value", bars=None):
     """
     Calculate Stochastic Oscillator.
     """
-    candles = candle_list(symbol, period + k_period + 10, interval, field="all")
-    if not candles: return None
+    ix = load(symbol, LOOKBACK["stochastic_oscillator"](period, k_period, smooth_k, smooth_d), interval, output, bars)
+    if ix is None: return None
+    return _stochastic_oscillator(ix, period, k_period, smooth_k, smooth_d, output)
 
-    high = pd.Series([c["high"] for c in candles], dtype="float64")
-    low = pd.Series([c["low"] for c in candles], dtype="float64")
-    close = pd.Series([c["close"] for c in candles], dtype="float64")
-
-    lowest_low = low.rolling(k_period).min()
-    highest_high = high.rolling(k_period).max()
-
-    percent_k = 100 * (close - lowest_low) / (highest_high - lowest_low)
-    percent_k_smoothed = percent_k.rolling(smooth_k).mean()
-    percent_d = percent_k_smoothed.rolling(smooth_d).mean()
+def _stochastic_rsi(ix, period, rsi_period=14, stoch_period=14, smooth_k=3, smooth_d=3, output="value"):
+    stoch = kernels.stochastic_rsi(ix.close, rsi_period, stoch_period, smooth_k, smooth_d, rsi_values=ix.rsi(rsi_period))
+    if output == "series":
+        return ix.aligned(stoch)
 
     return {
-        "k": percent_k_smoothed.iloc[-1],
-        "d": percent_d.iloc[-1]
+        "k": stoch["k"][-1],
+        "d": stoch["d"][-1]
     }
 
-def stochastic_rsi(symbol, period, interval, rsi_period=14, stoch_period=14, smooth_k=3, smooth_d=3):
+def stochastic_rsi(symbol, period, interval, rsi_period=14, stoch_period=14, smooth_k=3, smooth_d=3, output="value", bars=None):
     """
     Calculate Stochastic RSI.
     """
-    # Fetch enough for RSI warm-up + Stochastic rolling window
-    candles = candle_list(symbol, (rsi_period * 3) + stoch_period + 10, interval, field="close")
-    if not candles: return None
-    
-    close = pd.Series(candles)
-    delta = close.diff()
-    gain = delta.clip(lower=0)
-    loss = -delta.clip(upper=0)
-    avg_gain = gain.ewm(alpha=1 / rsi_period, adjust=False).mean()
-    avg_loss = loss.ewm(alpha=1 / rsi_period, adjust=False).mean()
-    rs = avg_gain / avg_loss
-    rsi_series = 100 - (100 / (1 + rs))
-
-    min_rsi = rsi_series.rolling(stoch_period).min()
-    max_rsi = rsi_series.rolling(stoch_period).max()
-
-    stoch_rsi_val = 100 * (rsi_series - min_rsi) / (max_rsi - min_rsi)
-    percent_k = stoch_rsi_val.rolling(smooth_k).mean()
-    percent_d = percent_k.rolling(smooth_d).mean()
+    ix = load(symbol, LOOKBACK["stochastic_rsi"](period, rsi_period, stoch_period, smooth_k, smooth_d), interval, output, bars)
+    if ix is None: return None
+    return _stochastic_rsi(ix, period, rsi_period, stoch_period, smooth_k, smooth_d, output)
 
-    return {
-        "k": percent_k.iloc[-1],
-        "d": percent_d.iloc[-1]
-    }
+def _cci(ix, period, cci_period=20, output="value"):
+    cci_val = kernels.cci(ix.high, ix.low, ix.close, cci_period, tp=ix.typical_price())
+    if output == "series":
+        return ix.aligned(cci_val)
+    return cci_val[-1]
 
-def cci(symbol, period, interval, cci_period=20):
+def cci(symbol, period, interval, cci_period=20, output="value", bars=None):
     """
     Calculate Commodity Channel Index (CCI).
     """
-    candles = candle_list(symbol, period + cci_period + 10, interval, field="all")
-    if not candles: return None
-
-    high = pd.Series([c["high"] for c in candles], dtype="float64")
-    low = pd.Series([c["low"] for c in candles], dtype="float64")
-    close = pd.Series([c["close"] for c in candles], dtype="float64")
-
-    tp = (high + low + close) / 3
-    sma = tp.rolling(cci_period).mean()
-    mad = tp.rolling(cci_period).apply(lambda x: np.mean(np.abs(x - x.mean())), raw=True)
+    ix = load(symbol, LOOKBACK["cci"](period, cci_period), interval, output, bars)
+    if ix is None: return None
+    return _cci(ix, period, cci_period, output)
 
-    cci_val = (tp - sma) / (0.015 * mad)
-    return cci_val.iloc[-1]
+def _williams_r(ix, period, will_period=14, output="value"):
+    wr = kernels.williams_r(ix.high, ix.low, ix.close, will_period)
+    if output == "series":
+        return ix.aligned(wr)
+    return wr[-1]
 
-def williams_r(symbol, period, interval, will_period=14):
+def williams_r(symbol, period, interval, will_period=14, output="value", bars=None):
     """
     Calculate Williams %R.
     """
-    candles = candle_list(symbol, period + will_period + 10, interval, field="all")
-    if not candles: return None
-
-    high = pd.Series([c["high"] for c in candles], dtype="float64")
-    low = pd.Series([c["low"] for c in candles], dtype="float64")
-    close = pd.Series([c["close"] for c in candles], dtype="float64")
-
-    highest_high = high.rolling(will_period).max()
-    lowest_low = low.rolling(will_period).min()
+    ix = load(symbol, LOOKBACK["williams_r"](period, will_period), interval, output, bars)
+    if ix is None: return None
+    return _williams_r(ix, period, will_period, output)
 
-    wr = -100 * (highest_high - close) / (highest_high - lowest_low)
-    return wr.iloc[-1]
+def _roc(ix, period, roc_period=12, output="value"):
+    roc_val = kernels.roc(ix.close, roc_period)
+    if output == "series":
+        return ix.aligned(roc_val)
+    return roc_val[-1]
 
-def roc(symbol, period, interval, roc_period=12):
+def roc(symbol, period, interval, roc_period=12, output="value", bars=None):
     """
     Calculate Rate of Change (ROC).
     """
-    close = pd.Series(candle_list(symbol, period + roc_period + 5, interval, field="close"), dtype="float64")
-    if close.empty: return None
+    ix = load(symbol, LOOKBACK["roc"](period, roc_period), interval, output, bars)
+    if ix is None: return None
+    return _roc(ix, period, roc_period, output)
 
-    roc_val = ((close - close.shift(roc_period)) / close.shift(roc_period)) * 100
-    return roc_val.iloc[-1]
+def _tsi(ix, period, long=25, short=13, output="value"):
+    tsi_val = kernels.tsi(ix.close, long, short)
+    if output == "series":
+        return ix.aligned(tsi_val)
+    return tsi_val[-1]
 
-def tsi(symbol, period, interval, long=25, short=13):
+def tsi(symbol, period, interval, long=25, short=13, output="value", bars=None):
     """
     Calculate True Strength Index (TSI).
     """
-    close = pd.Series(candle_list(symbol, period + long + short + 20, interval, field="close"), dtype="float64")
-    if close.empty: return None
+    ix = load(symbol, LOOKBACK["tsi"](period, long, short), interval, output, bars)
+    if ix is None: return None
+    return _tsi(ix, period, long, short, output)
 
-    delta = close.diff()
-    ema1 = delta.ewm(span=short, adjust=False).mean()
-    ema2 = ema1.ewm(span=long, adjust=False).mean()
+def _ultimate_oscillator(ix, period, short=7, medium=14, long=28, output="value"):
+    uo = kernels.ultimate_oscillator(ix.high, ix.low, ix.close, short, medium, long, tr=ix.true_range())
+    if output == "series":
+        return ix.aligned(uo)
+    return uo[-1]
 
-    abs_delta = delta.abs()
-    abs_ema1 = abs_delta.ewm(span=short, adjust=False).mean()
-    abs_ema2 = abs_ema1.ewm(span=long, adjust=False).mean()
-
-    tsi_val = 100 * (ema2 / abs_ema2)
-    return tsi_val.iloc[-1]
-
-def ultimate_oscillator(symbol, period, interval, short=7, medium=14, long=28):
+def ultimate_oscillator(symbol, period, interval, short=7, medium=14, long=28, output="value", bars=None):
     """
     Calculate Ultimate Oscillator.
     """
-    candles = candle_list(symbol, period + long + 10, interval, field="all")
-    if not candles: return None
-
-    high = pd.Series([c["high"] for c in candles], dtype="float64")
-    low = pd.Series([c["low"] for c in candles], dtype="float64")
-    close = pd.Series([c["close"] for c in candles], dtype="float64")
+    ix = load(symbol, LOOKBACK["ultimate_oscillator"](period, long=long), interval, output, bars)
+    if ix is None: return None
+    return _ultimate_oscillator(ix, period, short, medium, long, output)
 
-    prev_close = close.shift(1)
-    bp = close - pd.concat([low, prev_close], axis=1).min(axis=1)
-    tr = pd.concat([high, prev_close], axis=1).max(axis=1) - pd.concat([low, prev_close], axis=1).min(axis=1)
+def _ppo(ix, period, fast=12, slow=26, signal=9, output="value"):
+    lines = kernels.ppo(ix.close, fast, slow, signal, fast_ema=ix.ema(fast), slow_ema=ix.ema(slow))
+    if output == "series":
+        return ix.aligned(lines)
 
-    avg1 = bp.rolling(short).sum() / tr.rolling(short).sum()
-    avg2 = bp.rolling(medium).sum() / tr.rolling(medium).sum()
-    avg3 = bp.rolling(long).sum() / tr.rolling(long).sum()
-
-    uo = 100 * ((4 * avg1) + (2 * avg2) + avg3) / 7
-    return uo.iloc[-1]
+    return {
+        "ppo": lines["ppo"][-1],
+        "signal": lines["signal"][-1],
+        "histogram": lines["ppo"][-1] - lines["signal"][-1]
+    }
 
-def ppo(symbol, period, interval, fast=12, slow=26, signal=9):
+def ppo(symbol, period, interval, fast=12, slow=26, signal=9, output="value", bars=None):
     """
     Calculate Percentage Price Oscillator (PPO).
     """
-    close = pd.Series(candle_list(symbol, period + (slow * 3), interval, field="close"), dtype="float64")
-    if close.empty: return None
-
-    ema_fast = close.ewm(span=fast, adjust=False).mean()
-    ema_slow = close.ewm(span=slow, adjust=False).mean()
-
-    ppo_line = (ema_fast - ema_slow) / ema_slow * 100
-    signal_line = ppo_line.ewm(span=signal, adjust=False).mean()
-    
-    return {
-        "ppo": ppo_line.iloc[-1],
-        "signal": signal_line.iloc[-1],
-        "histogram": ppo_line.iloc[-1] - signal_line.iloc[-1]
-    }
+    ix = load(symbol, LOOKBACK["ppo"](period, slow=slow, signal=signal), interval, output, bars)
+    if ix is None: return None
+    return _ppo(ix, period, fast, slow, signal, output)
@@ -1,140 +1,188 @@
-from .Candle_fetcher import candle_list
-import pandas as pd
+from .intermediates import load
+from . import kernels
+from . import warmup
 import numpy as np
 
 # Moving averages are technical indicators used to smooth out price data over a specific period.
 # They help identify trends by filtering out short-term fluctuations.
 
-def _wma_series(series, period):
-    if len(series) < period:
-        return pd.Series([np.nan] * len(series))
-    weights = np.arange(1, period + 1)
-    return series.rolling(period).apply(lambda x: np.dot(x, weights) / weights.sum(), raw=True)
+# Candles each indicator fetches, as a function of its parameters (see warmup.py)
+LOOKBACK = {
+    "sma": lambda period, **_: period,
+    "ema": lambda period, tolerance=None, **_: warmup.ema(period, tolerance),
+    "wma": lambda period, **_: period,
+    # WMA of the WMA difference
+    "hma": lambda period, **_: warmup.chain(period, int(period**0.5)),
+    "cma": lambda period, **_: period,
+    # TMA is SMA of SMA
+    "tma": lambda period, **_: warmup.chain(period, period),
+    # KAMA's smoothing follows the efficiency ratio; budget for it converging
+    # like an EMA of span `slow`
+    "ama": lambda period, slow=30, tolerance=None, **_: warmup.chain(period, warmup.ema(slow, tolerance)),
+    # Long EMA, then the signal EMA of the MACD line
+    "macd": lambda short_period, long_period, signal_period, tolerance=None, **_: warmup.chain(
+        warmup.ema(long_period, tolerance), warmup.ema(signal_period, tolerance)),
+    # Sweeps fetch once for their longest period
+    "sma_sweep": lambda periods, **_: max(periods),
+    "ema_sweep": lambda periods, tolerance=None, **_: warmup.ema(max(periods), tolerance),
+}
 
-def sma(symbol, period, interval):
+def _sma(ix, period, output="value"):
+    if output == "series":
+        return ix.aligned(ix.rolling_mean(period))
+    return ix.tail(period).close.mean()
+
+def sma(symbol, period, interval, output="value", bars=None):
     """
     Calculate Simple Moving Average (SMA).
     """
-    candles = candle_list(symbol, period, interval, field="close")
-    if not candles:
+    ix = load(symbol, LOOKBACK["sma"](period), interval, output, bars)
+    if ix is None:
         return None
-    return pd.Series(candles).mean()
+    return _sma(ix, period, output)
+
+def _ema(ix, period, output="value"):
+    if output == "series":
+        return ix.aligned(ix.ema(period))
+    return ix.ema(period)[-1]
 
-def ema(symbol, period, interval):
+def ema(symbol, period, interval, output="value", bars=None):
     """
     Calculate Exponential Moving Average (EMA).
     """
-    # Use 3x period for EMA warm-up
-    candles = candle_list(symbol, period * 3, interval, field="close")
-    if not candles:
+    ix = load(symbol, LOOKBACK["ema"](period), interval, output, bars)
+    if ix is None:
+        return None
+    return _ema(ix, period, output)
+
+def _wma(ix, period, output="value"):
+    if len(ix) < period:
         return None
-    return pd.Series(candles).ewm(span=period, adjust=False).mean().iloc[-1]
+    wma_series = kernels.wma(ix.close, period)
+    if output == "series":
+        return ix.aligned(wma_series)
+    return wma_series[-1]
 
-def wma(symbol, period, interval):
+def wma(symbol, period, interval, output="value", bars=None):
     """
     Calculate Weighted Moving Average (WMA).
     """
-    candles = candle_list(symbol, period, interval, field="close")
-    if not candles or len(candles) < period:
+    ix = load(symbol, LOOKBACK["wma"](period), interval, output, bars)
+    if ix is None:
         return None
-    
-    series = pd.Series(candles)
-    return _wma_series(series, period).iloc[-1]
+    return _wma(ix, period, output)
 
-def hma(symbol, period, interval):
+def _hma(ix, period, output="value"):
+    hma_series = kernels.hma(ix.close, period)
+    if output == "series":
+        return ix.aligned(hma_series)
+    return hma_series[-1]
+
+def hma(symbol, period, interval, output="value", bars=None):
     """
     Calculate Hull Moving Average (HMA).
     """
-    # HMA needs more data for the nested WMAs
-    candles = candle_list(symbol, period + int(period**0.5) + 10, interval, field="close")
-    if not candles:
+    ix = load(symbol, LOOKBACK["hma"](period), interval, output, bars)
+    if ix is None:
         return None
-    
-    series = pd.Series(candles)
-    half_period = period // 2
-    sqrt_period = int(np.sqrt(period))
-    
-    wma_half = _wma_series(series, half_period)
-    wma_full = _wma_series(series, period)
-    
-    diff = 2 * wma_half - wma_full
-    hma_series = _wma_series(diff.dropna(), sqrt_period)
-    
-    return hma_series.iloc[-1]
-
-def cma(symbol, period, interval):
+    return _hma(ix, period, output)
+
+def _cma(ix, period, output="value"):
+    # Over a window of exactly `period` candles the CMA is their mean
+    if output == "series":
+        return ix.aligned(ix.rolling_mean(period))
+    return ix.tail(period).close.mean()
+
+def cma(symbol, period, interval, output="value", bars=None):
     """
     Calculate Cumulative Moving Average (CMA).
     """
-    candles = candle_list(symbol, period, interval, field="close")
-    if not candles:
+    ix = load(symbol, LOOKBACK["cma"](period), interval, output, bars)
+    if ix is None:
         return None
-    return pd.Series(candles).expanding().mean().iloc[-1]
+    return _cma(ix, period, output)
 
-def tma(symbol, period, interval):
+def _tma(ix, period, output="value"):
+    tma_series = kernels.tma(ix.close, period)
+    if output == "series":
+        return ix.aligned(tma_series)
+    return tma_series[-1]
+
+def tma(symbol, period, interval, output="value", bars=None):
     """
     Calculate Triangular Moving Average (TMA).
     """
-    # TMA is SMA of SMA, requires ~2x period
-    candles = candle_list(symbol, period * 2, interval, field="close")
-    if not candles:
+    ix = load(symbol, LOOKBACK["tma"](period), interval, output, bars)
+    if ix is None:
+        return None
+    return _tma(ix, period, output)
+
+def _ama(ix, period, fast=2, slow=30, output="value"):
+    # Seeded with the close at period - 1
+    if len(ix) <= period - 1:
         return None
-        
-    sma1 = pd.Series(candles).rolling(window=period).mean()
-    tma_series = sma1.rolling(window=period).mean()
-    return tma_series.iloc[-1]
+    ama_val = kernels.kama(ix.close, period, fast, slow)
+    if output == "series":
+        return ix.aligned(ama_val)
+    return ama_val[-1] if not np.isnan(ama_val).all() else None
 
-def ama(symbol, period, interval, fast=2, slow=30):
+def ama(symbol, period, interval, fast=2, slow=30, output="value", bars=None):
     """
     Calculate Kaufman's Adaptive Moving Average (KAMA).
     """
-    candles = candle_list(symbol, period + 30, interval, field="close")
-    if not candles:
+    ix = load(symbol, LOOKBACK["ama"](period, slow=slow), interval, output, bars)
+    if ix is None:
         return None
-        
-    series = pd.Series(candles)
-    change = (series - series.shift(period)).abs()
-    volatility = (series - series.shift(1)).abs().rolling(period).sum()
-    
-    # Avoid division by zero
-    volatility = volatility.replace(0, np.nan)
-    er = change / volatility
-    er = er.fillna(0)
-    
-    sc_fast = 2 / (fast + 1)
-    sc_slow = 2 / (slow + 1)
-    sc = (er * (sc_fast - sc_slow) + sc_slow) ** 2
-    
-    ama_val = pd.Series(index=series.index, dtype='float64')
-    # Start with an SMA or first close
-    valid_start_idx = period - 1
-    if len(series) <= valid_start_idx:
-        return None
-        
-    ama_val.iloc[valid_start_idx] = series.iloc[valid_start_idx]
-    
-    for i in range(period, len(series)):
-        ama_val.iloc[i] = ama_val.iloc[i-1] + sc.iloc[i] * (series.iloc[i] - ama_val.iloc[i-1])
-        
-    return ama_val.iloc[-1] if not ama_val.dropna().empty else None
+    return _ama(ix, period, fast, slow, output)
+
+def _macd(ix, short_period, long_period, signal_period, output="value"):
+    lines = kernels.macd(ix.close, short_period, long_period, signal_period,
+                         short_ema=ix.ema(short_period), long_ema=ix.ema(long_period))
+    if output == "series":
+        return ix.aligned(lines)
+
+    return {
+        "macd": lines["macd"][-1],
+        "signal": lines["signal"][-1],
+        "histogram": lines["macd"][-1] - lines["signal"][-1]
+    }
 
-def macd(symbol, short_period, long_period, signal_period, interval):
+def macd(symbol, short_period, long_period, signal_period, interval, output="value", bars=None):
     """
     Calculate Moving Average Convergence Divergence (MACD).
     """
-    # MACD needs significant warm-up
-    candles = candle_list(symbol, long_period * 3 + signal_period, interval, field="close")
-    if not candles:
+    ix = load(symbol, LOOKBACK["macd"](short_period, long_period, signal_period), interval, output, bars)
+    if ix is None:
         return None
+    return _macd(ix, short_period, long_period, signal_period, output)
 
-    series = pd.Series(candles)
-    short_ema = series.ewm(span=short_period, adjust=False).mean()
-    long_ema = series.ewm(span=long_period, adjust=False).mean()
-    macd_line = short_ema - long_ema
-    signal_line = macd_line.ewm(span=signal_period, adjust=False).mean()
-    
-    return {
-        "macd": macd_line.iloc[-1],
-        "signal": signal_line.iloc[-1],
-        "histogram": macd_line.iloc[-1] - signal_line.iloc[-1]
-    }
+def _sma_sweep(ix, periods, output="value"):
+    return ix.swept(kernels.sma_sweep(ix.close, periods), periods, output)
+
+def sma_sweep(symbol, periods, interval, output="value", bars=None):
+    """
+    Calculate the SMA for every period in `periods` from one fetch.
+    :return: Latest SMA per period as a Series indexed by period; with
+             output="series" a DataFrame with one column per period.
+    """
+    periods = list(periods)
+    ix = load(symbol, LOOKBACK["sma_sweep"](periods), interval, output, bars)
+    if ix is None:
+        return None
+    return _sma_sweep(ix, periods, output)
+
+def _ema_sweep(ix, periods, output="value"):
+    return ix.swept(kernels.ema_sweep(ix.close, periods), periods, output)
+
+def ema_sweep(symbol, periods, interval, output="value", bars=None):
+    """
+    Calculate the EMA for every period in `periods` from one fetch, each
+    warmed up as far as the longest period needs.
+    :return: Latest EMA per period as a Series indexed by period; with
+             output="series" a DataFrame with one column per period.
+    """
+    periods = list(periods)
+    ix = load(symbol, LOOKBACK["ema_sweep"](periods), interval, output, bars)
+    if ix is None:
+        return None
+    return _ema_sweep(ix, periods, output)
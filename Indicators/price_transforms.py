@@ -1,10 +1,22 @@
-from .Candle_fetcher import candle_list
-import pandas as pd
+from .intermediates import load
+from . import kernels
 
 # Price transformation utilities preprocess price data for use in indicators.
 # Examples include Typical Price, Median Price, Weighted Close, etc.
 
-def typical_price(symbol, period, interval):
+# Candles each indicator fetches, as a function of its parameters
+LOOKBACK = {
+    # Both come from the latest candle alone
+    "typical_price": lambda period, **_: 1,
+    "median_price": lambda period, **_: 1,
+}
+
+def _typical_price(ix, period, output="value"):
+    if output == "series":
+        return ix.aligned(ix.typical_price())
+    return kernels.typical_price(ix.high[-1:], ix.low[-1:], ix.close[-1:])[-1]
+
+def typical_price(symbol, period, interval, output="value", bars=None):
     """
     Calculate the Typical Price.
     :param symbol: Stock symbol (e.g., "AAPL").
@@ -12,16 +24,17 @@ def typical_price(symbol, period, interval):
     :param interval: Interval for the candle data (e.g., "1d").
     :return: Typical Price value.
     """
-    candles = candle_list(symbol, period, interval, field="all")
-    if not candles:
+    ix = load(symbol, LOOKBACK["typical_price"](period), interval, output, bars)
+    if ix is None:
         return None
-        
-    high = candles[-1]["high"]
-    low = candles[-1]["low"]
-    close = candles[-1]["close"]
-    return (high + low + close) / 3
+    return _typical_price(ix, period, output)
+
+def _median_price(ix, period, output="value"):
+    if output == "series":
+        return ix.aligned(kernels.median_price(ix.high, ix.low))
+    return kernels.median_price(ix.high[-1:], ix.low[-1:])[-1]
 
-def median_price(symbol, period, interval):
+def median_price(symbol, period, interval, output="value", bars=None):
     """
     Calculate the Median Price.
     :param symbol: Stock symbol (e.g., "AAPL").
@@ -29,10 +42,7 @@ def median_price(symbol, period, interval):
     :param interval: Interval for the candle data (e.g., "1d").
     :return: Median Price value.
     """
-    candles = candle_list(symbol, period, interval, field="all")
-    if not candles:
+    ix = load(symbol, LOOKBACK["median_price"](period), interval, output, bars)
+    if ix is None:
         return None
-        
-    high = candles[-1]["high"]
-    low = candles[-1]["low"]
-    return (high + low) / 2
+    return _median_price(ix, period, output)
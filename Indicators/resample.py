@@ -0,0 +1,260 @@
+import os
+import re
+import numpy as np
+import pandas as pd
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from . import candle_store
+from . import frame
+
+# Local resampling engine: builds higher intervals from the stored 1m bars.
+# Intraday buckets are anchored at the session open in the exchange timezone
+# (so 60m/90m bars open on the half hour like yfinance's), daily buckets at
+# local midnight. A bucket is only stored once the 1m data is known to be
+# complete up to its end, so partially observed bars never reach the store.
+#
+# Sessions are resolved per symbol from its yfinance suffix: plain tickers
+# trade on the default session (SIM_SESSION_*, US equities by default),
+# suffixed ones on their exchange's. Symbols without a known session (FX,
+# futures, crypto, indices, unlisted exchanges) are never resampled; their
+# bars are fetched natively so the phase always matches yfinance's.
+
+RESAMPLED_INTERVALS = ("2m", "5m", "15m", "30m", "60m", "90m", "1h", "1d")
+
+SESSION_TZ = os.getenv("SIM_SESSION_TZ", "America/New_York")
+SESSION_OPEN = os.getenv("SIM_SESSION_OPEN", "09:30")
+SESSION_CLOSE = os.getenv("SIM_SESSION_CLOSE", "16:00")
+# Market holidays of the default session, e.g. "2026-12-25,2027-01-01"
+HOLIDAYS = frozenset(
+    date.fromisoformat(day.strip())
+    for day in os.getenv("SIM_HOLIDAYS", "").split(",")
+    if day.strip()
+)
+
+_ONE_MINUTE = timedelta(minutes=1)
+# How far back `update` looks for a bucket left open by an earlier call
+MAX_RESUME = timedelta(days=7)
+
+
+def _minutes(hhmm):
+    hours, minutes = hhmm.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+class Session:
+    """
+    Regular trading hours of an exchange, in its local timezone.
+    """
+
+    __slots__ = ("tz", "zone", "open", "close", "holidays")
+
+    def __init__(self, tz, open, close, holidays=frozenset()):
+        self.tz = tz
+        self.zone = ZoneInfo(tz)
+        self.open = _minutes(open)
+        self.close = _minutes(close)
+        self.holidays = holidays
+
+    def __repr__(self):
+        return f"Session({self.tz}, {self.open // 60:02d}:{self.open % 60:02d}-{self.close // 60:02d}:{self.close % 60:02d})"
+
+    def is_trading_day(self, day):
+        return day.weekday() < 5 and day not in self.holidays
+
+
+DEFAULT_SESSION = Session(SESSION_TZ, SESSION_OPEN, SESSION_CLOSE, HOLIDAYS)
+
+# Continuous sessions only: exchanges with a lunch break do not bucket like this
+EXCHANGE_SESSIONS = {
+    "TO": Session("America/Toronto", "09:30", "16:00"),
+    "V": Session("America/Toronto", "09:30", "16:00"),
+    "L": Session("Europe/London", "08:00", "16:30"),
+    "DE": Session("Europe/Berlin", "09:00", "17:30"),
+    "PA": Session("Europe/Paris", "09:00", "17:30"),
+    "AS": Session("Europe/Amsterdam", "09:00", "17:30"),
+    "MC": Session("Europe/Madrid", "09:00", "17:30"),
+    "MI": Session("Europe/Rome", "09:00", "17:30"),
+    "SW": Session("Europe/Zurich", "09:00", "17:30"),
+    "AX": Session("Australia/Sydney", "10:00", "16:00"),
+    "NS": Session("Asia/Kolkata", "09:15", "15:30"),
+    "BO": Session("Asia/Kolkata", "09:15", "15:30"),
+}
+
+_CRYPTO = re.compile(r"-(USD|USDT|USDC|EUR|GBP|JPY|BTC|ETH)$")
+
+
+def session_for(symbol):
+    """
+    Trading session of `symbol`, or None when it is not known.
+    """
+    if "=" in symbol or symbol.startswith("^") or _CRYPTO.search(symbol):
+        return None
+    _, dot, suffix = symbol.rpartition(".")
+    if not dot:
+        return DEFAULT_SESSION
+    return EXCHANGE_SESSIONS.get(suffix.upper())
+
+
+def can_resample(symbol, interval):
+    return interval in RESAMPLED_INTERVALS and session_for(symbol) is not None
+
+
+def _interval_minutes(interval):
+    return int(interval[:-1]) * (60 if interval.endswith("h") else 1)
+
+
+def _utc_offsets(ts, zone):
+    """
+    UTC offset (seconds) of `zone` at each epoch second. DST only changes on
+    hour boundaries, so offsets are resolved once per hour.
+    """
+    hours, inverse = np.unique(ts // 3600, return_inverse=True)
+    offsets = np.array([
+        datetime.fromtimestamp(int(h) * 3600, tz=zone).utcoffset().total_seconds()
+        for h in hours
+    ], dtype=np.int64)
+    return offsets[inverse.reshape(-1)]
+
+
+def bucket_bounds(ts, interval, session=DEFAULT_SESSION):
+    """
+    Start and end (epoch seconds) of the `interval` bucket holding each 1m
+    timestamp in `ts`.
+    """
+    ts = np.asarray(ts, dtype=np.int64)
+    offsets = _utc_offsets(ts, session.zone)
+    local = ts + offsets
+    midnight = local - local % 86400
+
+    if interval == "1d":
+        start = midnight
+        end = midnight + 86400
+    else:
+        step = _interval_minutes(interval) * 60
+        session_open = midnight + session.open * 60
+        start = session_open + ((local - session_open) // step) * step
+        end = start + step
+
+    return start - offsets, end - offsets
+
+
+def aggregate(candles, interval, session=DEFAULT_SESSION):
+    """
+    Aggregate a sorted 1m CandleFrame into `interval` bars. Returns the bars
+    and the end timestamp of each bar's bucket.
+    """
+    if not len(candles):
+        return frame.empty(candles.symbol), np.empty(0, dtype=np.int64)
+
+    starts, ends = bucket_bounds(candles.timestamp, interval, session)
+    first = np.flatnonzero(np.r_[True, starts[1:] != starts[:-1]])
+    last = np.r_[first[1:] - 1, len(starts) - 1]
+
+    bars = frame.CandleFrame(
+        candles.symbol,
+        candles.open[first],
+        np.maximum.reduceat(candles.high, first),
+        np.minimum.reduceat(candles.low, first),
+        candles.close[last],
+        np.add.reduceat(candles.volume, first),
+        starts[first],
+    )
+    return bars, ends[first]
+
+
+def in_session(gap_start, gap_end, session=DEFAULT_SESSION):
+    """
+    True if [gap_start, gap_end) overlaps a trading session.
+    """
+    local_start = pd.Timestamp(gap_start).tz_convert(session.tz).normalize()
+    local_end = pd.Timestamp(gap_end).tz_convert(session.tz)
+    for day in pd.date_range(local_start, local_end, freq="D"):
+        if not session.is_trading_day(day.date()):
+            continue
+        session_open = day + pd.Timedelta(minutes=session.open)
+        session_close = day + pd.Timedelta(minutes=session.close)
+        if session_open < gap_end and session_close > gap_start:
+            return True
+    return False
+
+
+def _complete_segments(symbol, start, end, session):
+    """
+    Sub-ranges of [start, end) over which the 1m store is complete. Missing
+    1m data outside trading sessions (nights, weekends) is not a gap.
+    """
+    gaps = [
+        (s, e)
+        for s, e in candle_store.missing_ranges(symbol, "1m", start, end, _ONE_MINUTE)
+        if in_session(s, e, session)
+    ]
+    segments = []
+    cursor = start
+    for gap_start, gap_end in gaps:
+        if gap_start > cursor:
+            segments.append((cursor, gap_start))
+        cursor = gap_end
+    if cursor < end:
+        segments.append((cursor, end))
+    return segments
+
+
+def _to_datetime(ts):
+    return datetime.fromtimestamp(int(ts), tz=timezone.utc)
+
+
+def update(symbol, interval, start, end):
+    """
+    Rebuild the `interval` buckets overlapping [start, end) from the 1m store,
+    persist the complete ones and record them as covered. Only buckets touched
+    by the range are recomputed, so calling this with the window of newly
+    arrived 1m bars maintains the interval incrementally.
+    Returns the number of newly stored bars.
+    """
+    if interval not in RESAMPLED_INTERVALS:
+        raise ValueError(f"Interval cannot be resampled from 1m: {interval}")
+    session = session_for(symbol)
+    if session is None:
+        raise ValueError(f"No known trading session for {symbol}; fetch {interval} natively")
+
+    # Resume from the bucket left open last time, e.g. the final bar of the
+    # previous session that only completes once later data arrives; without
+    # history, revisit the bucket before `start`
+    resume = candle_store.coverage_end(symbol, interval, start)
+    if resume is not None and start - resume <= MAX_RESUME:
+        start = resume
+    elif interval == "1d":
+        start = start - timedelta(days=1)
+    else:
+        start = start - timedelta(minutes=_interval_minutes(interval))
+
+    first_start, _ = bucket_bounds([int(start.timestamp())], interval, session)
+    start = _to_datetime(first_start[0])
+
+    written = 0
+    for seg_start, seg_end in _complete_segments(symbol, start, end, session):
+        bars, bar_ends = aggregate(candle_store.read_frame(symbol, "1m", seg_start, seg_end), interval, session)
+
+        seg_start_s, seg_end_s = int(seg_start.timestamp()), int(seg_end.timestamp())
+        complete = (bars.timestamp >= seg_start_s) & (bar_ends <= seg_end_s)
+        written += candle_store.write_frame(interval, bars.mask(complete))
+
+        # Covered from the first bucket boundary inside the segment up to the
+        # start of the bucket still forming at its end
+        (lo_start,), (lo_end,) = bucket_bounds([seg_start_s], interval, session)
+        (hi_start,), _ = bucket_bounds([seg_end_s], interval, session)
+        covered_start = lo_start if lo_start == seg_start_s else lo_end
+        candle_store.add_coverage(symbol, interval, _to_datetime(covered_start), _to_datetime(hi_start))
+
+    return written
+
+
+def update_all(symbol, start, end, intervals=RESAMPLED_INTERVALS):
+    """
+    Fold the 1m bars stored for [start, end) into every resampled interval;
+    nothing for symbols without a known session.
+    """
+    if session_for(symbol) is None:
+        return {}
+    return {interval: update(symbol, interval, start, end) for interval in intervals}
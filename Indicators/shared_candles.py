@@ -0,0 +1,218 @@
+import os
+import re
+import time
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+
+from . import frame
+
+# Shared-memory OHLCV ring buffers, one segment per (symbol, interval).
+# Price_adapter is the single writer; every strategy process maps the same
+# segment and reads the most recent bars as NumPy views without copying.
+#
+# Layout: an int64 header followed by six columns (open, high, low, close,
+# volume, timestamp). Each column holds 2 * capacity slots and every bar is
+# written twice, at slot i and i + capacity, so any window of up to
+# `capacity` bars is one contiguous slice.
+#
+# Header fields are guarded by a seqlock: the writer makes `seq` odd while
+# it updates the buffer and even again when done; readers retry if `seq`
+# was odd or changed while they were reading.
+
+RING_CAPACITY = int(os.getenv("SIM_SHM_CAPACITY", "1024"))
+# Readers ignore a ring whose writer has not checked in for this long
+RING_STALE_AFTER = int(os.getenv("SIM_SHM_STALE_AFTER", "180"))
+
+_MAGIC = 0x5051524E47  # "PQRNG"
+_HEADER_SLOTS = 8
+_H_MAGIC, _H_SEQ, _H_CAPACITY, _H_COUNT, _H_LAST_TS, _H_HEARTBEAT = range(6)
+_COLUMNS = ("open", "high", "low", "close", "volume", "timestamp")
+_INT_COLUMNS = {"volume", "timestamp"}
+
+# Segments owned by a writer in this process; the writer reads through the
+# regular tiers so it never serves its own ring back to itself
+_writing = set()
+
+
+def segment_name(symbol, interval):
+    return "pq_" + re.sub(r"[^A-Za-z0-9]", "_", f"{symbol}_{interval}")
+
+
+def _segment_size(capacity):
+    return 8 * (_HEADER_SLOTS + len(_COLUMNS) * 2 * capacity)
+
+
+def _views(buf, capacity):
+    header = np.ndarray((_HEADER_SLOTS,), dtype=np.int64, buffer=buf)
+    columns = {}
+    offset = 8 * _HEADER_SLOTS
+    for name in _COLUMNS:
+        dtype = np.int64 if name in _INT_COLUMNS else np.float64
+        columns[name] = np.ndarray((2 * capacity,), dtype=dtype, buffer=buf, offset=offset)
+        offset += 8 * 2 * capacity
+    return header, columns
+
+
+def attach(name):
+    """
+    Attach to an existing segment without letting this process' resource
+    tracker unlink it on exit (only the writer owns the segment).
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return shm
+
+
+class CandleRingWriter:
+    """
+    Single-writer ring buffer for closed candles of one (symbol, interval).
+    """
+
+    def __init__(self, symbol, interval, capacity=RING_CAPACITY):
+        self.symbol = symbol
+        self.interval = interval
+        self.capacity = capacity
+        name = segment_name(symbol, interval)
+
+        try:
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=_segment_size(capacity))
+        except FileExistsError:
+            # Left behind by a writer that did not shut down cleanly
+            stale = attach(name)
+            stale.close()
+            stale.unlink()
+            self._shm = shared_memory.SharedMemory(name=name, create=True, size=_segment_size(capacity))
+
+        _writing.add(name)
+        self._header, self._columns = _views(self._shm.buf, capacity)
+        self._header[:] = 0
+        self._header[_H_CAPACITY] = capacity
+        self._header[_H_MAGIC] = _MAGIC
+
+    @property
+    def last_timestamp(self):
+        return int(self._header[_H_LAST_TS]) if self._header[_H_COUNT] else None
+
+    def heartbeat(self):
+        self._header[_H_HEARTBEAT] = int(time.time())
+
+    def publish(self, candles):
+        """
+        Append the bars of a CandleFrame that are newer than the last published
+        bar. Returns the number of appended bars.
+        """
+        if candles is not None and len(candles) and self._header[_H_COUNT]:
+            candles = candles.mask(candles.timestamp > self._header[_H_LAST_TS])
+
+        appended = 0 if candles is None else min(len(candles), self.capacity)
+        if appended:
+            candles = candles.tail(appended)
+            count = int(self._header[_H_COUNT])
+            slots = (count + np.arange(appended)) % self.capacity
+
+            header = self._header
+            header[_H_SEQ] += 1
+            for name in _COLUMNS:
+                values = getattr(candles, name)
+                column = self._columns[name]
+                column[slots] = values
+                column[slots + self.capacity] = values
+            header[_H_COUNT] = count + appended
+            header[_H_LAST_TS] = int(candles.timestamp[-1])
+            header[_H_SEQ] += 1
+
+        self.heartbeat()
+        return appended
+
+    def close(self, unlink=True):
+        _writing.discard(segment_name(self.symbol, self.interval))
+        self._header = None
+        self._columns = None
+        self._shm.close()
+        if unlink:
+            self._shm.unlink()
+
+
+# Reader side: segments attached by this process, keyed by segment name
+_attached = {}
+
+
+def _reader(symbol, interval):
+    name = segment_name(symbol, interval)
+    entry = _attached.get(name)
+    if entry is None:
+        try:
+            shm = attach(name)
+        except FileNotFoundError:
+            return None
+        header = np.ndarray((_HEADER_SLOTS,), dtype=np.int64, buffer=shm.buf)
+        magic, capacity = int(header[_H_MAGIC]), int(header[_H_CAPACITY])
+        del header
+        if magic != _MAGIC:
+            shm.close()
+            return None
+        header, columns = _views(shm.buf, capacity)
+        for column in columns.values():
+            column.flags.writeable = False
+        entry = (shm, header, columns, capacity)
+        _attached[name] = entry
+    return entry
+
+
+def _detach(symbol, interval):
+    entry = _attached.pop(segment_name(symbol, interval), None)
+    if entry is not None:
+        try:
+            entry[0].close()
+        except BufferError:
+            # Views handed out earlier still reference the mapping
+            pass
+
+
+def read(symbol, interval, no_of_candles):
+    """
+    Return the latest `no_of_candles` bars as a CandleFrame of zero-copy views,
+    or None if no live ring holds that many bars. The views stay valid until
+    the writer wraps around onto them, i.e. for at least
+    capacity - no_of_candles further bars; copy them to keep data longer.
+    """
+    if segment_name(symbol, interval) in _writing:
+        return None
+
+    entry = _reader(symbol, interval)
+    if entry is None:
+        return None
+    shm, header, columns, capacity = entry
+
+    if no_of_candles > capacity:
+        return None
+
+    while True:
+        if header[_H_HEARTBEAT] < time.time() - RING_STALE_AFTER:
+            # Writer is gone; a restarted writer creates a fresh segment
+            _detach(symbol, interval)
+            return None
+
+        seq = int(header[_H_SEQ])
+        if seq & 1:
+            time.sleep(0)
+            continue
+
+        count = int(header[_H_COUNT])
+        if count < no_of_candles:
+            return None
+
+        end = (count - 1) % capacity + capacity + 1
+        start = end - no_of_candles
+        views = [columns[name][start:end] for name in _COLUMNS]
+
+        if int(header[_H_SEQ]) == seq:
+            break
+
+    return frame.CandleFrame(symbol, *views)
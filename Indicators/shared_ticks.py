@@ -0,0 +1,205 @@
+import os
+import re
+import time
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+
+from .shared_candles import attach
+
+# Shared-memory tick rings, one segment per symbol. Price_adapter's live feed
+# is the single writer; Trade_adapter reads the price in force a given time
+# ago (the simulated execution delay) with one binary search, however busy
+# the symbol is.
+#
+# Layout: an int64 header followed by two float64 columns (ts, price). As in
+# shared_candles each column holds 2 * capacity slots and every tick is
+# written twice, so the retained ticks are always one contiguous, sorted
+# slice. Timestamps are epoch seconds from time.time(), the clock readers
+# compare against. The same seqlock guards reads against a concurrent write.
+#
+# A segment outlives its writer: a restarted feed picks up the existing ring,
+# so readers keep their mapping and the last ticks stay available. Changing
+# SIM_TICK_CAPACITY replaces the segment; restart the readers after that.
+# The ring must hold at least the price delay's worth of ticks: a target time
+# older than the oldest retained tick has no price.
+
+TICK_CAPACITY = int(os.getenv("SIM_TICK_CAPACITY", "8192"))
+
+_MAGIC = 0x5051544B52  # "PQTKR"
+_HEADER_SLOTS = 8
+_H_MAGIC, _H_SEQ, _H_CAPACITY, _H_COUNT = range(4)
+
+
+def segment_name(symbol):
+    return "pqt_" + re.sub(r"[^A-Za-z0-9]", "_", symbol)
+
+
+def _segment_size(capacity):
+    return 8 * (_HEADER_SLOTS + 2 * 2 * capacity)
+
+
+def _create(name, capacity):
+    """
+    Create a segment that outlives this process: untracked, so the resource
+    tracker does not unlink it when the writer exits.
+    """
+    size = _segment_size(capacity)
+    try:
+        return shared_memory.SharedMemory(name=name, create=True, size=size, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        try:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return shm
+
+
+def _views(buf, capacity):
+    header = np.ndarray((_HEADER_SLOTS,), dtype=np.int64, buffer=buf)
+    offset = 8 * _HEADER_SLOTS
+    ts = np.ndarray((2 * capacity,), dtype=np.float64, buffer=buf, offset=offset)
+    price = np.ndarray((2 * capacity,), dtype=np.float64, buffer=buf, offset=offset + 8 * 2 * capacity)
+    return header, ts, price
+
+
+class TickRingWriter:
+    """
+    Single-writer ring of the last `capacity` (ts, price) ticks of a symbol.
+    """
+
+    def __init__(self, symbol, capacity=TICK_CAPACITY):
+        self.symbol = symbol
+        self.capacity = capacity
+        name = segment_name(symbol)
+
+        try:
+            self._shm = _create(name, capacity)
+            fresh = True
+        except FileExistsError:
+            self._shm = attach(name)
+            fresh = False
+            header = np.ndarray((_HEADER_SLOTS,), dtype=np.int64, buffer=self._shm.buf)
+            reusable = header[_H_MAGIC] == _MAGIC and header[_H_CAPACITY] == capacity
+            del header
+            if not reusable:
+                self._shm.close()
+                self._shm.unlink()
+                self._shm = _create(name, capacity)
+                fresh = True
+
+        self._header, self._ts, self._price = _views(self._shm.buf, capacity)
+        if fresh:
+            self._header[:] = 0
+            self._header[_H_CAPACITY] = capacity
+            self._header[_H_MAGIC] = _MAGIC
+        elif self._header[_H_SEQ] & 1:
+            # The previous writer died mid-append; readers would wait forever
+            self._header[_H_SEQ] += 1
+
+    def append(self, price, ts=None):
+        """
+        Record a tick, stamped now unless `ts` is given. Ticks must arrive in
+        time order; an older one is stamped with the newest time seen.
+        Returns the time stored.
+        """
+        ts = time.time() if ts is None else ts
+        header = self._header
+        count = int(header[_H_COUNT])
+        if count:
+            ts = max(ts, self._ts[(count - 1) % self.capacity])
+        slot = count % self.capacity
+
+        header[_H_SEQ] += 1
+        self._ts[slot] = self._ts[slot + self.capacity] = ts
+        self._price[slot] = self._price[slot + self.capacity] = price
+        header[_H_COUNT] = count + 1
+        header[_H_SEQ] += 1
+        return ts
+
+    def close(self, unlink=False):
+        self._header = self._ts = self._price = None
+        self._shm.close()
+        if unlink:
+            self._shm.unlink()
+
+
+# Reader side: segments attached by this process, keyed by segment name
+_attached = {}
+
+
+def _reader(symbol):
+    name = segment_name(symbol)
+    entry = _attached.get(name)
+    if entry is None:
+        try:
+            shm = attach(name)
+        except FileNotFoundError:
+            return None
+        header = np.ndarray((_HEADER_SLOTS,), dtype=np.int64, buffer=shm.buf)
+        magic, capacity = int(header[_H_MAGIC]), int(header[_H_CAPACITY])
+        del header
+        if magic != _MAGIC:
+            shm.close()
+            return None
+        header, ts, price = _views(shm.buf, capacity)
+        ts.flags.writeable = False
+        price.flags.writeable = False
+        entry = (shm, header, ts, price, capacity)
+        _attached[name] = entry
+    return entry
+
+
+def price_at(symbol, target_ts):
+    """
+    Price of the last tick at or before `target_ts` (epoch seconds). None
+    if there is no such tick, including when the ring no longer reaches
+    back to `target_ts`.
+    """
+    entry = _reader(symbol)
+    if entry is None:
+        return None
+    shm, header, ts, price, capacity = entry
+
+    while True:
+        seq = int(header[_H_SEQ])
+        if seq & 1:
+            time.sleep(0)
+            continue
+
+        count = int(header[_H_COUNT])
+        if not count:
+            return None
+        end = (count - 1) % capacity + capacity + 1
+        start = end - min(count, capacity)
+        at = start + int(np.searchsorted(ts[start:end], target_ts, side="right"))
+        selected = float(price[at - 1]) if at > start else None
+
+        if int(header[_H_SEQ]) == seq:
+            return selected
+
+
+def next_tick_time(symbol, after_ts):
+    """
+    Time of the first retained tick after `after_ts`, or None. With a delayed
+    price this is when that price next changes, minus the delay.
+    """
+    entry = _reader(symbol)
+    if entry is None:
+        return None
+    shm, header, ts, price, capacity = entry
+
+    while True:
+        seq = int(header[_H_SEQ])
+        if seq & 1:
+            time.sleep(0)
+            continue
+
+        count = int(header[_H_COUNT])
+        end = (count - 1) % capacity + capacity + 1 if count else 0
+        start = end - min(count, capacity)
+        at = start + int(np.searchsorted(ts[start:end], after_ts, side="right"))
+        found = float(ts[at]) if at < end else None
+
+        if int(header[_H_SEQ]) == seq:
+            return found
@@ -1,10 +1,33 @@
-from .Candle_fetcher import candle_list
-import pandas as pd
+from .intermediates import load, EVENT_OUTPUTS
+from . import kernels
 
 # Signal indicators generate binary or event-based outputs for strategies.
 # Examples include Moving Average Crossovers, RSI Divergence, Breakout Detection, etc.
+# With output="events" they list every bar the signal fired on over the last
+# `bars` bars (bar position, open time, direction), e.g. for backtests.
 
-def moving_average_crossover(symbol, period, interval, short_period=9, long_period=21):
+# Candles each indicator fetches, as a function of its parameters
+LOOKBACK = {
+    "moving_average_crossover": lambda period, **_: period,
+    "breakout_detection": lambda period, **_: period + 1,
+}
+
+def _moving_average_crossover(ix, period, short_period=9, long_period=21, output="value"):
+    if len(ix) < long_period + 1 and output == "value":
+        return 0
+
+    # 1 for a bullish crossover on the bar, -1 for a bearish one
+    signal = kernels.moving_average_crossover(
+        ix.close, short_period, long_period,
+        short_ma=ix.rolling_mean(short_period), long_ma=ix.rolling_mean(long_period),
+    )
+    if output == "series":
+        return ix.aligned(signal)
+    if output == "events":
+        return ix.events(signal)
+    return int(signal[-1])
+
+def moving_average_crossover(symbol, period, interval, short_period=9, long_period=21, output="value", bars=None):
     """
     Detect Moving Average Crossover.
     :param symbol: Stock symbol (e.g., "AAPL").
@@ -13,42 +36,35 @@ def moving_average_crossover(symbol, period, interval, short_period=9, long_peri
     :param short_period: Short moving average period.
     :param long_period: Long moving average period.
     :return: Signal (1 for bullish crossover, -1 for bearish crossover, 0 for no signal).
+             With output="events", the crossovers over the last `bars` bars.
     """
-    prices = candle_list(symbol, period, interval, field="close")
-    if not prices or len(prices) < long_period + 1:
+    ix = load(symbol, LOOKBACK["moving_average_crossover"](period), interval, output, bars, EVENT_OUTPUTS)
+    if ix is None:
         return 0
-        
-    prices_ser = pd.Series(prices)
-    short_ma = prices_ser.rolling(window=short_period).mean()
-    long_ma = prices_ser.rolling(window=long_period).mean()
-    
-    if short_ma.iloc[-1] > long_ma.iloc[-1] and short_ma.iloc[-2] <= long_ma.iloc[-2]:
-        return 1  # Bullish crossover
-    elif short_ma.iloc[-1] < long_ma.iloc[-1] and short_ma.iloc[-2] >= long_ma.iloc[-2]:
-        return -1  # Bearish crossover
-    return 0
-
-def breakout_detection(symbol, period, interval):
+    return _moving_average_crossover(ix, period, short_period, long_period, output)
+
+def _breakout_detection(ix, period, output="value"):
+    if len(ix) < period + 1 and output == "value":
+        return 0
+
+    # Against the high/low of the previous `period` candles
+    signal = kernels.breakout(ix.close, period)
+    if output == "series":
+        return ix.aligned(signal)
+    if output == "events":
+        return ix.events(signal)
+    return int(signal[-1])
+
+def breakout_detection(symbol, period, interval, output="value", bars=None):
     """
     Detect breakout above rolling high or below rolling low.
     :param symbol: Stock symbol (e.g., "AAPL").
     :param period: Rolling window size for high/low.
     :param interval: Interval for the candle data (e.g., "1d").
     :return: Signal (1 for breakout above high, -1 for breakout below low, 0 for no breakout).
+             With output="events", the breakouts over the last `bars` bars.
     """
-    prices = candle_list(symbol, period + 1, interval, field="close")
-    if not prices or len(prices) < period + 1:
+    ix = load(symbol, LOOKBACK["breakout_detection"](period), interval, output, bars, EVENT_OUTPUTS)
+    if ix is None:
         return 0
-        
-    prices_ser = pd.Series(prices)
-    # Use previous 'period' candles to find resistance/support
-    resistance = prices_ser.iloc[:-1].rolling(window=period).max().iloc[-1]
-    support = prices_ser.iloc[:-1].rolling(window=period).min().iloc[-1]
-    
-    current_price = prices_ser.iloc[-1]
-    
-    if current_price > resistance:
-        return 1  # Breakout above resistance
-    elif current_price < support:
-        return -1  # Breakout below support
-    return 0
+    return _breakout_detection(ix, period, output)
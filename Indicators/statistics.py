@@ -1,10 +1,31 @@
-from .Candle_fetcher import candle_list
-import pandas as pd
+from .intermediates import load
+from . import kernels
+import numpy as np
 
 # Statistical indicators are useful for quant-style strategies and filtering.
 # Examples include Z-score, Linear Regression, Rolling Sharpe Ratio, etc.
 
-def z_score(symbol, period, interval):
+# Candles each indicator fetches, as a function of its parameters
+LOOKBACK = {
+    "z_score": lambda period, **_: period,
+    "rolling_sharpe_ratio": lambda period, **_: period + 1,
+    "z_score_sweep": lambda periods, **_: max(periods),
+    "linear_regression": lambda period, **_: period,
+    "rolling_variance": lambda period, **_: period + 1,
+    "rolling_skew": lambda period, **_: period + 1,
+    "beta": lambda period, **_: period + 1,
+    "correlation": lambda period, **_: period + 1,
+    "rolling_statistics": lambda periods, **_: max(periods) + 1,
+}
+
+def _z_score(ix, period, output="value"):
+    z_score_ser = kernels.z_score(ix.close, period, mean=ix.rolling_mean(period), std=ix.rolling_std(period))
+    if output == "series":
+        return ix.aligned(z_score_ser)
+    # 0 without enough candles or dispersion
+    return 0.0 if np.isnan(z_score_ser[-1]) else z_score_ser[-1]
+
+def z_score(symbol, period, interval, output="value", bars=None):
     """
     Calculate the Z-score of prices over a rolling window.
     :param symbol: Stock symbol (e.g., "AAPL").
@@ -12,21 +33,18 @@ def z_score(symbol, period, interval):
     :param interval: Interval for the candle data (e.g., "1d").
     :return: Z-score value.
     """
-    prices = candle_list(symbol, period, interval, field="close")
-    if not prices:
+    ix = load(symbol, LOOKBACK["z_score"](period), interval, output, bars)
+    if ix is None:
         return None
-        
-    prices_ser = pd.Series(prices)
-    rolling_mean = prices_ser.rolling(window=period).mean()
-    rolling_std = prices_ser.rolling(window=period).std()
-    
-    if rolling_std.iloc[-1] == 0 or pd.isna(rolling_std.iloc[-1]):
-        return 0.0
-        
-    z_score_val = (prices_ser.iloc[-1] - rolling_mean.iloc[-1]) / rolling_std.iloc[-1]
-    return z_score_val
+    return _z_score(ix, period, output)
 
-def rolling_sharpe_ratio(symbol, period, interval):
+def _rolling_sharpe_ratio(ix, period, output="value"):
+    sharpe_ratio = kernels.rolling_sharpe_ratio(ix.close, period)
+    if output == "series":
+        return ix.aligned(sharpe_ratio)
+    return sharpe_ratio[-1]
+
+def rolling_sharpe_ratio(symbol, period, interval, output="value", bars=None):
     """
     Calculate the rolling Sharpe Ratio.
     :param symbol: Stock symbol (e.g., "AAPL").
@@ -34,12 +52,150 @@ def rolling_sharpe_ratio(symbol, period, interval):
     :param interval: Interval for the candle data (e.g., "1d").
     :return: Rolling Sharpe Ratio value.
     """
-    prices = candle_list(symbol, period + 1, interval, field="close")
-    if not prices:
+    ix = load(symbol, LOOKBACK["rolling_sharpe_ratio"](period), interval, output, bars)
+    if ix is None:
+        return None
+    return _rolling_sharpe_ratio(ix, period, output)
+
+def _z_score_sweep(ix, periods, output="value"):
+    return ix.swept(kernels.z_score_sweep(ix.close, periods), periods, output)
+
+def z_score_sweep(symbol, periods, interval, output="value", bars=None):
+    """
+    Calculate the Z-score for every window in `periods` from one fetch.
+    :return: Latest Z-score per window as a Series indexed by period; with
+             output="series" a DataFrame with one column per period.
+    """
+    periods = list(periods)
+    ix = load(symbol, LOOKBACK["z_score_sweep"](periods), interval, output, bars)
+    if ix is None:
+        return None
+    return _z_score_sweep(ix, periods, output)
+
+# Regression, moments and benchmark statistics come from running sums over
+# blocks of the series (kernels._trailing_sums): O(bars) per window length
+# however long the window, and many windows share one pass over the candles.
+# Variance, skew, beta and correlation are of simple bar returns; beta and
+# correlation pair each bar with the benchmark's bar at the same open time.
+
+def _single(lines, output, ix):
+    """
+    Value or aligned series of a one-period sweep.
+    """
+    if isinstance(lines, dict):
+        lines = {name: values[0] for name, values in lines.items()}
+        if output == "series":
+            return ix.aligned(lines)
+        return {name: values[-1] for name, values in lines.items()}
+    if output == "series":
+        return ix.aligned(lines[0])
+    return lines[0, -1]
+
+def _linear_regression(ix, period, output="value"):
+    return _single(kernels.linear_regression_sweep(ix.close, [period]), output, ix)
+
+def linear_regression(symbol, period, interval, output="value", bars=None):
+    """
+    Least-squares line through the closes of a rolling window.
+    :param symbol: Stock symbol (e.g., "AAPL").
+    :param period: Rolling window size.
+    :param interval: Interval for the candle data (e.g., "1d").
+    :return: Dictionary with slope (per bar), intercept (at the window's
+             first bar) and r_squared.
+    """
+    ix = load(symbol, LOOKBACK["linear_regression"](period), interval, output, bars)
+    if ix is None:
+        return None
+    return _linear_regression(ix, period, output)
+
+def _rolling_variance(ix, period, output="value"):
+    return _single(kernels.rolling_moments(ix.returns(), [period])["variance"], output, ix)
+
+def rolling_variance(symbol, period, interval, output="value", bars=None):
+    """
+    Calculate the rolling sample variance of returns.
+    :param symbol: Stock symbol (e.g., "AAPL").
+    :param period: Number of returns in the window.
+    :param interval: Interval for the candle data (e.g., "1d").
+    :return: Variance value.
+    """
+    ix = load(symbol, LOOKBACK["rolling_variance"](period), interval, output, bars)
+    if ix is None:
+        return None
+    return _rolling_variance(ix, period, output)
+
+def _rolling_skew(ix, period, output="value"):
+    return _single(kernels.rolling_moments(ix.returns(), [period])["skew"], output, ix)
+
+def rolling_skew(symbol, period, interval, output="value", bars=None):
+    """
+    Calculate the rolling skew of returns (bias-corrected, like pandas).
+    :param symbol: Stock symbol (e.g., "AAPL").
+    :param period: Number of returns in the window.
+    :param interval: Interval for the candle data (e.g., "1d").
+    :return: Skew value.
+    """
+    ix = load(symbol, LOOKBACK["rolling_skew"](period), interval, output, bars)
+    if ix is None:
+        return None
+    return _rolling_skew(ix, period, output)
+
+def _beta(ix, benchmark, period, output="value"):
+    covariance = kernels.rolling_covariance(ix.benchmark_returns(benchmark), ix.returns(), [period])
+    return _single(covariance["beta"], output, ix)
+
+def beta(symbol, benchmark, period, interval, output="value", bars=None):
+    """
+    Calculate the rolling beta of a symbol's returns against a benchmark's.
+    :param symbol: Stock symbol (e.g., "AAPL").
+    :param benchmark: Benchmark symbol (e.g., "SPY").
+    :param period: Number of returns in the window.
+    :param interval: Interval for the candle data (e.g., "1d").
+    :return: Beta value, NaN when the benchmark misses a bar in the window.
+    """
+    ix = load(symbol, LOOKBACK["beta"](period), interval, output, bars)
+    if ix is None:
+        return None
+    return _beta(ix, benchmark, period, output)
+
+def _correlation(ix, benchmark, period, output="value"):
+    covariance = kernels.rolling_covariance(ix.benchmark_returns(benchmark), ix.returns(), [period])
+    return _single(covariance["correlation"], output, ix)
+
+def correlation(symbol, benchmark, period, interval, output="value", bars=None):
+    """
+    Calculate the rolling correlation of a symbol's returns with a benchmark's.
+    :param symbol: Stock symbol (e.g., "AAPL").
+    :param benchmark: Benchmark symbol (e.g., "SPY").
+    :param period: Number of returns in the window.
+    :param interval: Interval for the candle data (e.g., "1d").
+    :return: Correlation value, NaN when the benchmark misses a bar in the window.
+    """
+    ix = load(symbol, LOOKBACK["correlation"](period), interval, output, bars)
+    if ix is None:
+        return None
+    return _correlation(ix, benchmark, period, output)
+
+def _rolling_statistics(ix, periods, benchmark=None, output="value"):
+    lines = kernels.linear_regression_sweep(ix.close, periods)
+    moments = kernels.rolling_moments(ix.returns(), periods)
+    lines["variance"] = moments["variance"]
+    lines["skew"] = moments["skew"]
+    if benchmark is not None:
+        covariance = kernels.rolling_covariance(ix.benchmark_returns(benchmark), ix.returns(), periods)
+        lines["beta"] = covariance["beta"]
+        lines["correlation"] = covariance["correlation"]
+    return ix.swept(lines, periods, output)
+
+def rolling_statistics(symbol, periods, interval, benchmark=None, output="value", bars=None):
+    """
+    Regression (of closes), variance and skew (of returns) and, given a
+    benchmark, beta and correlation for every window in `periods` from one fetch.
+    :return: DataFrame indexed by period with one column per statistic; with
+             output="series" one column per (statistic, period).
+    """
+    periods = list(periods)
+    ix = load(symbol, LOOKBACK["rolling_statistics"](periods), interval, output, bars)
+    if ix is None:
         return None
-        
-    returns = pd.Series(prices).pct_change().dropna()
-    rolling_mean = returns.rolling(window=period).mean()
-    rolling_std = returns.rolling(window=period).std()
-    sharpe_ratio = rolling_mean.iloc[-1] / rolling_std.iloc[-1]
-    return sharpe_ratio
+    return _rolling_statistics(ix, periods, benchmark, output)
@@ -0,0 +1,613 @@
+import math
+from collections import deque
+
+from .Candle_fetcher import candle_list
+from . import momentum
+from . import moving_avg
+from . import statistics
+from . import trend
+from . import volatility
+from . import volume
+
+# Streaming indicators for live strategies. Each object warms up once from
+# candle_list and then folds in one closed candle at a time in O(1), instead
+# of recomputing the whole warm-up window on every bar, e.g.
+#   rsi = RSI(14).warm_up("AAPL", "1m")
+#   ...every minute: rsi.refresh(); rsi.value
+# The recurrences replicate the batch functions step by step, so after warming
+# up on the same candles `value` equals the batch result, and later values
+# equal the batch output="series" computed over all candles seen so far.
+
+# Recent candles fetched by refresh(); if the last seen bar is older than all
+# of them the indicator warms up again instead of skipping bars
+REFRESH_CANDLES = 16
+
+# Relative rounding below which a window's spread is taken as zero, like kernels._NOISE
+_NOISE = 4 * 2.0 ** -52
+
+
+def _alpha(span=None, alpha=None):
+    # Same round trip through the center of mass as pandas' ewm
+    com = (span - 1) / 2 if span is not None else (1 - alpha) / alpha
+    return 1.0 / (1.0 + com)
+
+
+def _div(a, b):
+    # IEEE semantics like the pandas versions: x/0 -> +-inf, 0/0 -> nan
+    try:
+        return a / b
+    except ZeroDivisionError:
+        if a != a or a == 0:
+            return math.nan
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+
+
+class _EWM:
+    """
+    Exponentially weighted mean with adjust=False, one observation at a time.
+    Leading NaNs are skipped like in pandas.
+    """
+
+    __slots__ = ("alpha", "value")
+
+    def __init__(self, span=None, alpha=None):
+        self.alpha = _alpha(span, alpha)
+        self.value = math.nan
+
+    def update(self, x):
+        if self.value != self.value:
+            self.value = x
+        elif x == x and self.value != x:
+            old_wt = 1.0 - self.alpha
+            self.value = (old_wt * self.value + self.alpha * x) / (old_wt + self.alpha)
+        return self.value
+
+
+class _RollingSum:
+    """
+    Sum of the last `window` observations.
+    """
+
+    __slots__ = ("window", "total", "_values", "_comp")
+
+    def __init__(self, window):
+        self.window = window
+        self.total = 0.0
+        self._values = deque()
+        self._comp = 0.0
+
+    @property
+    def full(self):
+        return len(self._values) == self.window
+
+    def _add(self, x):
+        # Kahan summation keeps the running sum from drifting
+        y = x - self._comp
+        t = self.total + y
+        self._comp = (t - self.total) - y
+        self.total = t
+
+    def update(self, x):
+        self._values.append(x)
+        self._add(x)
+        if len(self._values) > self.window:
+            self._add(-self._values.popleft())
+        return self.total
+
+
+class _WindowSums:
+    """
+    Sums over the last `window` observations of their deviations from a
+    reference (powers 1 to 3) and of those deviations weighted by position
+    in the window (0 = oldest). NaNs count as missing. The sums are rebuilt
+    around the window's mean every `window` updates so rounding cannot pile
+    up, which keeps updates O(1) amortized.
+    """
+
+    __slots__ = ("window", "ref", "s1", "s2", "s3", "sxy", "missing", "_values", "_since")
+
+    def __init__(self, window):
+        self.window = window
+        self._values = deque()
+        self._rebuild()
+
+    @property
+    def full(self):
+        return len(self._values) == self.window
+
+    def _rebuild(self):
+        finite = [v for v in self._values if v == v]
+        self.ref = sum(finite) / len(finite) if finite else 0.0
+        self.s1 = self.s2 = self.s3 = self.sxy = 0.0
+        self.missing = len(self._values) - len(finite)
+        for i, v in enumerate(self._values):
+            if v == v:
+                d = v - self.ref
+                self.s1 += d
+                self.s2 += d * d
+                self.s3 += d * d * d
+                self.sxy += i * d
+        self._since = 0
+
+    def update(self, x):
+        self._values.append(x)
+        if len(self._values) > self.window:
+            old = self._values.popleft()
+            if old == old:
+                d = old - self.ref
+                self.s1 -= d
+                self.s2 -= d * d
+                self.s3 -= d * d * d
+            else:
+                self.missing -= 1
+            # Everything left moves one place towards the oldest
+            self.sxy -= self.s1
+        if x == x:
+            d = x - self.ref
+            self.s1 += d
+            self.s2 += d * d
+            self.s3 += d * d * d
+            self.sxy += (len(self._values) - 1) * d
+        else:
+            self.missing += 1
+
+        self._since += 1
+        if self._since >= self.window:
+            self._rebuild()
+
+    def spread(self):
+        """
+        Sum of squared deviations from the window mean; 0 within rounding.
+        """
+        n = len(self._values)
+        spread = self.s2 - self.s1 * self.s1 / n
+        return 0.0 if spread <= _NOISE * n * self.s2 else spread
+
+
+class _PairedSums:
+    """
+    Sums over the last `window` (x, y) pairs for their covariance, rebuilt
+    like _WindowSums. A pair with a NaN counts as missing.
+    """
+
+    __slots__ = ("window", "x_ref", "y_ref", "sx", "sy", "sxx", "syy", "sxy", "missing", "_pairs", "_since")
+
+    def __init__(self, window):
+        self.window = window
+        self._pairs = deque()
+        self._rebuild()
+
+    @property
+    def full(self):
+        return len(self._pairs) == self.window
+
+    def _add(self, x, y, sign):
+        dx = x - self.x_ref
+        dy = y - self.y_ref
+        self.sx += sign * dx
+        self.sy += sign * dy
+        self.sxx += sign * dx * dx
+        self.syy += sign * dy * dy
+        self.sxy += sign * dx * dy
+
+    def _rebuild(self):
+        finite = [(x, y) for x, y in self._pairs if x == x and y == y]
+        self.x_ref = sum(x for x, _ in finite) / len(finite) if finite else 0.0
+        self.y_ref = sum(y for _, y in finite) / len(finite) if finite else 0.0
+        self.sx = self.sy = self.sxx = self.syy = self.sxy = 0.0
+        self.missing = len(self._pairs) - len(finite)
+        for x, y in finite:
+            self._add(x, y, 1)
+        self._since = 0
+
+    def update(self, x, y):
+        self._pairs.append((x, y))
+        if len(self._pairs) > self.window:
+            old_x, old_y = self._pairs.popleft()
+            if old_x == old_x and old_y == old_y:
+                self._add(old_x, old_y, -1)
+            else:
+                self.missing -= 1
+        if x == x and y == y:
+            self._add(x, y, 1)
+        else:
+            self.missing += 1
+
+        self._since += 1
+        if self._since >= self.window:
+            self._rebuild()
+
+
+class _Stream:
+    def __init__(self):
+        self.value = None
+        self.symbol = None
+        self.interval = None
+        self.last_timestamp = None
+
+    def _lookback(self):
+        raise NotImplementedError
+
+    def _reset(self):
+        raise NotImplementedError
+
+    def _step(self, candle):
+        raise NotImplementedError
+
+    def update(self, candle):
+        """
+        Fold in one closed candle (a candle_list dict); candles not newer than
+        the last one seen are ignored. Returns the current value.
+        """
+        timestamp = candle.get("timestamp")
+        if timestamp is not None:
+            if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+                return self.value
+            self.last_timestamp = timestamp
+        self.value = self._step(candle)
+        return self.value
+
+    def warm_up(self, symbol, interval, no_of_candles=None):
+        """
+        Reset and replay the same candle window the batch function uses.
+        """
+        self._reset()
+        self.value = None
+        self.last_timestamp = None
+        self.symbol = symbol
+        self.interval = interval
+
+        candles = candle_list(symbol, no_of_candles or self._lookback(), interval)
+        for candle in candles or ():
+            self.update(candle)
+        return self
+
+    def refresh(self):
+        """
+        Fold in the candles closed since the last update.
+        """
+        if self.symbol is None:
+            raise ValueError("Call warm_up(symbol, interval) before refresh()")
+
+        candles = candle_list(self.symbol, REFRESH_CANDLES, self.interval)
+        if not candles:
+            return self.value
+        if self.last_timestamp is None or candles[0]["timestamp"] > self.last_timestamp:
+            return self.warm_up(self.symbol, self.interval).value
+
+        for candle in candles:
+            self.update(candle)
+        return self.value
+
+
+def _finite_or_none(x):
+    return None if x != x else x
+
+
+class EMA(_Stream):
+    def __init__(self, period):
+        super().__init__()
+        self.period = period
+        self._reset()
+
+    def _lookback(self):
+        return moving_avg.LOOKBACK["ema"](self.period)
+
+    def _reset(self):
+        self._ema = _EWM(span=self.period)
+
+    def _step(self, candle):
+        return _finite_or_none(self._ema.update(candle["close"]))
+
+
+class RSI(_Stream):
+    def __init__(self, period):
+        super().__init__()
+        self.period = period
+        self._reset()
+
+    def _lookback(self):
+        return momentum.LOOKBACK["rsi"](self.period)
+
+    def _reset(self):
+        self._prev_close = None
+        self._avg_gain = _EWM(alpha=1 / self.period)
+        self._avg_loss = _EWM(alpha=1 / self.period)
+
+    def _step(self, candle):
+        close = candle["close"]
+        prev_close, self._prev_close = self._prev_close, close
+        if prev_close is None:
+            return None
+
+        delta = close - prev_close
+        avg_gain = self._avg_gain.update(max(delta, 0.0))
+        avg_loss = self._avg_loss.update(-min(delta, 0.0))
+        rs = _div(avg_gain, avg_loss)
+        return _finite_or_none(100 - (100 / (1 + rs)))
+
+
+class MACD(_Stream):
+    def __init__(self, short_period=12, long_period=26, signal_period=9):
+        super().__init__()
+        self.short_period = short_period
+        self.long_period = long_period
+        self.signal_period = signal_period
+        self._reset()
+
+    def _lookback(self):
+        return moving_avg.LOOKBACK["macd"](self.short_period, self.long_period, self.signal_period)
+
+    def _reset(self):
+        self._short = _EWM(span=self.short_period)
+        self._long = _EWM(span=self.long_period)
+        self._signal = _EWM(span=self.signal_period)
+
+    def _step(self, candle):
+        close = candle["close"]
+        macd_line = self._short.update(close) - self._long.update(close)
+        signal_line = self._signal.update(macd_line)
+        return {
+            "macd": macd_line,
+            "signal": signal_line,
+            "histogram": macd_line - signal_line
+        }
+
+
+def _true_range(high, low, prev_close):
+    if prev_close is None:
+        return high - low
+    return max(high - low, abs(high - prev_close), abs(low - prev_close))
+
+
+class ATR(_Stream):
+    """
+    Simple average of the true range, like volatility.atr.
+    """
+
+    def __init__(self, period):
+        super().__init__()
+        self.period = period
+        self._reset()
+
+    def _lookback(self):
+        return volatility.LOOKBACK["atr"](self.period)
+
+    def _reset(self):
+        self._prev_close = None
+        self._tr_sum = _RollingSum(self.period)
+
+    def _step(self, candle):
+        tr = _true_range(candle["high"], candle["low"], self._prev_close)
+        self._prev_close = candle["close"]
+        total = self._tr_sum.update(tr)
+        return total / self.period if self._tr_sum.full else None
+
+
+class ADX(_Stream):
+    def __init__(self, period):
+        super().__init__()
+        self.period = period
+        self._reset()
+
+    def _lookback(self):
+        return trend.LOOKBACK["adx"](self.period)
+
+    def _reset(self):
+        self._prev = None
+        self._atr = _EWM(alpha=1 / self.period)
+        self._plus_dm = _EWM(alpha=1 / self.period)
+        self._minus_dm = _EWM(alpha=1 / self.period)
+        self._adx = _EWM(alpha=1 / self.period)
+
+    def _step(self, candle):
+        high, low = candle["high"], candle["low"]
+        plus_dm = minus_dm = 0.0
+        if self._prev is None:
+            tr = high - low
+        else:
+            prev_high, prev_low, prev_close = self._prev
+            tr = _true_range(high, low, prev_close)
+            up_move = high - prev_high
+            down_move = prev_low - low
+            if up_move > down_move and up_move > 0:
+                plus_dm = up_move
+            if down_move > up_move and down_move > 0:
+                minus_dm = down_move
+        self._prev = (high, low, candle["close"])
+
+        atr = self._atr.update(tr)
+        plus_di = _div(100 * self._plus_dm.update(plus_dm), atr)
+        minus_di = _div(100 * self._minus_dm.update(minus_dm), atr)
+
+        di_sum = plus_di + minus_di
+        dx = _div(100 * abs(plus_di - minus_di), di_sum) if di_sum != 0 else math.nan
+        if dx != dx:
+            dx = 0.0
+        return self._adx.update(dx)
+
+
+class OBV(_Stream):
+    """
+    On-Balance Volume over the last `period` candles, like volume.obv.
+    """
+
+    def __init__(self, period):
+        super().__init__()
+        self.period = period
+        self._reset()
+
+    def _lookback(self):
+        return volume.LOOKBACK["obv"](self.period)
+
+    def _reset(self):
+        self._prev_close = None
+        # The oldest candle of the window has no prior close and adds nothing
+        self._signed = deque(maxlen=max(self.period - 1, 0))
+        self._sum = 0
+
+    def _step(self, candle):
+        close = candle["close"]
+        prev_close, self._prev_close = self._prev_close, close
+        direction = 0
+        if prev_close is not None:
+            direction = 1 if close > prev_close else -1 if close < prev_close else 0
+
+        if self._signed.maxlen:
+            if len(self._signed) == self._signed.maxlen:
+                self._sum -= self._signed[0]
+            signed = direction * candle["volume"]
+            self._signed.append(signed)
+            self._sum += signed
+        return self._sum
+
+
+class ADLine(_Stream):
+    """
+    Accumulation/Distribution over the last `period` candles, like volume.ad_line.
+    """
+
+    def __init__(self, period):
+        super().__init__()
+        self.period = period
+        self._reset()
+
+    def _lookback(self):
+        return volume.LOOKBACK["ad_line"](self.period)
+
+    def _reset(self):
+        # Cumulative like the batch version until `period` candles are seen
+        self._mfv_sum = _RollingSum(self.period)
+
+    def _step(self, candle):
+        high, low, close = candle["high"], candle["low"], candle["close"]
+        mfm = _div((close - low) - (high - close), high - low)
+        if mfm != mfm:
+            mfm = 0.0
+        return self._mfv_sum.update(mfm * candle["volume"])
+
+
+def _return(close, prev_close):
+    return math.nan if prev_close is None else _div(close, prev_close) - 1
+
+
+class RollingStats(_Stream):
+    """
+    Regression of the closes and moments of the returns over every window in
+    `periods`, like statistics.rolling_statistics without a benchmark. The
+    value maps each period to its statistics, None until its window fills.
+    """
+
+    def __init__(self, periods):
+        super().__init__()
+        self.periods = list(periods)
+        self._reset()
+
+    def _lookback(self):
+        return statistics.LOOKBACK["rolling_statistics"](self.periods)
+
+    def _reset(self):
+        self._prev_close = None
+        self._closes = [_WindowSums(p) for p in self.periods]
+        self._returns = [_WindowSums(p) for p in self.periods]
+
+    def _step(self, candle):
+        close = candle["close"]
+        r = _return(close, self._prev_close)
+        self._prev_close = close
+
+        value = {}
+        for period, closes, returns in zip(self.periods, self._closes, self._returns):
+            closes.update(close)
+            returns.update(r)
+            stats = None
+            if closes.full and not closes.missing and period >= 2:
+                stats = _regression(closes, period)
+                if returns.full and not returns.missing:
+                    stats.update(_moments(returns, period))
+                else:
+                    stats.update(variance=None, skew=None)
+            value[period] = stats
+        return value
+
+
+def _regression(sums, period):
+    # Positions 0..period-1 have an exact mean and spread
+    mean_x = (period - 1) / 2
+    var_x = period * (period * period - 1) / 12
+    cov = sums.sxy - mean_x * sums.s1
+    slope = cov / var_x
+    var_y = sums.spread()
+    return {
+        "slope": slope,
+        "intercept": sums.ref + sums.s1 / period - slope * mean_x,
+        "r_squared": cov * cov / (var_x * var_y) if var_y else None,
+    }
+
+
+def _moments(sums, period):
+    spread = sums.spread()
+    skew = None
+    if period >= 3:
+        mean = sums.s1 / period
+        m2 = spread / period
+        m3 = sums.s3 / period - 3 * mean * sums.s2 / period + 2 * mean ** 3
+        skew = math.sqrt(period * (period - 1)) / (period - 2) * m3 / m2 ** 1.5 if m2 else 0.0
+    return {"variance": spread / (period - 1), "skew": skew}
+
+
+class RollingBeta(_Stream):
+    """
+    Beta and correlation of the symbol's returns against `benchmark`'s over
+    `period` returns, like statistics.beta/correlation. Candles are paired
+    with the benchmark's by open time; a missing benchmark bar leaves the
+    value None until it drops out of the window.
+    """
+
+    def __init__(self, benchmark, period):
+        super().__init__()
+        self.benchmark = benchmark
+        self.period = period
+        self._benchmark_closes = {}
+        self._reset()
+
+    def _lookback(self):
+        return statistics.LOOKBACK["beta"](self.period)
+
+    def _reset(self):
+        self._prev = None
+        self._sums = _PairedSums(self.period)
+
+    def _load_benchmark(self, interval, no_of_candles):
+        candles = candle_list(self.benchmark, no_of_candles, interval)
+        self._benchmark_closes = {c["timestamp"]: c["close"] for c in candles or ()}
+
+    def warm_up(self, symbol, interval, no_of_candles=None):
+        self._load_benchmark(interval, no_of_candles or self._lookback())
+        return super().warm_up(symbol, interval, no_of_candles)
+
+    def refresh(self):
+        if self.symbol is not None:
+            self._load_benchmark(self.interval, REFRESH_CANDLES)
+        return super().refresh()
+
+    def _step(self, candle):
+        close = candle["close"]
+        benchmark_close = self._benchmark_closes.get(candle.get("timestamp"), math.nan)
+        prev_close, prev_benchmark = self._prev or (None, None)
+        self._prev = (close, benchmark_close)
+        # NaN - 1 stays NaN when the previous benchmark bar was missing
+        self._sums.update(_return(benchmark_close, prev_benchmark), _return(close, prev_close))
+
+        sums = self._sums
+        if not sums.full or sums.missing or self.period < 2:
+            return None
+        n = self.period
+        var_x = sums.sxx - sums.sx * sums.sx / n
+        var_y = sums.syy - sums.sy * sums.sy / n
+        cov = sums.sxy - sums.sx * sums.sy / n
+        return {
+            "beta": _finite_or_none(_div(cov, var_x)),
+            "correlation": _finite_or_none(_div(cov, math.sqrt(max(var_x * var_y, 0.0)))),
+            "covariance": cov / (n - 1),
+        }
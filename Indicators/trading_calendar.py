@@ -0,0 +1,94 @@
+import os
+import math
+from datetime import datetime, timedelta, timezone
+
+from .resample import DEFAULT_SESSION, HOLIDAYS, session_for
+
+# Trading-calendar-aware fetch windows. Instead of stretching the requested
+# span by a flat factor to cover nights, weekends and holidays, the start is
+# found by walking back over the sessions of trading days and counting the
+# bars each one holds, so a fetch starts at the first bar needed. Each symbol
+# uses its exchange's session (resample.session_for); the default session
+# (SIM_SESSION_*, without weekdays listed in SIM_HOLIDAYS) stands in for
+# symbols without a known one. Markets trading longer hours fill the same bar
+# count in less time and are covered too. Half days and unlisted holidays come
+# up short; the fetcher then widens once, or SIM_CALENDAR_MARGIN extra
+# sessions can be fetched up front.
+
+MARGIN_SESSIONS = int(os.getenv("SIM_CALENDAR_MARGIN", "0"))
+
+_ONE_DAY = timedelta(days=1)
+
+
+def is_trading_day(day, session=DEFAULT_SESSION):
+    return session.is_trading_day(day)
+
+
+def _previous_trading_day(day, session):
+    day -= _ONE_DAY
+    while not session.is_trading_day(day):
+        day -= _ONE_DAY
+    return day
+
+
+def _local_time(day, minutes, session):
+    local = datetime(day.year, day.month, day.day, tzinfo=session.zone) + timedelta(minutes=minutes)
+    return local.astimezone(timezone.utc)
+
+
+def _intraday_start(no_of_candles, delta, now, session):
+    """
+    Open time of the first of the last `no_of_candles` closed intraday bars,
+    bars being anchored at the session open.
+    """
+    needed = no_of_candles
+    day = now.astimezone(session.zone).date()
+    while True:
+        if session.is_trading_day(day):
+            session_open = _local_time(day, session.open, session)
+            session_close = _local_time(day, session.close, session)
+            if now >= session_close:
+                # Includes a partial last bar
+                bars = math.ceil((session_close - session_open) / delta)
+            else:
+                bars = max(0, math.floor((now - session_open) / delta))
+
+            if bars >= needed:
+                if not MARGIN_SESSIONS:
+                    return session_open + delta * (bars - needed)
+                for _ in range(MARGIN_SESSIONS):
+                    day = _previous_trading_day(day, session)
+                return _local_time(day, session.open, session)
+            needed -= bars
+        day -= _ONE_DAY
+
+
+def _daily_start(no_of_candles, now, session):
+    """
+    Local midnight of the first of the last `no_of_candles` closed daily bars.
+    """
+    # Today's bar is still forming
+    day = now.astimezone(session.zone).date()
+    for _ in range(no_of_candles + MARGIN_SESSIONS):
+        day = _previous_trading_day(day, session)
+    return _local_time(day, 0, session)
+
+
+def start_date(no_of_candles, delta, now, symbol=None):
+    """
+    Earliest time a fetch ending at `now` must start from to cover the last
+    `no_of_candles` closed bars of length `delta`, on the session of `symbol`.
+    """
+    if no_of_candles <= 0:
+        return now
+    session = (session_for(symbol) if symbol else None) or DEFAULT_SESSION
+    if delta < _ONE_DAY:
+        return _intraday_start(no_of_candles, delta, now, session)
+    if delta == _ONE_DAY:
+        return _daily_start(no_of_candles, now, session)
+
+    # Weekly and longer bars exist whatever the holidays; months run to 31 days
+    span = delta * (no_of_candles + 1 + MARGIN_SESSIONS)
+    if delta >= timedelta(days=28):
+        span = span * 31 / 30
+    return now - span
@@ -1,10 +1,26 @@
-from .Candle_fetcher import candle_list
-import pandas as pd
+from .intermediates import load
+from . import kernels
+from . import warmup
 
 # Trend indicators identify the direction and strength of a market trend.
 # Examples include ADX, DMI, Parabolic SAR, Supertrend, etc.
 
-def adx(symbol, period, interval):
+# Candles each indicator fetches, as a function of its parameters (see warmup.py)
+LOOKBACK = {
+    # Directional movement, Wilder-smoothed DI, then Wilder-smoothed DX
+    "adx": lambda period, tolerance=None, **_: warmup.chain(
+        2, warmup.wilder(period, tolerance), warmup.wilder(period, tolerance)),
+    # ATR needs period + 1; the bands only ratchet, so give them another period to settle
+    "supertrend": lambda period, **_: period * 2,
+}
+
+def _adx(ix, period, output="value"):
+    adx_series = kernels.adx(ix.high, ix.low, ix.close, period, tr=ix.true_range())
+    if output == "series":
+        return ix.aligned(adx_series)
+    return adx_series[-1]
+
+def adx(symbol, period, interval, output="value", bars=None):
     """
     Calculate the Average Directional Index (ADX).
     :param symbol: Stock symbol (e.g., "AAPL").
@@ -12,38 +28,18 @@ def adx(symbol, period, interval):
     :param interval: Interval for the candle data (e.g., "1d").
     :return: ADX value.
     """
-    candles = candle_list(symbol, period * 2, interval, field="all")
-    if not candles:
+    ix = load(symbol, LOOKBACK["adx"](period), interval, output, bars)
+    if ix is None:
         return None
-        
-    high_ser = pd.Series([c["high"] for c in candles])
-    low_ser = pd.Series([c["low"] for c in candles])
-    close_ser = pd.Series([c["close"] for c in candles])
-    
-    tr1 = high_ser - low_ser
-    tr2 = (high_ser - close_ser.shift(1)).abs()
-    tr3 = (low_ser - close_ser.shift(1)).abs()
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    
-    up_move = high_ser - high_ser.shift(1)
-    down_move = low_ser.shift(1) - low_ser
-    
-    plus_dm = pd.Series(0.0, index=high_ser.index)
-    plus_dm[(up_move > down_move) & (up_move > 0)] = up_move
-    
-    minus_dm = pd.Series(0.0, index=high_ser.index)
-    minus_dm[(down_move > up_move) & (down_move > 0)] = down_move
-    
-    atr = tr.ewm(alpha=1/period, adjust=False).mean()
-    plus_di = 100 * plus_dm.ewm(alpha=1/period, adjust=False).mean() / atr
-    minus_di = 100 * minus_dm.ewm(alpha=1/period, adjust=False).mean() / atr
-    
-    dx = 100 * (plus_di - minus_di).abs() / (plus_di + minus_di).replace(0, np.nan)
-    dx = dx.fillna(0)
-    adx_value = dx.ewm(alpha=1/period, adjust=False).mean().iloc[-1]
-    return adx_value
+    return _adx(ix, period, output)
+
+def _supertrend(ix, period, multiplier=3, output="value"):
+    supertrend_vals = kernels.supertrend(ix.high, ix.low, ix.close, period, multiplier, atr=ix.atr(period))
+    if output == "series":
+        return ix.aligned(supertrend_vals)
+    return supertrend_vals[-1]
 
-def supertrend(symbol, period, interval, multiplier=3):
+def supertrend(symbol, period, interval, multiplier=3, output="value", bars=None):
     """
     Calculate the Supertrend indicator.
     :param symbol: Stock symbol (e.g., "AAPL").
@@ -52,53 +48,7 @@ def supertrend(symbol, period, interval, multiplier=3):
     :param multiplier: Multiplier for the ATR (default: 3).
     :return: Supertrend value.
     """
-    candles = candle_list(symbol, period * 2, interval, field="all")
-    if not candles:
+    ix = load(symbol, LOOKBACK["supertrend"](period), interval, output, bars)
+    if ix is None:
         return None
-        
-    high_ser = pd.Series([c["high"] for c in candles])
-    low_ser = pd.Series([c["low"] for c in candles])
-    close_ser = pd.Series([c["close"] for c in candles])
-    
-    tr1 = high_ser - low_ser
-    tr2 = (high_ser - close_ser.shift(1)).abs()
-    tr3 = (low_ser - close_ser.shift(1)).abs()
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    atr = tr.rolling(window=period).mean()
-    
-    hl2 = (high_ser + low_ser) / 2
-    basic_upperband = hl2 + multiplier * atr
-    basic_lowerband = hl2 - multiplier * atr
-    
-    final_upperband = pd.Series(0.0, index=high_ser.index)
-    final_lowerband = pd.Series(0.0, index=high_ser.index)
-    supertrend_vals = pd.Series(0.0, index=high_ser.index)
-    
-    for i in range(1, len(high_ser)):
-        if pd.isna(atr[i]): continue
-        
-        # Final Upper Band
-        if basic_upperband[i] < final_upperband[i-1] or close_ser[i-1] > final_upperband[i-1]:
-            final_upperband[i] = basic_upperband[i]
-        else:
-            final_upperband[i] = final_upperband[i-1]
-            
-        # Final Lower Band
-        if basic_lowerband[i] > final_lowerband[i-1] or close_ser[i-1] < final_lowerband[i-1]:
-            final_lowerband[i] = basic_lowerband[i]
-        else:
-            final_lowerband[i] = final_lowerband[i-1]
-            
-        # Supertrend
-        if supertrend_vals[i-1] == final_upperband[i-1] and close_ser[i] <= final_upperband[i]:
-            supertrend_vals[i] = final_upperband[i]
-        elif supertrend_vals[i-1] == final_upperband[i-1] and close_ser[i] > final_upperband[i]:
-            supertrend_vals[i] = final_lowerband[i]
-        elif supertrend_vals[i-1] == final_lowerband[i-1] and close_ser[i] >= final_lowerband[i]:
-            supertrend_vals[i] = final_lowerband[i]
-        elif supertrend_vals[i-1] == final_lowerband[i-1] and close_ser[i] < final_lowerband[i]:
-            supertrend_vals[i] = final_upperband[i]
-        else:
-            supertrend_vals[i] = final_upperband[i]
-            
-    return supertrend_vals.iloc[-1]
+    return _supertrend(ix, period, multiplier, output)
@@ -0,0 +1,500 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from .Candle_fetcher import INTERVAL_TO_DELTA, candle_frame
+from .frame import FIELDS
+from . import candle_store
+from . import trading_calendar
+from . import warmup
+
+# Cross-sectional indicators for screeners: one (symbols x bars) matrix per
+# candle field, aligned on a shared timeline and NaN-padded where a symbol has
+# no bar, with kernels that evaluate every symbol at once, e.g.
+#   u = indicators.universe.load(symbols, 100, "5m")
+#   rsi = u.last(indicators.universe.rsi(u.close, 14))
+# Along each row the kernels follow the pandas semantics of the single-symbol
+# indicators on the NaN-padded series: EMAs carry over missing bars, rolling
+# windows containing a missing bar are NaN.
+
+# Own fetch pool: load() may itself be running on aio's pool (e.g. through
+# aio.run), and waiting there on tasks queued behind it could deadlock
+LOAD_WORKERS = int(os.getenv("SIM_UNIVERSE_WORKERS", os.getenv("SIM_DATA_WORKERS", "8")))
+
+_executor = ThreadPoolExecutor(max_workers=LOAD_WORKERS, thread_name_prefix="paperquant-universe")
+
+
+class Universe:
+    __slots__ = ("symbols", "timestamp", "open", "high", "low", "close", "volume")
+
+    def __init__(self, symbols, timestamp, open, high, low, close, volume):
+        self.symbols = list(symbols)
+        self.timestamp = timestamp
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+
+    def __repr__(self):
+        return f"Universe({len(self.symbols)} symbols x {len(self.timestamp)} bars)"
+
+    def row(self, symbol):
+        return self.symbols.index(symbol)
+
+    def last(self, values):
+        """
+        Latest value of a (symbols x bars) result per symbol; None where NaN.
+        """
+        if not values.shape[1]:
+            return {symbol: None for symbol in self.symbols}
+        return {
+            symbol: None if np.isnan(value) else float(value)
+            for symbol, value in zip(self.symbols, values[:, -1])
+        }
+
+
+def load(symbols, no_of_candles, interval):
+    """
+    Fetch `no_of_candles` bars for every symbol (in parallel, through the
+    usual memory -> store -> network tiers) and align them on the union of
+    their bar times. Missing bars are NaN, including volume.
+    """
+    symbols = list(symbols)
+    frames = list(_executor.map(lambda symbol: candle_frame(symbol, no_of_candles, interval), symbols))
+    return _align(symbols, frames, no_of_candles)
+
+
+def load_stored(symbols, no_of_candles, interval, db_path=None):
+    """
+    Like load(), from bars already in the local candle store only: no
+    network, so a large universe starts up quickly. Symbols without stored
+    bars come out all NaN.
+    """
+    symbols = list(symbols)
+    now = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+    delta = INTERVAL_TO_DELTA[interval]
+    frames = [
+        candle_store.read_frame(
+            symbol, interval, trading_calendar.start_date(no_of_candles, delta, now, symbol), now, db_path=db_path
+        ).tail(no_of_candles)
+        for symbol in symbols
+    ]
+    return _align(symbols, frames, no_of_candles)
+
+
+def _align(symbols, frames, no_of_candles):
+    stamps = [f.timestamp for f in frames if f is not None and len(f)]
+    if stamps:
+        timestamp = np.unique(np.concatenate(stamps))[-no_of_candles:]
+    else:
+        timestamp = np.empty(0, dtype=np.int64)
+
+    columns = {field: np.full((len(symbols), len(timestamp)), np.nan) for field in FIELDS}
+    for row, f in enumerate(frames):
+        if f is None or not len(f) or not len(timestamp):
+            continue
+        keep = f.timestamp >= timestamp[0]
+        positions = np.searchsorted(timestamp, f.timestamp[keep])
+        for field in FIELDS:
+            columns[field][row, positions] = f.column(field)[keep]
+
+    return Universe(symbols, timestamp, **columns)
+
+
+# ---------------------------------------------------------------------------
+# Kernels: (symbols x bars) float arrays in, same-shape arrays out
+# ---------------------------------------------------------------------------
+
+def _alpha(span=None, alpha=None):
+    # Same round trip through the center of mass as pandas' ewm
+    com = (span - 1) / 2 if span is not None else (1 - alpha) / alpha
+    return 1.0 / (1.0 + com)
+
+
+def _ewm(values, alpha):
+    """
+    Row-wise ewm(adjust=False).mean(), stepping through bars with every
+    symbol updated at once. Missing bars decay the weight of the running
+    mean exactly like pandas (ignore_na=False).
+    """
+    out = np.empty_like(values)
+    if not values.shape[1]:
+        return out
+    weighted = values[:, 0].copy()
+    old_wt = np.ones(len(values))
+    out[:, 0] = weighted
+    decay = 1.0 - alpha
+
+    for t in range(1, values.shape[1]):
+        cur = values[:, t]
+        observed = ~np.isnan(cur)
+        started = ~np.isnan(weighted)
+
+        old_wt = np.where(started, old_wt * decay, old_wt)
+        update = started & observed & (weighted != cur)
+        blended = (old_wt * weighted + alpha * cur) / (old_wt + alpha)
+        weighted = np.where(update, blended, weighted)
+        weighted = np.where(~started & observed, cur, weighted)
+        old_wt = np.where(started & observed, 1.0, old_wt)
+        out[:, t] = weighted
+    return out
+
+
+def _windows(values, window):
+    return np.lib.stride_tricks.sliding_window_view(values, window, axis=1)
+
+
+def _pad(values, rolled, window):
+    out = np.full(values.shape, np.nan)
+    if values.shape[1] >= window:
+        out[:, window - 1:] = rolled
+    return out
+
+
+def _rolling_mean(values, window):
+    if values.shape[1] < window:
+        return np.full(values.shape, np.nan)
+    return _pad(values, _windows(values, window).mean(axis=-1), window)
+
+
+def _rolling_std(values, window):
+    if values.shape[1] < window:
+        return np.full(values.shape, np.nan)
+    return _pad(values, _windows(values, window).std(axis=-1, ddof=1), window)
+
+
+def _shift(values, periods=1):
+    out = np.full(values.shape, np.nan)
+    if periods < values.shape[1]:
+        out[:, periods:] = values[:, :values.shape[1] - periods]
+    return out
+
+
+def sma(close, period):
+    return _rolling_mean(close, period)
+
+
+def ema(close, period):
+    return _ewm(close, _alpha(span=period))
+
+
+def rsi(close, period):
+    delta = close - _shift(close)
+    with np.errstate(invalid="ignore"):
+        gain = np.where(delta > 0, delta, np.where(np.isnan(delta), np.nan, 0.0))
+        loss = np.where(delta < 0, -delta, np.where(np.isnan(delta), np.nan, 0.0))
+    avg_gain = _ewm(gain, _alpha(alpha=1 / period))
+    avg_loss = _ewm(loss, _alpha(alpha=1 / period))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rs = avg_gain / avg_loss
+        return 100 - (100 / (1 + rs))
+
+
+def true_range(high, low, close):
+    prev_close = _shift(close)
+    # NaN-skipping max like pandas' max(axis=1)
+    return np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+
+def atr(high, low, close, period):
+    return _rolling_mean(true_range(high, low, close), period)
+
+
+def roc(close, roc_period=12):
+    prev = _shift(close, roc_period)
+    return ((close - prev) / prev) * 100
+
+
+def z_score(close, period):
+    mean = _rolling_mean(close, period)
+    std = _rolling_std(close, period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = (close - mean) / std
+    return np.where(std == 0, 0.0, z)
+
+
+def bollinger_bands(close, period, multiplier=2):
+    middle = _rolling_mean(close, period)
+    std = _rolling_std(close, period)
+    return {
+        "upper": middle + multiplier * std,
+        "middle": middle,
+        "lower": middle - multiplier * std,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Incremental covariance of returns across the universe
+# ---------------------------------------------------------------------------
+
+# Pair and portfolio strategies need the covariance of every pair of symbols
+# on every bar. The trackers below fold each new bar of closes into their
+# state with rank-1 (outer product) updates, O(symbols^2) per bar instead of
+# O(symbols^2 x bars) for a recomputation, e.g.
+#   cov = indicators.universe.RollingCovariance(symbols, 120).warm_up("1m")
+#   ...every minute: cov.refresh(); cov.correlation()
+# Returns are simple bar returns; a symbol without a bar has no return for it
+# nor for the next bar.
+
+# Recent bars fetched by refresh(); if the last seen bar is older than all of
+# them the tracker warms up again instead of skipping bars
+REFRESH_CANDLES = 16
+
+
+class _Covariance:
+    def __init__(self, symbols):
+        self.symbols = list(symbols)
+        self.interval = None
+        self.timestamp = None
+        self._reset()
+
+    def _lookback(self):
+        raise NotImplementedError
+
+    def _reset_state(self):
+        raise NotImplementedError
+
+    def _fold(self, returns):
+        raise NotImplementedError
+
+    def _reset(self):
+        self.timestamp = None
+        self._prev_close = np.full(len(self.symbols), np.nan)
+        self._reset_state()
+
+    def _vector(self, closes):
+        if isinstance(closes, dict):
+            return np.array([closes.get(symbol, np.nan) for symbol in self.symbols], dtype="float64")
+        return np.asarray(closes, dtype="float64")
+
+    def update(self, closes, timestamp=None):
+        """
+        Fold in one closed bar: closes in symbol order (NaN where a symbol has
+        no bar) or a symbol -> close dict. Bars not newer than the last one
+        seen are ignored.
+        """
+        if timestamp is not None:
+            if self.timestamp is not None and timestamp <= self.timestamp:
+                return self
+            self.timestamp = timestamp
+        closes = self._vector(closes)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            returns = closes / self._prev_close - 1
+        self._prev_close = closes
+        self._fold(returns)
+        return self
+
+    def _replay(self, u):
+        for t in range(len(u.timestamp)):
+            self.update(u.close[:, t], int(u.timestamp[t]))
+
+    def warm_up(self, interval, no_of_candles=None, stored_only=False, db_path=None):
+        """
+        Reset and replay the last `no_of_candles` bars (default: enough to
+        fill the window). stored_only=True reads the local candle store only.
+        """
+        self._reset()
+        self.interval = interval
+        no_of_candles = no_of_candles or self._lookback()
+        if stored_only:
+            u = load_stored(self.symbols, no_of_candles, interval, db_path)
+        else:
+            u = load(self.symbols, no_of_candles, interval)
+        self._replay(u)
+        return self
+
+    def refresh(self):
+        """
+        Fold in the bars closed since the last update.
+        """
+        if self.interval is None:
+            raise ValueError("Call warm_up(interval) before refresh()")
+
+        u = load(self.symbols, REFRESH_CANDLES, self.interval)
+        if not len(u.timestamp):
+            return self
+        if self.timestamp is None or u.timestamp[0] > self.timestamp:
+            return self.warm_up(self.interval)
+        self._replay(u)
+        return self
+
+    def _matrix(self):
+        raise NotImplementedError
+
+    def covariance(self):
+        """
+        Snapshot of the covariance matrix as a DataFrame labelled by symbol.
+        """
+        return pd.DataFrame(self._matrix(), index=self.symbols, columns=self.symbols)
+
+    def correlation(self):
+        """
+        Snapshot of the correlation matrix; NaN for symbols without variance.
+        """
+        cov = self._matrix()
+        std = np.sqrt(np.clip(np.diag(cov), 0.0, None))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.outer(std, std)
+        corr[np.isinf(corr)] = np.nan
+        return pd.DataFrame(corr, index=self.symbols, columns=self.symbols)
+
+
+class RollingCovariance(_Covariance):
+    """
+    Sample covariance over the last `window` returns, like pandas'
+    rolling(window).cov(). A symbol missing a return in the window has a NaN
+    row and column until that return drops out. The running sums are rebuilt
+    from the window every `window` bars so rounding cannot pile up.
+    """
+
+    def __init__(self, symbols, window):
+        self.window = window
+        super().__init__(symbols)
+
+    def _lookback(self):
+        return self.window + 1
+
+    def _reset_state(self):
+        n = len(self.symbols)
+        self._ring = np.zeros((self.window, n))
+        self._ring_missing = np.ones((self.window, n), dtype=bool)
+        self._pos = 0
+        self.count = 0
+        self._since = 0
+        self._sum = np.zeros(n)
+        self._cross = np.zeros((n, n))
+        self._missing = np.zeros(n, dtype=np.int64)
+
+    def _rebuild(self):
+        held = self._ring if self.count == self.window else self._ring[:self._pos]
+        self._sum = held.sum(axis=0)
+        self._cross = held.T @ held
+        self._since = 0
+
+    def _fold(self, returns):
+        missing = np.isnan(returns)
+        new = np.where(missing, 0.0, returns)
+        old = self._ring[self._pos]
+        if self.count == self.window:
+            # One rank-2 update adds the new return and drops the oldest
+            both = np.stack([new, old], axis=1)
+            self._cross += (both * (1.0, -1.0)) @ both.T
+            self._sum += new - old
+            self._missing += missing.astype(np.int64) - self._ring_missing[self._pos]
+        else:
+            self._cross += np.outer(new, new)
+            self._sum += new
+            self._missing += missing
+            self.count += 1
+        self._ring[self._pos] = new
+        self._ring_missing[self._pos] = missing
+        self._pos = (self._pos + 1) % self.window
+
+        self._since += 1
+        if self._since >= self.window:
+            self._rebuild()
+
+    def _matrix(self):
+        n = self.count
+        if n < 2:
+            return np.full(self._cross.shape, np.nan)
+        cov = (self._cross - np.outer(self._sum, self._sum) / n) / (n - 1)
+        holed = self._missing > 0
+        cov[holed, :] = np.nan
+        cov[:, holed] = np.nan
+        return cov
+
+
+class EWCovariance(_Covariance):
+    """
+    Exponentially weighted covariance with decay set by `span` or `alpha`,
+    the same recurrence as pandas' ewm(adjust=False).cov(bias=True): each
+    pair keeps its own means over the bars where both symbols have a return,
+    and a missing bar decays the pair's old weight (ignore_na=False), so the
+    next return is blended in with weight alpha / (old weight + alpha).
+    """
+
+    def __init__(self, symbols, span=None, alpha=None):
+        self.alpha = _alpha(span, alpha)
+        self.span = span
+        super().__init__(symbols)
+
+    def _lookback(self):
+        return warmup.recurrence(self.alpha) + 1
+
+    def _reset_state(self):
+        n = len(self.symbols)
+        # While every bar has a return for all symbols or none, all pairs
+        # share their bars: one mean per symbol and one old weight serve
+        # every pair. The first bar missing only some symbols splits them
+        # into _mean[i, j], the mean of i over the bars shared with j, and
+        # a weight per pair.
+        self._mean = np.full(n, np.nan)
+        self._weight = 1.0
+        self._cov = np.zeros((n, n))
+
+    def _fold(self, returns):
+        observed = ~np.isnan(returns)
+        self._weight *= 1.0 - self.alpha
+        if not observed.any():
+            return
+        if self._mean.ndim == 1:
+            if observed.all():
+                self._fold_shared(returns)
+                return
+            n = len(self.symbols)
+            self._mean = np.repeat(self._mean[:, None], n, axis=1)
+            self._weight = np.full((n, n), self._weight)
+        self._fold_pairs(returns, observed)
+
+    def _fold_shared(self, returns):
+        if np.isnan(self._mean).all():
+            self._mean = returns.copy()
+            self._weight = 1.0
+            return
+        # pandas' blend with k = alpha / (old weight + alpha) reduces to a
+        # rank-1 update: mean += k d, cov = (1 - k) (cov + k d d^T)
+        k = self.alpha / (self._weight + self.alpha)
+        d = returns - self._mean
+        self._mean += k * d
+        self._cov *= 1.0 - k
+        self._cov += ((1.0 - k) * k) * np.outer(d, d)
+        self._weight = 1.0
+
+    def _fold_pairs(self, returns, observed):
+        # Whole-matrix arithmetic, in place where possible, is cheaper than
+        # gathering the observed block; pairs missing a return are masked off
+        cur = returns[:, None]
+        d = cur - self._mean
+        k = self._weight + self.alpha
+        np.divide(self.alpha, k, out=k)
+        kd = k * d
+        cov = kd * d.T
+        cov += self._cov
+        np.subtract(1.0, k, out=k)
+        cov *= k
+        kd += self._mean
+
+        pair = np.outer(observed, observed)
+        fresh = pair & np.isnan(self._mean)
+        if fresh.any():
+            # A pair's first shared return seeds its means
+            pair &= ~fresh
+            self._cov[fresh] = 0.0
+            np.copyto(self._mean, np.broadcast_to(cur, fresh.shape), where=fresh)
+            self._weight[fresh] = 1.0
+        np.copyto(self._cov, cov, where=pair)
+        np.copyto(self._mean, kd, where=pair)
+        self._weight[pair] = 1.0
+
+    def _matrix(self):
+        fresh = np.isnan(self._mean)
+        if fresh.ndim == 1:
+            fresh = fresh[:, None] | fresh[None, :]
+        cov = self._cov.copy()
+        cov[fresh] = np.nan
+        return cov
@@ -1,49 +1,68 @@
-from .Candle_fetcher import candle_list
-import pandas as pd
+from .intermediates import load
+from . import kernels
+import numpy as np
 
 # Volatility indicators measure the degree of variation in price movements.
 # Examples include ATR, Bollinger Bands, Chaikin Volatility, etc.
 
-def atr(symbol, period, interval):
+# Candles each indicator fetches, as a function of its parameters
+LOOKBACK = {
+    # period + 1 for TR diff
+    "atr": lambda period, **_: period + 1,
+    "bollinger_bands": lambda period, **_: period,
+    "bollinger_bands_sweep": lambda periods, **_: max(periods),
+}
+
+def _atr(ix, period, output="value"):
+    atr_series = ix.atr(period)
+    if output == "series":
+        return ix.aligned(atr_series)
+    return atr_series[-1]
+
+def atr(symbol, period, interval, output="value", bars=None):
     """
     Calculate the Average True Range (ATR).
     """
-    # Fetch period + 1 for TR diff
-    candles = candle_list(symbol, period + 1, interval, field="all")
-    if not candles:
+    ix = load(symbol, LOOKBACK["atr"](period), interval, output, bars)
+    if ix is None:
+        return None
+    return _atr(ix, period, output)
+
+def _bollinger_bands(ix, period, multiplier=2, output="value"):
+    bands = kernels.bollinger_bands(ix.close, period, multiplier, mean=ix.rolling_mean(period), std=ix.rolling_std(period))
+    if np.isnan(bands["upper"]).all():
         return None
+
+    if output == "series":
+        return ix.aligned(bands)
         
-    high = pd.Series([c["high"] for c in candles])
-    low = pd.Series([c["low"] for c in candles])
-    close = pd.Series([c["close"] for c in candles])
-    
-    tr1 = high - low
-    tr2 = (high - close.shift(1)).abs()
-    tr3 = (low - close.shift(1)).abs()
-    
-    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-    atr_value = tr.rolling(window=period).mean().iloc[-1]
-    return atr_value
-
-def bollinger_bands(symbol, period, interval, multiplier=2):
+    return {
+        "upper": bands["upper"][-1],
+        "middle": bands["middle"][-1],
+        "lower": bands["lower"][-1]
+    }
+
+def bollinger_bands(symbol, period, interval, multiplier=2, output="value", bars=None):
     """
     Calculate Bollinger Bands.
     """
-    close = candle_list(symbol, period, interval, field="close")
-    if not close:
+    ix = load(symbol, LOOKBACK["bollinger_bands"](period), interval, output, bars)
+    if ix is None:
         return None
-        
-    close_ser = pd.Series(close)
-    middle_band = close_ser.rolling(window=period).mean()
-    std_dev = close_ser.rolling(window=period).std()
-    upper_band = middle_band + (multiplier * std_dev)
-    lower_band = middle_band - (multiplier * std_dev)
-    
-    if upper_band.dropna().empty:
+    return _bollinger_bands(ix, period, multiplier, output)
+
+def _bollinger_bands_sweep(ix, periods, multiplier=2, output="value"):
+    bands = kernels.bollinger_bands_sweep(ix.close, periods, multiplier)
+    return ix.swept(bands, periods, output)
+
+def bollinger_bands_sweep(symbol, periods, interval, multiplier=2, output="value", bars=None):
+    """
+    Calculate Bollinger Bands for every period in `periods` from one fetch.
+    :return: DataFrame of upper/middle/lower indexed by period; with
+             output="series" one column per (band, period).
+    """
+    periods = list(periods)
+    ix = load(symbol, LOOKBACK["bollinger_bands_sweep"](periods), interval, output, bars)
+    if ix is None:
         return None
-        
-    return {
-        "upper": upper_band.iloc[-1],
-        "middle": middle_band.iloc[-1],
-        "lower": lower_band.iloc[-1]
-    }
+    return _bollinger_bands_sweep(ix, periods, multiplier, output)
@@ -1,10 +1,25 @@
-from .Candle_fetcher import candle_list
-import pandas as pd
+from .intermediates import load
+from . import kernels
 
 # Volume-based indicators analyze the amount of traded volume to understand market strength.
 # Examples include OBV, Accumulation/Distribution Line, Chaikin Money Flow, etc.
 
-def obv(symbol, period, interval):
+# Candles each indicator fetches, as a function of its parameters
+LOOKBACK = {
+    "obv": lambda period, **_: period,
+    "ad_line": lambda period, **_: period,
+}
+
+def _obv(ix, period, output="value"):
+    if output == "series":
+        # OBV over the `period` candles ending at each bar
+        return ix.aligned(kernels.obv(ix.close, ix.volume, period))
+
+    # Cumulative over exactly `period` candles
+    ix = ix.tail(period)
+    return kernels.obv(ix.close, ix.volume)[-1]
+
+def obv(symbol, period, interval, output="value", bars=None):
     """
     Calculate the On-Balance Volume (OBV).
     :param symbol: Stock symbol (e.g., "AAPL").
@@ -12,22 +27,20 @@ def obv(symbol, period, interval):
     :param interval: Interval for the candle data (e.g., "1d").
     :return: OBV value.
     """
-    candles = candle_list(symbol, period, interval, field="all")
-    if not candles:
+    ix = load(symbol, LOOKBACK["obv"](period), interval, output, bars)
+    if ix is None:
         return None
-        
-    close_ser = pd.Series([c["close"] for c in candles])
-    volume_ser = pd.Series([c["volume"] for c in candles])
-    
-    diff = close_ser.diff()
-    direction = pd.Series(0, index=close_ser.index)
-    direction[diff > 0] = 1
-    direction[diff < 0] = -1
-    
-    obv_value = (direction * volume_ser).cumsum().iloc[-1]
-    return obv_value
-
-def ad_line(symbol, period, interval):
+    return _obv(ix, period, output)
+
+def _ad_line(ix, period, output="value"):
+    if output == "series":
+        # A/D over the `period` candles ending at each bar
+        return ix.aligned(kernels.ad_line(ix.high, ix.low, ix.close, ix.volume, period))
+
+    ix = ix.tail(period)
+    return kernels.ad_line(ix.high, ix.low, ix.close, ix.volume)[-1]
+
+def ad_line(symbol, period, interval, output="value", bars=None):
     """
     Calculate the Accumulation/Distribution Line.
     :param symbol: Stock symbol (e.g., "AAPL").
@@ -35,17 +48,7 @@ def ad_line(symbol, period, interval):
     :param interval: Interval for the candle data (e.g., "1d").
     :return: A/D Line value.
     """
-    candles = candle_list(symbol, period, interval, field="all")
-    if not candles:
+    ix = load(symbol, LOOKBACK["ad_line"](period), interval, output, bars)
+    if ix is None:
         return None
-        
-    high_ser = pd.Series([c["high"] for c in candles])
-    low_ser = pd.Series([c["low"] for c in candles])
-    close_ser = pd.Series([c["close"] for c in candles])
-    volume_ser = pd.Series([c["volume"] for c in candles])
-    
-    mfm = ((close_ser - low_ser) - (high_ser - close_ser)) / (high_ser - low_ser)
-    mfm = mfm.fillna(0)
-    mfv = mfm * volume_ser
-    adl = mfv.cumsum().iloc[-1]
-    return adl
+    return _ad_line(ix, period, output)
@@ -0,0 +1,40 @@
+import os
+import math
+
+# Warm-up requirements behind every indicator's LOOKBACK. Window-bound stages
+# (rolling means, extremes, diffs) need exactly their window. EMA/Wilder
+# recurrences never fully forget their seed, so they declare how many candles
+# bring the seed's remaining weight, (1 - alpha) ** k, below a tolerance.
+# Stages applied one after another are combined with chain(), e.g. RSI is
+# chain(2, wilder(period)): one close diff, then Wilder smoothing.
+# SIM_WARMUP_TOLERANCE (or the `tolerance` argument of indicators.compute)
+# trades fetch size against convergence.
+
+TOLERANCE = float(os.getenv("SIM_WARMUP_TOLERANCE", "0.01"))
+
+
+def recurrence(alpha, tolerance=None):
+    """
+    Candles until the seed of an alpha-smoothed recurrence (adjust=False)
+    weighs at most `tolerance` in its output.
+    """
+    tolerance = TOLERANCE if tolerance is None else tolerance
+    if alpha >= 1 or tolerance >= 1:
+        return 1
+    return math.ceil(math.log(tolerance) / math.log(1 - alpha)) + 1
+
+
+def ema(span, tolerance=None):
+    return recurrence(2 / (span + 1), tolerance)
+
+
+def wilder(period, tolerance=None):
+    return recurrence(1 / period, tolerance)
+
+
+def chain(*needs):
+    """
+    Candles needed by stages applied in sequence, each needing `need`
+    candles of the previous stage's output for its first value.
+    """
+    return sum(needs) - (len(needs) - 1)
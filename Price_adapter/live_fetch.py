@@ -1,33 +1,35 @@
 import yfinance as yf
-from diskcache import Cache
 import asyncio
+import json
 import os
-def init_cache():
-    return Cache("./Temporary/cache_liveprices", timeout=30)
+import sys
+import zmq
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Indicators.shared_ticks import TickRingWriter
+
+# Every tick is announced here so Trade_adapter matches only the symbol that moved
+PRICE_PUB_ENDPOINT = os.getenv("SIM_PRICE_PUB_ENDPOINT", "tcp://127.0.0.1:5556")
 
 
 async def main(stocklist):
-    cache = init_cache()
+    # One shared-memory tick ring per symbol, read by Trade_adapter
+    rings = {stock: TickRingWriter(stock) for stock in stocklist}
+    publisher = zmq.Context.instance().socket(zmq.PUB)
+    publisher.bind(PRICE_PUB_ENDPOINT)
+
     async def handle(message):
         stock = message["id"]
         price = message["price"]
         print("stock:", stock, "\n price:", price)
-        cache_key = f"prices:{stock}"
-        
-        # Store multiple responses to allow delayed price pulling
-        current_data = cache.get(cache_key, [])
-        if not isinstance(current_data, list):
-            current_data = []
-            
-        now = asyncio.get_event_loop().time()
-        current_data.append({"price": price, "ts": now})
-        
-        # Retain only the last 1.5 minutes (90 seconds)
-        cutoff = now - 90
-        current_data = [d for d in current_data if d["ts"] > cutoff]
-        
-        cache.set(cache_key, current_data)
-        #cache.flush()
+
+        ring = rings.get(stock)
+        if ring is None:
+            ring = rings[stock] = TickRingWriter(stock)
+        # Wall-clock time, which the delayed-price lookup compares against
+        ts = ring.append(price)
+        # PUB never blocks; with no subscriber the update is dropped
+        publisher.send_multipart([stock.encode('utf-8'), json.dumps({"ts": ts, "price": price}).encode('utf-8')])
 
     try:
         async with yf.AsyncWebSocket(verbose=False) as ws:
@@ -42,8 +44,10 @@ async def main(stocklist):
         print("Shutting down gracefully...")
         raise
     finally:
-        cache.close()
-        print("Cache closed. Program exited.")
+        publisher.close()
+        for ring in rings.values():
+            ring.close()
+        print("Tick rings closed. Program exited.")
 
 if __name__ == "__main__":
     stocklist = ["AAPL", "GOOG", "MSFT"]
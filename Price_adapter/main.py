@@ -1,11 +1,44 @@
+import os
+import sys
 import json
 import asyncio
+from datetime import timedelta
 from fetch import fetch_multiple_candles
 from db_handler import imt_sqlite, update_diskcache_candles
 from live_fetch import main as live_fetch_main
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Indicators import resample
+from Indicators.Candle_fetcher import candle_frame
+from Indicators.shared_candles import CandleRingWriter
 
-async def periodic_fetch_and_store(stocklist: list[str]):
+# Intervals published to shared memory for the strategy processes
+SHM_INTERVALS = [i for i in os.getenv("SIM_SHM_INTERVALS", "1m,5m,15m,1h,1d").split(",") if i]
+
+
+def resample_new_candles(candles):
+    """
+    Fold each newly stored 1m candle into the higher intervals, so strategies
+    read 5m/15m/1h/1d bars from the local store instead of the network.
+    """
+    for symbol, candle in candles.items():
+        try:
+            start = candle["timestamp"]
+            resample.update_all(symbol, start, start + timedelta(minutes=1))
+        except Exception as e:
+            print(f"Error resampling {symbol} candles: {e}")
+
+
+def publish_shared_candles(writers):
+    for writer in writers:
+        try:
+            # Reads through the local store, so only new bars hit the network
+            writer.publish(candle_frame(writer.symbol, writer.capacity, writer.interval))
+        except Exception as e:
+            print(f"Error publishing {writer.symbol} {writer.interval} candles: {e}")
+
+
+async def periodic_fetch_and_store(stocklist: list[str], writers=()):
     #stocklist_str = " ".join(stocklist)
 
     while True:
@@ -17,9 +50,12 @@ async def periodic_fetch_and_store(stocklist: list[str]):
                 candle_data = dict(candle_data)      # shallow copy
                 update_diskcache_candles(ticker, candle_data)
 
+            await asyncio.to_thread(resample_new_candles, updated_prices)
+
         except Exception as e:
             print(f"Error during periodic fetch and store: {e}")
 
+        await asyncio.to_thread(publish_shared_candles, writers)
         await asyncio.sleep(60)
 
 
@@ -28,8 +64,14 @@ async def main():
         stocklist: list[str] = json.load(f)
     live_task = asyncio.create_task(live_fetch_main(stocklist.copy()))
 
+    writers = [
+        CandleRingWriter(symbol, interval)
+        for symbol in stocklist
+        for interval in SHM_INTERVALS
+    ]
+
     try:
-        await periodic_fetch_and_store(stocklist.copy())
+        await periodic_fetch_and_store(stocklist.copy(), writers)
     except (asyncio.CancelledError, KeyboardInterrupt):
         print("Main loop interrupted.")
     finally:
@@ -40,6 +82,9 @@ async def main():
         except asyncio.CancelledError:
             print("Live fetch task successfully killed.")
 
+        for writer in writers:
+            writer.close()
+
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -4,18 +4,45 @@ import zmq
 import json
 import uuid
 import logging
+import signal
 import csv
+import math
+import heapq
+import itertools
+import threading
+import numpy as np
 from datetime import datetime, timezone
 from diskcache import Cache
 
+from Indicators import shared_ticks
+
 # -------------------------------------------------
 # Configuration
 # -------------------------------------------------
 
 ZMQ_BIND_ENDPOINT = os.getenv("SIM_TRADE_BIND_ENDPOINT", "tcp://127.0.0.1:5555")
 STATE_CACHE_PATH = os.getenv("SIM_STATE_CACHE_PATH", "./Temporary/state")
-LIVEPRICES_CACHE_PATH = os.getenv("SIM_LIVEPRICES_CACHE_PATH", "./Temporary/cache_liveprices")
 ORDER_HISTORY_FILE = os.getenv("SIM_ORDER_HISTORY_FILE", "./Temporary/order_history.csv")
+PRICE_PUB_ENDPOINT = os.getenv("SIM_PRICE_PUB_ENDPOINT", "tcp://127.0.0.1:5556")
+# Orders execute against the price this many seconds ago
+PRICE_DELAY_SECONDS = float(os.getenv("SIM_PRICE_DELAY_SECONDS", "60"))
+# Safety net: every symbol with resting orders is re-matched this often, in
+# case price updates were dropped (e.g. sent before this adapter subscribed)
+MATCH_SWEEP_SECONDS = float(os.getenv("SIM_MATCH_SWEEP_SECONDS", "5"))
+# Position write-behind: flush at least this often, or sooner once this many
+# positions have changed; SQLite sync level of the state cache (off/normal/full)
+LEDGER_FLUSH_SECONDS = float(os.getenv("SIM_LEDGER_FLUSH_MS", "50")) / 1000
+LEDGER_FLUSH_BATCH = int(os.getenv("SIM_LEDGER_FLUSH_BATCH", "1000"))
+STATE_SYNC = os.getenv("SIM_STATE_SYNC", "normal")
+_SQLITE_SYNC = {"off": 0, "normal": 1, "full": 2}
+if STATE_SYNC not in _SQLITE_SYNC:
+    raise ValueError(f"SIM_STATE_SYNC must be one of {', '.join(_SQLITE_SYNC)}; got {STATE_SYNC!r}")
+# Order history: buffered fills are written every this many rows or ms, files
+# roll over past the size limit (0 disables); format is csv, binary or both
+HISTORY_FLUSH_ROWS = int(os.getenv("SIM_ORDER_HISTORY_FLUSH_ROWS", "500"))
+HISTORY_FLUSH_SECONDS = float(os.getenv("SIM_ORDER_HISTORY_FLUSH_MS", "200")) / 1000
+HISTORY_ROTATE_BYTES = int(float(os.getenv("SIM_ORDER_HISTORY_ROTATE_MB", "64")) * 1024 * 1024)
+HISTORY_FORMAT = os.getenv("SIM_ORDER_HISTORY_FORMAT", "csv")
 
 # -------------------------------------------------
 # Logging
@@ -54,60 +81,22 @@ def _error(code, message=None):
 def _now_s():
     return time.time()
 
-def get_delayed_price(cache, symbol, delay_seconds=60):
+def get_delayed_price(symbol, delay_seconds=PRICE_DELAY_SECONDS):
     """
     Pulls the price from one minute ago (or specified delay).
-    Finds the price just before the target timestamp.
+    Binary search in the symbol's shared tick ring for the last tick at or
+    before the target time; None if the ring no longer reaches back that far.
     """
-    cache_key = f"prices:{symbol}"
-    price_data = cache.get(cache_key, [])
-    
-    if not isinstance(price_data, list) or not price_data:
-        return None
-        
-    target_ts = _now_s() - delay_seconds
-    
-    # price_data is sorted by 'ts' (appended in order)
-    # Find the one just before target_ts
-    selected_price = None
-    for item in price_data:
-        if item["ts"] <= target_ts:
-            selected_price = item["price"]
-        else:
-            # Since it's sorted, once we exceed target_ts, we've found our match
-            break
-            
-    # Fallback: if all are newer than target_ts, return the oldest available
-    if selected_price is None and price_data:
-        selected_price = price_data[0]["price"]
-        
-    return selected_price
+    return shared_ticks.price_at(symbol, _now_s() - delay_seconds)
 
-def log_trade(strategy_id, symbol, action, quantity, price):
-    file_exists = os.path.isfile(ORDER_HISTORY_FILE)
-    try:
-        with open(ORDER_HISTORY_FILE, 'a', newline='') as csvfile:
-            writer = csv.writer(csvfile)
-            if not file_exists:
-                writer.writerow(['Timestamp', 'Strategy_ID', 'Symbol', 'Action', 'Executed_Quantity', 'Executed_Price'])
-            
-            timestamp_str = datetime.fromtimestamp(_now_s(), tz=timezone.utc).isoformat()
-            writer.writerow([timestamp_str, strategy_id, symbol, action, quantity, price])
-    except Exception as e:
-        logger.error(f"Failed to write to order history: {e}")
-
-def update_position(state_cache, strategy_id, symbol, action_type, quantity, execution_price):
+def update_position(ledger, strategy_id, symbol, action_type, quantity, execution_price):
     """
-    Updates the position and avg_price inside diskcache.
+    Updates the position and avg_price in the position ledger.
     Supports short selling and properly weights average cost bases.
     """
     state_key = f"{strategy_id}:{symbol}"
     
-    current_state = state_cache.get(state_key, {"qty": 0, "avg_price": 0.0})
-    
-    # Handle older version of diskcache that might just store integers
-    if isinstance(current_state, int):
-        current_state = {"qty": current_state, "avg_price": 0.0}
+    current_state = ledger.get(state_key, {"qty": 0, "avg_price": 0.0})
         
     current_qty = current_state.get("qty", 0)
     current_avg = current_state.get("avg_price", 0.0)
@@ -147,26 +136,431 @@ def update_position(state_cache, strategy_id, symbol, action_type, quantity, exe
         new_avg = 0.0
         
     new_state = {"qty": new_qty, "avg_price": new_avg}
-    state_cache.set(state_key, new_state)
+    ledger.set(state_key, new_state)
     
     return new_qty, new_avg
 
+# -------------------------------------------------
+# Position Ledger
+# -------------------------------------------------
+
+# Positions live in memory, owned by the adapter's main loop, so a fill is
+# acknowledged without touching disk. A flusher thread writes the changed
+# positions behind, each batch in one SQLite transaction of the state cache.
+#
+# Durability: a batch is durable once its transaction commits. With
+# SIM_STATE_SYNC=normal (SQLite WAL, synchronous=NORMAL) a commit survives
+# the adapter crashing but not necessarily an OS crash or power loss, which
+# can drop the last committed batches; full fsyncs every commit; off leaves
+# syncing to the OS. Either way, fills acknowledged within the last flush
+# interval (SIM_LEDGER_FLUSH_MS) before the adapter dies may be missing from
+# the restored positions, which are whatever the state cache holds at the
+# next start. A clean shutdown flushes everything; if the final flush keeps
+# failing, the positions it could not write are logged for manual recovery.
+
+# Final flushes tried on close, this far apart
+LEDGER_CLOSE_ATTEMPTS = 3
+LEDGER_CLOSE_RETRY_SECONDS = 0.5
+
+class PositionLedger:
+    def __init__(self, cache, flush_seconds=LEDGER_FLUSH_SECONDS, flush_batch=LEDGER_FLUSH_BATCH):
+        self.cache = cache
+        self.flush_seconds = flush_seconds
+        self.flush_batch = flush_batch
+        self._positions = {}
+        self._dirty = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closing = False
+
+        for key in cache.iterkeys():
+            state = cache.get(key)
+            # Handle older version of diskcache that might just store integers
+            if isinstance(state, int):
+                state = {"qty": state, "avg_price": 0.0}
+            if state is not None:
+                self._positions[key] = state
+
+        self._thread = threading.Thread(target=self._run, name="position-flusher", daemon=True)
+        self._thread.start()
+
+    def __len__(self):
+        return len(self._positions)
+
+    def get(self, key, default=None):
+        return self._positions.get(key, default)
+
+    def set(self, key, state):
+        self._positions[key] = state
+        with self._lock:
+            self._dirty[key] = state
+            pending = len(self._dirty)
+        if pending >= self.flush_batch:
+            self._wake.set()
+
+    def flush(self):
+        """
+        Write the positions changed since the last flush in one transaction.
+        """
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+        if not dirty:
+            return 0
+        try:
+            with self.cache.transact():
+                for key, state in dirty.items():
+                    self.cache.set(key, state)
+        except Exception as e:
+            logger.error(f"Failed to persist {len(dirty)} positions, kept for the next flush: {e}")
+            with self._lock:
+                # Newer states set meanwhile win
+                for key, state in dirty.items():
+                    self._dirty.setdefault(key, state)
+            return 0
+        return len(dirty)
+
+    def _run(self):
+        while not self._closing:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            self.flush()
+
+    def close(self):
+        self._closing = True
+        self._wake.set()
+        self._thread.join()
+        for attempt in range(LEDGER_CLOSE_ATTEMPTS):
+            if attempt:
+                time.sleep(LEDGER_CLOSE_RETRY_SECONDS)
+            self.flush()
+            if not self._dirty:
+                return
+        for key, state in self._dirty.items():
+            logger.error(f"Position not persisted: {key} = {json.dumps(state)}")
+
+# -------------------------------------------------
+# Order History Journal
+# -------------------------------------------------
+
+# Fills are buffered in memory and appended by a writer thread, so recording
+# one costs a list append. Files stay open between batches and roll over to
+# <name>.<UTC time><ext> once past SIM_ORDER_HISTORY_ROTATE_MB. Rows a file
+# failed to take stay queued for it and go first on the next flush. Rows
+# buffered when the adapter dies are lost; a clean shutdown writes them all.
+#
+# The binary journal (<name>.bin) holds fixed-width HISTORY_DTYPE records:
+# read_history() loads a file as a NumPy record array without parsing.
+# Strategy IDs and symbols longer than their fields are truncated there.
+
+HISTORY_HEADER = ['Timestamp', 'Strategy_ID', 'Symbol', 'Action', 'Executed_Quantity', 'Executed_Price']
+HISTORY_DTYPE = np.dtype([
+    ("ts", "<f8"),
+    ("strategy_id", "S32"),
+    ("symbol", "S16"),
+    ("action", "S4"),
+    ("quantity", "<f8"),
+    ("price", "<f8"),
+])
+
+def read_history(path):
+    """
+    Records of a binary order history file.
+    """
+    return np.fromfile(path, dtype=HISTORY_DTYPE)
+
+class _HistoryFile:
+    """
+    One append-only history file, rotated by size.
+    """
+
+    def __init__(self, path, binary, rotate_bytes):
+        self.path = path
+        self.binary = binary
+        self.rotate_bytes = rotate_bytes
+        # Rows of failed writes, retried ahead of the next batch
+        self.pending = []
+        self._file = None
+
+    def _open(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if self.binary:
+            self._file = open(self.path, "ab")
+        else:
+            self._file = open(self.path, "a", newline="")
+            if self._file.tell() == 0:
+                csv.writer(self._file).writerow(HISTORY_HEADER)
+
+    def _rotate(self):
+        self._file.close()
+        self._file = None
+        base, ext = os.path.splitext(self.path)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+        os.replace(self.path, f"{base}.{stamp}{ext}")
+
+    def write(self, rows):
+        # Rotate before writing, so a failed rotation leaves the rows unwritten
+        if self._file is not None and self.rotate_bytes and self._file.tell() >= self.rotate_bytes:
+            self._rotate()
+        if self._file is None:
+            self._open()
+        if self.binary:
+            records = np.array([(ts, strategy_id.encode(), symbol.encode(), action.encode(), quantity, price)
+                                for ts, strategy_id, symbol, action, quantity, price in rows], dtype=HISTORY_DTYPE)
+            self._file.write(records.tobytes())
+        else:
+            csv.writer(self._file).writerows(
+                [datetime.fromtimestamp(ts, tz=timezone.utc).isoformat(), *row] for ts, *row in rows
+            )
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+class OrderJournal:
+    def __init__(self, path=ORDER_HISTORY_FILE, fmt=HISTORY_FORMAT, flush_rows=HISTORY_FLUSH_ROWS,
+                 flush_seconds=HISTORY_FLUSH_SECONDS, rotate_bytes=HISTORY_ROTATE_BYTES):
+        if fmt not in ("csv", "binary", "both"):
+            raise ValueError(f"Unknown order history format: {fmt}")
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.files = []
+        if fmt in ("csv", "both"):
+            self.files.append(_HistoryFile(path, False, rotate_bytes))
+        if fmt in ("binary", "both"):
+            self.files.append(_HistoryFile(os.path.splitext(path)[0] + ".bin", True, rotate_bytes))
+
+        self._rows = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closing = False
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+
+    def record(self, strategy_id, symbol, action, quantity, price):
+        """
+        Buffer a fill, stamped now.
+        """
+        with self._lock:
+            self._rows.append((_now_s(), strategy_id, symbol, action, quantity, price))
+            pending = len(self._rows)
+        if pending >= self.flush_rows:
+            self._wake.set()
+
+    def flush(self):
+        """
+        Write the buffered rows to every file; a file that fails keeps its
+        rows and retries them on the next flush.
+        """
+        with self._lock:
+            rows, self._rows = self._rows, []
+        caught_up = True
+        for history_file in self.files:
+            batch = history_file.pending + rows
+            if not batch:
+                continue
+            try:
+                history_file.write(batch)
+            except Exception as e:
+                logger.error(f"Failed to write {len(batch)} rows to order history {history_file.path}, retrying: {e}")
+                history_file.close()
+                history_file.pending = batch
+                caught_up = False
+                continue
+            history_file.pending = []
+        return len(rows) if caught_up else 0
+
+    def _run(self):
+        while not self._closing:
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            self.flush()
+
+    def close(self):
+        self._closing = True
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+        for history_file in self.files:
+            if history_file.pending:
+                logger.error(f"Dropping {len(history_file.pending)} rows not written to order history {history_file.path}")
+            history_file.close()
+
+# -------------------------------------------------
+# Limit Order Book
+# -------------------------------------------------
+
+class SymbolBook:
+    """
+    Resting limit orders of one symbol: buys in a max-heap and sells in a
+    min-heap keyed by limit price, oldest first at equal prices, so only
+    the orders a price actually crosses are ever touched.
+    """
+
+    __slots__ = ("buys", "sells")
+
+    def __init__(self):
+        self.buys = []   # (-limit, seq, item)
+        self.sells = []  # (limit, seq, item)
+
+    def __len__(self):
+        return len(self.buys) + len(self.sells)
+
+    def crossed(self, price):
+        """
+        Pop and return every order executable at `price`.
+        """
+        filled = []
+        while self.buys and -self.buys[0][0] >= price:
+            filled.append(heapq.heappop(self.buys)[2])
+        while self.sells and self.sells[0][0] <= price:
+            filled.append(heapq.heappop(self.sells)[2])
+        return filled
+
+
+class LimitOrderBook:
+    """
+    Pending limit orders indexed by symbol and limit price.
+    """
+
+    def __init__(self):
+        self.books = {}
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return sum(len(book) for book in self.books.values())
+
+    def add(self, identity, payload):
+        book = self.books.get(payload["symbol"])
+        if book is None:
+            book = self.books[payload["symbol"]] = SymbolBook()
+        item = {"identity": identity, "payload": payload}
+        limit = payload["price"]
+        if payload["action"] == "buy":
+            heapq.heappush(book.buys, (-limit, next(self._seq), item))
+        else:
+            heapq.heappush(book.sells, (limit, next(self._seq), item))
+
+    def crossed(self, symbol, price):
+        book = self.books.get(symbol)
+        if book is None:
+            return []
+        filled = book.crossed(price)
+        if not book:
+            del self.books[symbol]
+        return filled
+
+    def symbols(self):
+        return list(self.books)
+
+# -------------------------------------------------
+# Matching
+# -------------------------------------------------
+
+# Scheduled just past the change, so the tick is at or before now - delay
+_SCHEDULE_SLACK = 1e-6
+
+class MatchSchedule:
+    """
+    When each symbol's delayed price next changes, as a heap of (time,
+    symbol) holding one live entry per symbol; superseded entries are
+    skipped when they surface.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._due = {}
+
+    def add(self, symbol, when):
+        current = self._due.get(symbol)
+        if current is not None and current <= when:
+            return
+        self._due[symbol] = when
+        heapq.heappush(self._heap, (when, symbol))
+
+    def next_due(self):
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else math.inf
+
+    def pop_due(self, now):
+        due = set()
+        while self._heap and self._heap[0][0] <= now:
+            when, symbol = heapq.heappop(self._heap)
+            if self._due.get(symbol) == when:
+                del self._due[symbol]
+                due.add(symbol)
+        return due
+
+def schedule_next_change(schedule, pending_orders, symbol):
+    """
+    Schedule `symbol` for matching when the next tick already received
+    becomes its delayed price. Without one, its next tick schedules it.
+    """
+    if symbol not in pending_orders.books:
+        return
+    tick_ts = shared_ticks.next_tick_time(symbol, _now_s() - PRICE_DELAY_SECONDS)
+    if tick_ts is not None:
+        schedule.add(symbol, tick_ts + PRICE_DELAY_SECONDS + _SCHEDULE_SLACK)
+
+def match_pending(socket, positions, history, pending_orders, symbol):
+    """
+    Execute the resting orders of `symbol` its delayed price crosses.
+    """
+    live_price = get_delayed_price(symbol)
+    if live_price is None:
+        return
+
+    for pending_item in pending_orders.crossed(symbol, live_price):
+        identity = pending_item["identity"]
+        order = pending_item["payload"]
+        strategy_id = order["strategy_id"]
+        action_type = order["action"]
+        quantity = order["quantity"]
+        requested_price = order["price"]
+
+        if action_type == "buy":
+            new_qty, new_avg = update_position(positions, strategy_id, symbol, "buy", quantity, live_price)
+            logger.info(f"PENDING BUY EXECUTION: {strategy_id} bought {quantity} {symbol} @ {live_price}. (Limit: {requested_price}) New Pos: {new_qty} (Avg: {new_avg:.2f})")
+            history.record(strategy_id, symbol, "buy", quantity, live_price)
+        else:
+            new_qty, new_avg = update_position(positions, strategy_id, symbol, "sell", quantity, live_price)
+            logger.info(f"PENDING SELL EXECUTION: {strategy_id} sold {quantity} {symbol} @ {live_price}. (Limit: {requested_price}) New Pos: {new_qty} (Avg: {new_avg:.2f})")
+            history.record(strategy_id, symbol, "sell", quantity, live_price)
+        response_data = _ok({
+            "symbol": symbol,
+            "action": action_type,
+            "executed_quantity": quantity,
+            "executed_price": live_price,
+            "current_position": new_qty,
+            "current_avg_price": new_avg,
+            "ts": _now_s()
+        })
+        socket.send_multipart([identity, json.dumps(response_data).encode('utf-8')])
+
 # -------------------------------------------------
 # Main Loop Setup
 # -------------------------------------------------
 
+def _terminate(signum, frame):
+    raise KeyboardInterrupt
+
 def main():
     logger.info("Initializing Advanced Trade Adapter...")
+    # Shut down cleanly on SIGTERM too, flushing buffered positions and history
+    signal.signal(signal.SIGTERM, _terminate)
     
     # Ensure Temp directory exists
     os.makedirs("./Temporary", exist_ok=True)
     
     # Initialize Diskcache
     logger.info(f"Connecting to State Cache: {STATE_CACHE_PATH}")
-    state_cache = Cache(STATE_CACHE_PATH, timeout=30)
-    
-    logger.info(f"Connecting to Live Prices Cache: {LIVEPRICES_CACHE_PATH}")
-    liveprices_cache = Cache(LIVEPRICES_CACHE_PATH, timeout=30)
+    state_cache = Cache(STATE_CACHE_PATH, timeout=30, sqlite_synchronous=_SQLITE_SYNC[STATE_SYNC])
+    positions = PositionLedger(state_cache)
+    logger.info(f"Loaded {len(positions)} positions; write-behind every {LEDGER_FLUSH_SECONDS * 1000:.0f}ms (sync: {STATE_SYNC})")
     
     # Initialize ZeroMQ
     context = zmq.Context.instance()
@@ -178,67 +572,56 @@ def main():
     poller = zmq.Poller()
     poller.register(socket, zmq.POLLIN)
     
-    pending_orders = [] # List of dicts
+    # Ticks from Price_adapter's live feed wake the loop for that symbol only
+    price_updates = context.socket(zmq.SUB)
+    logger.info(f"Subscribing to price updates on {PRICE_PUB_ENDPOINT}")
+    price_updates.connect(PRICE_PUB_ENDPOINT)
+    price_updates.setsockopt(zmq.SUBSCRIBE, b"")
+    poller.register(price_updates, zmq.POLLIN)
+
+    pending_orders = LimitOrderBook()
+    schedule = MatchSchedule()
+    next_sweep = _now_s()
     
-    logger.info(f"Writing history to: {ORDER_HISTORY_FILE}")
+    history = OrderJournal()
+    logger.info(f"Writing history to: {', '.join(f.path for f in history.files)}")
     logger.info("Trade Adapter is running and listening for orders.")
     
     try:
         while True:
             try:
-                # 1. Process pending limit orders
-                still_pending = []
-                for pending_item in pending_orders:
-                    identity = pending_item["identity"]
-                    order = pending_item["payload"]
-                    strategy_id = order["strategy_id"]
-                    symbol = order["symbol"]
-                    action_type = order["action"]
-                    quantity = order["quantity"]
-                    requested_price = order["price"]
-                    
-                    live_price = get_delayed_price(liveprices_cache, symbol)
-                    
-                    executed = False
-                    if live_price is not None:
-                        if action_type == "buy" and live_price <= requested_price:
-                            new_qty, new_avg = update_position(state_cache, strategy_id, symbol, "buy", quantity, live_price)
-                            logger.info(f"PENDING BUY EXECUTION: {strategy_id} bought {quantity} {symbol} @ {live_price}. (Limit: {requested_price}) New Pos: {new_qty} (Avg: {new_avg:.2f})")
-                            log_trade(strategy_id, symbol, "buy", quantity, live_price)
-                            response_data = _ok({
-                                "symbol": symbol,
-                                "action": "buy",
-                                "executed_quantity": quantity,
-                                "executed_price": live_price,
-                                "current_position": new_qty,
-                                "current_avg_price": new_avg,
-                                "ts": _now_s()
-                            })
-                            socket.send_multipart([identity, json.dumps(response_data).encode('utf-8')])
-                            executed = True
-                        elif action_type == "sell" and live_price >= requested_price:
-                            new_qty, new_avg = update_position(state_cache, strategy_id, symbol, "sell", quantity, live_price)
-                            logger.info(f"PENDING SELL EXECUTION: {strategy_id} sold {quantity} {symbol} @ {live_price}. (Limit: {requested_price}) New Pos: {new_qty} (Avg: {new_avg:.2f})")
-                            log_trade(strategy_id, symbol, "sell", quantity, live_price)
-                            response_data = _ok({
-                                "symbol": symbol,
-                                "action": "sell",
-                                "executed_quantity": quantity,
-                                "executed_price": live_price,
-                                "current_position": new_qty,
-                                "current_avg_price": new_avg,
-                                "ts": _now_s()
-                            })
-                            socket.send_multipart([identity, json.dumps(response_data).encode('utf-8')])
-                            executed = True
-                            
-                    if not executed:
-                        still_pending.append(pending_item)
-                
-                pending_orders = still_pending
-                
-                # 2. Poll for new messages (100ms timeout)
-                events = dict(poller.poll(100))
+                # 1. Match the symbols whose delayed price may have changed
+                now = _now_s()
+                due = schedule.pop_due(now)
+                if now >= next_sweep:
+                    due.update(pending_orders.symbols())
+                    next_sweep = now + MATCH_SWEEP_SECONDS
+                for symbol in due:
+                    match_pending(socket, positions, history, pending_orders, symbol)
+                    schedule_next_change(schedule, pending_orders, symbol)
+
+                # 2. Sleep until an order, a tick or the next price change
+                timeout = max(0.0, min(schedule.next_due(), next_sweep) - _now_s())
+                events = dict(poller.poll(timeout * 1000))
+
+                if price_updates in events:
+                    while True:
+                        try:
+                            message_parts = price_updates.recv_multipart(zmq.NOBLOCK)
+                        except zmq.Again:
+                            break
+                        try:
+                            symbol, tick = message_parts
+                            symbol = symbol.decode('utf-8')
+                            if symbol not in pending_orders.books:
+                                continue
+                            due = json.loads(tick)["ts"] + PRICE_DELAY_SECONDS + _SCHEDULE_SLACK
+                        except (ValueError, KeyError, TypeError) as e:
+                            logger.error(f"Ignoring malformed price update {message_parts!r}: {e!r}")
+                            continue
+                        # The tick becomes the delayed price once the delay has passed
+                        schedule.add(symbol, due)
+
                 if socket in events:
                     # Receive multipart message: [identity, payload]
                     message_parts = socket.recv_multipart()
@@ -271,7 +654,7 @@ def main():
                         continue
                         
                     # Fetch immediate live price
-                    live_price = get_delayed_price(liveprices_cache, symbol)
+                    live_price = get_delayed_price(symbol)
                     
                     response_data = None
                     
@@ -284,9 +667,11 @@ def main():
                             elif action_type == "sell" and live_price >= requested_price:
                                 can_execute_immediately = True
                                 
-                        if not can_execute_immediately:
+                        # Unknown actions fall through to the INVALID_ACTION reply
+                        if not can_execute_immediately and action_type in ("buy", "sell"):
                             # Queue order
-                            pending_orders.append({"identity": identity, "payload": payload})
+                            pending_orders.add(identity, payload)
+                            schedule_next_change(schedule, pending_orders, symbol)
                             logger.info(f"ORDER QUEUED: {action_type} {quantity} {symbol} @ limit {requested_price} for {strategy_id}")
                             continue
                     
@@ -299,9 +684,9 @@ def main():
                         continue
                         
                     if action_type == "buy":
-                        new_qty, new_avg = update_position(state_cache, strategy_id, symbol, "buy", quantity, execution_price)
+                        new_qty, new_avg = update_position(positions, strategy_id, symbol, "buy", quantity, execution_price)
                         logger.info(f"IMMEDIATE BUY EXECUTION: {strategy_id} bought {quantity} {symbol} @ {execution_price}. New Pos: {new_qty} (Avg: {new_avg:.2f})")
-                        log_trade(strategy_id, symbol, "buy", quantity, execution_price)
+                        history.record(strategy_id, symbol, "buy", quantity, execution_price)
                         
                         response_data = _ok({
                             "symbol": symbol,
@@ -314,9 +699,9 @@ def main():
                         })
                         
                     elif action_type == "sell":
-                        new_qty, new_avg = update_position(state_cache, strategy_id, symbol, "sell", quantity, execution_price)
+                        new_qty, new_avg = update_position(positions, strategy_id, symbol, "sell", quantity, execution_price)
                         logger.info(f"IMMEDIATE SELL EXECUTION: {strategy_id} sold {quantity} {symbol} @ {execution_price}. New Pos: {new_qty} (Avg: {new_avg:.2f})")
-                        log_trade(strategy_id, symbol, "sell", quantity, execution_price)
+                        history.record(strategy_id, symbol, "sell", quantity, execution_price)
                         
                         response_data = _ok({
                             "symbol": symbol,
@@ -338,10 +723,20 @@ def main():
     except KeyboardInterrupt:
         logger.info("Trade Adapter shutting down...")
     finally:
+        # Persist fills first: a failing close must not keep the other
+        # store from flushing, nor leave the sockets open
+        try:
+            positions.close()
+        except Exception as e:
+            logger.error(f"Failed to close the position ledger: {e}")
+        try:
+            history.close()
+        except Exception as e:
+            logger.error(f"Failed to close the order history: {e}")
         socket.close()
+        price_updates.close()
         context.term()
         state_cache.close()
-        liveprices_cache.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,49 @@
+import numpy as np
+
+from Indicators import benchmark
+
+# Helpers shared by the parity tests: comparison of kernel or indicator output
+# with a reference, and a candle source that replays seeded synthetic bars up
+# to a movable "now" for the streaming and universe trackers.
+
+INTERVAL = "1m"
+
+
+def assert_parity(actual, expected, rtol=1e-9, atol=None):
+    """
+    Same NaN mask and values within `rtol`, or `atol` (default: rtol times
+    the largest expected value) where values are near zero.
+    """
+    actual = np.asarray(actual, dtype="float64")
+    expected = np.asarray(expected, dtype="float64")
+    assert actual.shape == expected.shape
+    assert np.array_equal(np.isnan(actual), np.isnan(expected))
+    if atol is None:
+        atol = rtol * (np.nanmax(np.abs(expected)) if np.isfinite(expected).any() else 1.0)
+    np.testing.assert_allclose(actual, expected, rtol=rtol, atol=atol, equal_nan=True)
+
+
+def synthetic(symbol, n, seed=0):
+    return benchmark.SyntheticSource(seed)(symbol, n, INTERVAL)
+
+
+class ReplaySource:
+    """
+    Candle source (see Candle_fetcher.set_data_source) serving each symbol's
+    frame up to, not including, the bar opening at `now`. Frames may miss
+    bars; they are cut by open time, so symbols stay aligned.
+    """
+
+    def __init__(self, frames, now):
+        self.frames = frames
+        self.now = now
+
+    def __call__(self, symbol, no_of_candles, interval):
+        frame = self.frames.get(symbol)
+        if frame is None:
+            return None
+        stop = int(np.searchsorted(frame.timestamp, self.now))
+        return frame[:stop].tail(no_of_candles)
+
+    def advance(self, bars=1):
+        self.now += bars * 60
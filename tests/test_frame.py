@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+
+from Indicators.frame import CandleFrame
+from Indicators.intermediates import Intermediates
+
+
+def _frame(n):
+    close = np.arange(n, dtype="float64") + 100
+    return CandleFrame("TEST", close, close + 1, close - 1, close, np.ones(n), 60 * np.arange(n))
+
+
+@pytest.mark.parametrize("n, expected", [(0, []), (3, [107, 108, 109]), (10, list(range(100, 110))), (25, list(range(100, 110)))])
+def test_tail(n, expected):
+    frame = _frame(10)
+    assert frame.tail(n).close.tolist() == expected
+    assert Intermediates(frame).tail(n).candles.close.tolist() == expected
+
+
+def test_tail_of_empty_frame():
+    assert len(_frame(0).tail(0)) == 0
+    assert len(_frame(0).tail(5)) == 0
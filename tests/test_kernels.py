@@ -0,0 +1,233 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from Indicators import kernels
+
+from parity import assert_parity
+
+# Parity of the array kernels with the pandas implementations they replaced
+# (rolling().apply lambdas, per-bar .iloc loops, pandas rolling windows), on
+# seeded random walks with a flat stretch and a gap of missing bars.
+
+N = 3000
+
+
+def _walk(seed, flat=True):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, N)))
+    if flat:
+        close[1200:1260] = close[1199]
+    spread = np.abs(rng.normal(0, 0.5, N))
+    high = np.maximum(close, close + spread)
+    low = np.minimum(close, close - spread[::-1])
+    return high, low, close
+
+
+# ---------------------------------------------------------------------------
+# Previous pandas implementations
+# ---------------------------------------------------------------------------
+
+def _reference_wma(series, period):
+    if len(series) < period:
+        return pd.Series([np.nan] * len(series))
+    weights = np.arange(1, period + 1)
+    return series.rolling(period).apply(lambda x: np.dot(x, weights) / weights.sum(), raw=True)
+
+
+def _reference_hma(series, period):
+    diff = 2 * _reference_wma(series, period // 2) - _reference_wma(series, period)
+    return _reference_wma(diff.dropna(), int(np.sqrt(period))).reindex(series.index)
+
+
+def _reference_cci(high, low, close, cci_period):
+    tp = (high + low + close) / 3
+    sma = tp.rolling(cci_period).mean()
+    mad = tp.rolling(cci_period).apply(lambda x: np.mean(np.abs(x - x.mean())), raw=True)
+    return (tp - sma) / (0.015 * mad)
+
+
+def _reference_kama(series, period, fast=2, slow=30):
+    change = (series - series.shift(period)).abs()
+    volatility = (series - series.shift(1)).abs().rolling(period).sum()
+    volatility = volatility.replace(0, np.nan)
+    er = (change / volatility).fillna(0)
+    sc = (er * (2 / (fast + 1) - 2 / (slow + 1)) + 2 / (slow + 1)) ** 2
+
+    ama_val = pd.Series(index=series.index, dtype="float64")
+    ama_val.iloc[period - 1] = series.iloc[period - 1]
+    for i in range(period, len(series)):
+        ama_val.iloc[i] = ama_val.iloc[i-1] + sc.iloc[i] * (series.iloc[i] - ama_val.iloc[i-1])
+    return ama_val
+
+
+def _reference_supertrend(high_ser, low_ser, close_ser, period, multiplier=3):
+    tr1 = high_ser - low_ser
+    tr2 = (high_ser - close_ser.shift(1)).abs()
+    tr3 = (low_ser - close_ser.shift(1)).abs()
+    tr = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
+    atr = tr.rolling(window=period).mean()
+
+    hl2 = (high_ser + low_ser) / 2
+    basic_upperband = hl2 + multiplier * atr
+    basic_lowerband = hl2 - multiplier * atr
+
+    final_upperband = pd.Series(0.0, index=high_ser.index)
+    final_lowerband = pd.Series(0.0, index=high_ser.index)
+    supertrend_vals = pd.Series(0.0, index=high_ser.index)
+
+    for i in range(1, len(high_ser)):
+        if pd.isna(atr[i]): continue
+
+        if basic_upperband[i] < final_upperband[i-1] or close_ser[i-1] > final_upperband[i-1]:
+            final_upperband[i] = basic_upperband[i]
+        else:
+            final_upperband[i] = final_upperband[i-1]
+
+        if basic_lowerband[i] > final_lowerband[i-1] or close_ser[i-1] < final_lowerband[i-1]:
+            final_lowerband[i] = basic_lowerband[i]
+        else:
+            final_lowerband[i] = final_lowerband[i-1]
+
+        if supertrend_vals[i-1] == final_upperband[i-1] and close_ser[i] <= final_upperband[i]:
+            supertrend_vals[i] = final_upperband[i]
+        elif supertrend_vals[i-1] == final_upperband[i-1] and close_ser[i] > final_upperband[i]:
+            supertrend_vals[i] = final_lowerband[i]
+        elif supertrend_vals[i-1] == final_lowerband[i-1] and close_ser[i] >= final_lowerband[i]:
+            supertrend_vals[i] = final_lowerband[i]
+        elif supertrend_vals[i-1] == final_lowerband[i-1] and close_ser[i] < final_lowerband[i]:
+            supertrend_vals[i] = final_upperband[i]
+        else:
+            supertrend_vals[i] = final_upperband[i]
+
+    return supertrend_vals.where(atr.notna())
+
+
+# ---------------------------------------------------------------------------
+# Loop-free and array-based rewrites
+# ---------------------------------------------------------------------------
+
+@pytest.mark.parametrize("period", [2, 9, 50])
+def test_wma(period):
+    _, _, close = _walk(1)
+    assert_parity(kernels.wma(close, period), _reference_wma(pd.Series(close), period))
+
+
+def test_wma_short_input():
+    assert np.isnan(kernels.wma(np.arange(3.0), 5)).all()
+
+
+@pytest.mark.parametrize("period", [4, 16, 55])
+def test_hma(period):
+    _, _, close = _walk(2)
+    assert_parity(kernels.hma(close, period), _reference_hma(pd.Series(close), period))
+
+
+@pytest.mark.parametrize("cci_period", [5, 20])
+def test_cci(cci_period):
+    high, low, close = _walk(3)
+    expected = _reference_cci(pd.Series(high), pd.Series(low), pd.Series(close), cci_period)
+    assert_parity(kernels.cci(high, low, close, cci_period), expected.replace([np.inf, -np.inf], np.nan).where(expected.notna()))
+
+
+@pytest.mark.parametrize("period", [3, 10, 30])
+def test_kama(period):
+    _, _, close = _walk(4)
+    close = close[:1500]
+    assert_parity(kernels.kama(close, period), _reference_kama(pd.Series(close), period))
+
+
+@pytest.mark.parametrize("period,multiplier", [(7, 3), (14, 2)])
+def test_supertrend(period, multiplier):
+    high, low, close = _walk(5)
+    high, low, close = high[:1500], low[:1500], close[:1500]
+    expected = _reference_supertrend(pd.Series(high), pd.Series(low), pd.Series(close), period, multiplier)
+    assert_parity(kernels.supertrend(high, low, close, period, multiplier), expected)
+
+
+# ---------------------------------------------------------------------------
+# Running-sum sweeps and rolling statistics
+# ---------------------------------------------------------------------------
+
+PERIODS = [2, 5, 20, 200]
+
+
+def _with_gap(values):
+    values = values.copy()
+    values[700:705] = np.nan
+    return values
+
+
+def test_sma_sweep():
+    close = _with_gap(_walk(6)[2])
+    out = kernels.sma_sweep(close, PERIODS)
+    for row, period in enumerate(PERIODS):
+        assert_parity(out[row], pd.Series(close).rolling(period).mean())
+
+
+def test_rolling_std_sweep():
+    close = _with_gap(_walk(7)[2])
+    out = kernels.rolling_std_sweep(close, PERIODS)
+    for row, period in enumerate(PERIODS):
+        # Running sums round relative to the price level, not to the spread
+        expected = pd.Series(close).rolling(period).std()
+        assert_parity(out[row], expected, rtol=1e-7, atol=1e-9 * np.nanmax(close))
+
+
+def test_ema_sweep():
+    close = _walk(8)[2]
+    out = kernels.ema_sweep(close, [3, 12, 26])
+    for row, span in enumerate([3, 12, 26]):
+        assert_parity(out[row], pd.Series(close).ewm(span=span, adjust=False).mean())
+
+
+def test_bollinger_and_z_score_sweeps():
+    close = _walk(9)[2]
+    bands = kernels.bollinger_bands_sweep(close, PERIODS)
+    z = kernels.z_score_sweep(close, PERIODS)
+    for row, period in enumerate(PERIODS):
+        single = kernels.bollinger_bands(close, period)
+        for name in ("upper", "middle", "lower"):
+            assert_parity(bands[name][row], single[name])
+        # Against exact window statistics: pandas' own rolling std drifts by
+        # ~1e-5 on near-flat pairs. Both give 0 over the flat stretch
+        windows = np.lib.stride_tricks.sliding_window_view(close, period)
+        std = np.r_[np.full(period - 1, np.nan), windows.std(axis=1, ddof=1)]
+        mean = np.r_[np.full(period - 1, np.nan), windows.mean(axis=1)]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            expected = np.where(std < 1e-9, 0.0, (close - mean) / std)
+        assert_parity(z[row], expected, rtol=1e-6)
+
+
+def test_rolling_moments():
+    returns = _with_gap(kernels.returns(_walk(10, flat=False)[2]))
+    out = kernels.rolling_moments(returns, [5, 20, 60])
+    for row, period in enumerate([5, 20, 60]):
+        rolling = pd.Series(returns).rolling(period)
+        assert_parity(out["mean"][row], rolling.mean())
+        assert_parity(out["variance"][row], rolling.var(), rtol=1e-7)
+        assert_parity(out["skew"][row], rolling.skew(), rtol=1e-6, atol=1e-6)
+
+
+def test_linear_regression_sweep():
+    close = _walk(11, flat=False)[2][:800]
+    out = kernels.linear_regression_sweep(close, [10, 50])
+    for row, period in enumerate([10, 50]):
+        x = np.arange(period)
+        for end in range(period - 1, len(close), 37):
+            slope, intercept = np.polyfit(x, close[end - period + 1:end + 1], 1)
+            assert out["slope"][row, end] == pytest.approx(slope, rel=1e-7, abs=1e-9)
+            assert out["intercept"][row, end] == pytest.approx(intercept, rel=1e-7)
+
+
+def test_rolling_covariance():
+    x = kernels.returns(_walk(12, flat=False)[2])
+    y = 0.5 * x + kernels.returns(_walk(13, flat=False)[2]) * 0.1
+    x = _with_gap(x)
+    out = kernels.rolling_covariance(x, y, [10, 60])
+    sx, sy = pd.Series(x), pd.Series(y)
+    for row, period in enumerate([10, 60]):
+        cov = sx.rolling(period).cov(sy)
+        assert_parity(out["covariance"][row], cov, rtol=1e-7)
+        assert_parity(out["correlation"][row], sx.rolling(period).corr(sy), rtol=1e-7)
+        assert_parity(out["beta"][row], cov / sx.rolling(period).var(), rtol=1e-7)
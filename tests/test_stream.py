@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+from Indicators import Candle_fetcher
+from Indicators import momentum
+from Indicators import moving_avg
+from Indicators import statistics
+from Indicators import stream
+from Indicators import trend
+from Indicators import volatility
+from Indicators import volume
+
+from parity import INTERVAL, ReplaySource, assert_parity, synthetic
+
+# Streaming indicators against the batch functions: warmed up on the same
+# candles the value equals the batch value, and after N more closed bars the
+# values seen equal the batch output="series" over all those candles.
+
+SYMBOL = "TEST"
+TOTAL = 2000
+WARM_UP = 1500
+N = 120
+
+
+BENCHMARK = "INDEX"
+
+
+@pytest.fixture
+def replay(monkeypatch):
+    frame = synthetic(SYMBOL, TOTAL)
+    # The benchmark misses a bar in the warm-up window and one while following
+    keep = np.ones(TOTAL, dtype=bool)
+    keep[[WARM_UP - 30, WARM_UP + 40]] = False
+    frames = {SYMBOL: frame, BENCHMARK: synthetic(BENCHMARK, TOTAL, seed=1).mask(keep)}
+    source = ReplaySource(frames, int(frame.timestamp[WARM_UP]))
+    monkeypatch.setattr(Candle_fetcher, "_data_source", source)
+    return source
+
+
+def _flatten(value, key):
+    if value is None:
+        return float("nan")
+    value = value[key] if key else value
+    return float("nan") if value is None else value
+
+
+def _follow(indicator, replay):
+    seen = [indicator.value]
+    for _ in range(N):
+        replay.advance()
+        seen.append(indicator.refresh())
+    return seen
+
+
+CASES = [
+    (lambda: stream.EMA(20), lambda **kw: moving_avg.ema(SYMBOL, 20, INTERVAL, **kw), None),
+    (lambda: stream.RSI(14), lambda **kw: momentum.rsi(SYMBOL, 14, INTERVAL, **kw), None),
+    (lambda: stream.MACD(12, 26, 9), lambda **kw: moving_avg.macd(SYMBOL, 12, 26, 9, INTERVAL, **kw), ("macd", "signal")),
+    (lambda: stream.ATR(14), lambda **kw: volatility.atr(SYMBOL, 14, INTERVAL, **kw), None),
+    (lambda: stream.ADX(14), lambda **kw: trend.adx(SYMBOL, 14, INTERVAL, **kw), None),
+    (lambda: stream.OBV(20), lambda **kw: volume.obv(SYMBOL, 20, INTERVAL, **kw), None),
+    (lambda: stream.ADLine(20), lambda **kw: volume.ad_line(SYMBOL, 20, INTERVAL, **kw), None),
+]
+
+
+@pytest.mark.parametrize("make, batch, keys", CASES, ids=["ema", "rsi", "macd", "atr", "adx", "obv", "ad_line"])
+def test_stream_matches_batch(replay, make, batch, keys):
+    indicator = make().warm_up(SYMBOL, INTERVAL)
+    expected = batch()
+    for key in keys or (None,):
+        assert_parity(_flatten(indicator.value, key), _flatten(expected, key))
+
+    seen = _follow(indicator, replay)
+    series = batch(output="series", bars=N + 1)
+    for key in keys or (None,):
+        expected = series[key] if key else series
+        assert_parity([_flatten(v, key) for v in seen], expected.to_numpy())
+
+
+STATS = ("slope", "intercept", "r_squared", "variance", "skew")
+
+
+def test_rolling_stats(replay):
+    periods = [2, 3, 20, 50]
+    indicator = stream.RollingStats(periods).warm_up(SYMBOL, INTERVAL)
+    expected = statistics.rolling_statistics(SYMBOL, periods, INTERVAL)
+    for period in periods:
+        for name in STATS:
+            assert_parity(_flatten(indicator.value[period], name), expected.loc[period, name], rtol=1e-7)
+
+    seen = _follow(indicator, replay)
+    series = statistics.rolling_statistics(SYMBOL, periods, INTERVAL, output="series", bars=N + 1)
+    for period in periods:
+        for name in STATS:
+            actual = [_flatten(value[period], name) for value in seen]
+            # Both sides use running sums, rebuilt at different bars
+            assert_parity(actual, series[(name, period)].to_numpy(), rtol=1e-7)
+
+
+@pytest.mark.parametrize("period", [5, 20])
+def test_rolling_beta(replay, period):
+    indicator = stream.RollingBeta(BENCHMARK, period).warm_up(SYMBOL, INTERVAL)
+    batch = {
+        "beta": lambda **kw: statistics.beta(SYMBOL, BENCHMARK, period, INTERVAL, **kw),
+        "correlation": lambda **kw: statistics.correlation(SYMBOL, BENCHMARK, period, INTERVAL, **kw),
+    }
+    for name, value in batch.items():
+        assert_parity(_flatten(indicator.value, name), value())
+
+    seen = _follow(indicator, replay)
+    # The missing benchmark bar blanks the value until it leaves the window
+    assert sum(value is None for value in seen) == period + 1
+    for name, value in batch.items():
+        assert_parity([_flatten(v, name) for v in seen], value(output="series", bars=N + 1).to_numpy())
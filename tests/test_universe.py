@@ -0,0 +1,156 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from Indicators import Candle_fetcher
+from Indicators import kernels
+from Indicators import universe
+
+from parity import INTERVAL, ReplaySource, assert_parity, synthetic
+
+# Universe trackers and kernels against pandas on the same aligned candles.
+# The universe has gaps of missing bars and a symbol that starts late.
+
+SYMBOLS = ["A", "B", "C", "D", "E"]
+TOTAL = 2000
+WARM_UP = 1500
+N = 130
+
+
+def _frames(gaps):
+    frames = {symbol: synthetic(symbol, TOTAL, seed) for seed, symbol in enumerate(SYMBOLS)}
+    if gaps:
+        end = WARM_UP + N
+        keep = {symbol: np.ones(TOTAL, dtype=bool) for symbol in SYMBOLS}
+        # Missing inside the last window, long enough ago and during warm-up
+        keep["B"][end - 8:end - 6] = False
+        keep["C"][end - 60:end - 55] = False
+        keep["C"][WARM_UP - 100:WARM_UP - 95] = False
+        keep["D"][np.random.default_rng(3).random(TOTAL) < 0.01] = False
+        # Starts trading late in the warm-up window
+        keep["E"][:WARM_UP - 200] = False
+        frames = {symbol: frame.mask(keep[symbol]) for symbol, frame in frames.items()}
+    return frames
+
+
+def _install(monkeypatch, gaps):
+    source = ReplaySource(_frames(gaps), int(synthetic("A", TOTAL).timestamp[WARM_UP]))
+    monkeypatch.setattr(Candle_fetcher, "_data_source", source)
+    return source
+
+
+@pytest.fixture(params=[False, True], ids=["dense", "gaps"])
+def replay(request, monkeypatch):
+    return _install(monkeypatch, request.param)
+
+
+def _returns(no_of_candles):
+    u = universe.load(SYMBOLS, no_of_candles, INTERVAL)
+    return pd.DataFrame(u.close.T, columns=SYMBOLS).pct_change(fill_method=None)
+
+
+def _follow(tracker, replay, bars):
+    for _ in range(bars):
+        replay.advance()
+        tracker.refresh()
+
+
+@pytest.mark.parametrize("window", [20, 50])
+def test_rolling_covariance(replay, window):
+    tracker = universe.RollingCovariance(SYMBOLS, window).warm_up(INTERVAL, no_of_candles=400)
+    # Well past several rebuilds of the running sums, mid-way between two
+    _follow(tracker, replay, N)
+    expected = _returns(window + 1).rolling(window).cov().xs(window, level=0)
+    assert_parity(tracker.covariance().to_numpy(), expected.to_numpy())
+    corr = _returns(window + 1).rolling(window).corr().xs(window, level=0)
+    assert_parity(tracker.correlation().to_numpy(), corr.to_numpy(), rtol=1e-7)
+
+
+@pytest.mark.parametrize("span", [5, 30])
+def test_ew_covariance(replay, span):
+    tracker = universe.EWCovariance(SYMBOLS, span=span).warm_up(INTERVAL, no_of_candles=400)
+    _follow(tracker, replay, N)
+    returns = _returns(400 + N)
+    expected = returns.ewm(span=span, adjust=False).cov(bias=True).xs(len(returns) - 1, level=0)
+    assert_parity(tracker.covariance().to_numpy(), expected.to_numpy())
+
+
+# ---------------------------------------------------------------------------
+# Kernels, row by row
+# ---------------------------------------------------------------------------
+
+PERIOD = 14
+
+
+def _pandas_kernels(high, low, close):
+    """
+    The pandas versions of the single-symbol indicators on one NaN-padded row.
+    """
+    high, low, close = pd.Series(high), pd.Series(low), pd.Series(close)
+    delta = close.diff()
+    avg_gain = delta.clip(lower=0).ewm(alpha=1 / PERIOD, adjust=False).mean()
+    avg_loss = (-delta).clip(lower=0).ewm(alpha=1 / PERIOD, adjust=False).mean()
+    prev_close = close.shift()
+    tr = pd.concat([high - low, (high - prev_close).abs(), (low - prev_close).abs()], axis=1).max(axis=1)
+    mean = close.rolling(PERIOD).mean()
+    std = close.rolling(PERIOD).std()
+    return {
+        "sma": mean,
+        "ema": close.ewm(span=PERIOD, adjust=False).mean(),
+        "rsi": 100 - 100 / (1 + avg_gain / avg_loss),
+        "atr": tr.rolling(PERIOD).mean(),
+        "roc": close.pct_change(12, fill_method=None) * 100,
+        "z_score": (close - mean) / std,
+        "upper": mean + 2 * std,
+        "lower": mean - 2 * std,
+    }
+
+
+def _universe_kernels(u):
+    bands = universe.bollinger_bands(u.close, PERIOD)
+    return {
+        "sma": universe.sma(u.close, PERIOD),
+        "ema": universe.ema(u.close, PERIOD),
+        "rsi": universe.rsi(u.close, PERIOD),
+        "atr": universe.atr(u.high, u.low, u.close, PERIOD),
+        "roc": universe.roc(u.close, 12),
+        "z_score": universe.z_score(u.close, PERIOD),
+        "upper": bands["upper"],
+        "lower": bands["lower"],
+    }
+
+
+def test_kernels_match_single_symbol(monkeypatch):
+    _install(monkeypatch, gaps=True)
+    u = universe.load(SYMBOLS, 400, INTERVAL)
+    values = _universe_kernels(u)
+    # A has every bar; E starts late, so its row begins with NaN padding
+    for symbol in ("A", "E"):
+        row = u.row(symbol)
+        start = int(np.argmax(~np.isnan(u.close[row])))
+        assert symbol == "A" or start > 0
+        high, low, close = (field[row, start:] for field in (u.high, u.low, u.close))
+        bands = kernels.bollinger_bands(close, PERIOD)
+        expected = {
+            "sma": kernels.sma(close, PERIOD),
+            "ema": kernels.ema(close, PERIOD),
+            "rsi": kernels.rsi(close, PERIOD),
+            "atr": kernels.atr(high, low, close, PERIOD),
+            "roc": kernels.roc(close, 12),
+            "z_score": kernels.z_score(close, PERIOD),
+            "upper": bands["upper"],
+            "lower": bands["lower"],
+        }
+        for name, reference in expected.items():
+            assert np.isnan(values[name][row, :start]).all()
+            assert_parity(values[name][row, start:], reference)
+
+
+def test_kernels_match_pandas_with_gaps(monkeypatch):
+    _install(monkeypatch, gaps=True)
+    u = universe.load(SYMBOLS, 400, INTERVAL)
+    values = _universe_kernels(u)
+    for row in range(len(SYMBOLS)):
+        expected = _pandas_kernels(u.high[row], u.low[row], u.close[row])
+        for name, reference in expected.items():
+            assert_parity(values[name][row], reference)